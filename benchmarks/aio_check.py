@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+asyncio consistency check - verify files through commands.aio.verify_many
+and through the trust command, and report every validation state that
+differs between the two
+Usage: python benchmarks/aio_check.py <PATH>... [--concurrency N] [TRUST OPTIONS]
+
+The trust command runs uncached in its own process per file, so the asyncio
+side is checked against a single-threaded read with the same trust options.
+"""
+
+import os
+import sys
+import json
+import asyncio
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from commands.aio import verify_many, DEFAULT_CONCURRENCY
+from commands.views import parse_trust_args
+
+CLI = os.path.join(ROOT, "c2pa-py.py")
+
+
+def cli_state(path, trust_args):
+    """Validation state printed by the trust command for a file"""
+    cmd = [sys.executable, CLI, str(path), "--no-cache", "--compact", "trust", *trust_args]
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    try:
+        return json.loads(result.stdout).get("validation_state")
+    except json.JSONDecodeError:
+        return None
+
+
+async def check(paths, concurrency, trust_args):
+    """Number of files whose asyncio and CLI validation states differ"""
+    trust_opts = parse_trust_args(list(trust_args))
+    mismatches = 0
+    async for result in verify_many(paths, concurrency, trust_opts):
+        state = (result["result"] or {}).get("validation_state")
+        expected = await asyncio.to_thread(cli_state, result["path"], trust_args)
+        if state != expected:
+            mismatches += 1
+            print(f"MISMATCH {result['path']}: asyncio {state or result['status']}, "
+                  f"trust command {expected}")
+        else:
+            print(f"ok       {result['path']}: {state}")
+    return mismatches
+
+
+def main(args):
+    paths, trust_args = [], []
+    concurrency = DEFAULT_CONCURRENCY
+
+    i = 0
+    while i < len(args):
+        if args[i] == '--concurrency' and i + 1 < len(args):
+            concurrency = int(args[i + 1])
+            i += 2
+        elif args[i] == '--offline':
+            trust_args.append(args[i])
+            i += 1
+        elif args[i].startswith('--') and i + 1 < len(args):
+            trust_args += args[i:i + 2]
+            i += 2
+        else:
+            paths.append(args[i])
+            i += 1
+
+    if not paths:
+        print("Usage: python benchmarks/aio_check.py <PATH>... [--concurrency N] [TRUST OPTIONS]")
+        return 1
+
+    mismatches = asyncio.run(check(paths, concurrency, trust_args))
+    print(f"{len(paths) - mismatches}/{len(paths)} files agree")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
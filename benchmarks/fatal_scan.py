@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Fatal-error scan benchmark - the compiled trust policy against the former
+recursive walk of the whole manifest store, on large synthetic stores
+Usage: python benchmarks/fatal_scan.py [--manifests N] [--assertion-items N] [--depth N] [--repeat N]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from commands.policy import CompiledPolicy, DEFAULT_POLICY
+
+FATAL_CODES = DEFAULT_POLICY["fatal_codes"]["contains"]
+POLICY = CompiledPolicy(DEFAULT_POLICY)
+
+
+def recursive_find_errors(data, invalid_codes):
+    """The scanner the policy evaluator replaced, kept here as the reference"""
+    if isinstance(data, dict):
+        if "code" in data and isinstance(data["code"], str):
+            code_val = data["code"]
+            for bad_code in invalid_codes:
+                if bad_code in code_val:
+                    return True, f"Found fatal error '{code_val}' in structure."
+        for key, value in data.items():
+            found, reason = recursive_find_errors(value, invalid_codes)
+            if found: return True, reason
+    elif isinstance(data, list):
+        for item in data:
+            found, reason = recursive_find_errors(item, invalid_codes)
+            if found: return True, reason
+    return False, None
+
+
+def status(code):
+    return {"code": code, "url": "self#jumbf=c2pa.assertions/c2pa.hash.data",
+            "explanation": f"synthetic {code}"}
+
+
+def nested(depth):
+    """Nested dicts and lists, like ingredient stores embedded in an assertion"""
+    node = {"code": "ingredient.leaf", "value": 0}
+    for i in range(depth):
+        node = {"level": i, "children": [node]}
+    return node
+
+
+def synthetic_store(manifests=20, assertion_items=5000, depth=0, fatal=None):
+    """
+    A Reader-like store with big assertion payloads. fatal puts a fatal code
+    in the last ingredient delta so every scanner has to look everywhere.
+    """
+    store = {"active_manifest": "urn:c2pa:m0", "manifests": {}}
+    for m in range(manifests):
+        payload = [{"code": f"review.{i}", "value": i, "tags": ["a", "b", "c"]}
+                   for i in range(assertion_items)]
+        assertions = [{"label": "c2pa.actions.v2",
+                       "data": {"actions": [{"action": "c2pa.edited", "parameters": {"items": payload}}]}},
+                      {"label": "c2pa.metadata", "data": {"metadata": {"reviewRatings": payload[:100]}}}]
+        if depth:
+            assertions.append({"label": "com.example.nested", "data": nested(depth)})
+        store["manifests"][f"urn:c2pa:m{m}"] = {
+            "claim_generator": "bench/1.0",
+            "assertions": assertions,
+            "ingredients": [{"title": f"ingredient {m}",
+                             "validation_status": [status("claimSignature.validated")],
+                             "validation_results": {"activeManifest": {
+                                 "success": [status("assertion.hashedURI.match")] * 20,
+                                 "failure": [], "informational": []}}}],
+        }
+    store["validation_results"] = {
+        "activeManifest": {"success": [status("claimSignature.validated")] * 20,
+                           "failure": [], "informational": []},
+        "ingredientDeltas": [{"ingredientAssertionURI": "self#jumbf=ingredient",
+                              "validationDeltas": {"success": [], "informational": [],
+                                                   "failure": [status(fatal)] if fatal else []}}],
+    }
+    store["validation_state"] = "Valid"
+    return store
+
+
+def find_fatal_error(store):
+    """History check of the default policy, in the shape of the old scanner"""
+    clean, reason, _ = POLICY.evaluate(store)
+    return (False, None) if clean else (True, reason)
+
+
+def best_of(func, repeat):
+    """Fastest of repeat runs in seconds, with the result of the last run"""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run_case(name, store, repeat):
+    try:
+        old_time, old_result = best_of(lambda: recursive_find_errors(store, FATAL_CODES), repeat)
+        old_text = f"{old_time * 1000:9.2f} ms"
+    except RecursionError:
+        old_time, old_result, old_text = None, None, "RecursionError"
+    new_time, new_result = best_of(lambda: find_fatal_error(store), repeat)
+
+    speedup = f"{old_time / new_time:8.0f}x" if old_time else "       -"
+    print(f"{name:<28} {old_text:>15} {new_time * 1000:9.3f} ms {speedup}")
+    if old_result is not None and old_result != new_result:
+        print(f"  verdicts differ: {old_result} != {new_result}")
+
+
+def main(args):
+    opts = {"manifests": 20, "assertion-items": 5000, "depth": 5000, "repeat": 5}
+    i = 0
+    while i < len(args):
+        key = args[i].lstrip("-")
+        if key in opts and i + 1 < len(args):
+            opts[key] = int(args[i + 1])
+            i += 2
+        else:
+            print(__doc__.strip().splitlines()[-1])
+            return 1
+
+    repeat = opts["repeat"]
+    size = {"manifests": opts["manifests"], "assertion_items": opts["assertion-items"]}
+    print(f"{'case':<28} {'recursive':>15} {'iterative':>12} {'speedup':>9}")
+    run_case("clean store", synthetic_store(**size), repeat)
+    run_case("fatal in last delta", synthetic_store(fatal="assertion.dataHash.mismatch", **size), repeat)
+    run_case(f"nested payload (depth {opts['depth']})",
+             synthetic_store(depth=opts["depth"], **size), repeat)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
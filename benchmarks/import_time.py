@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Import-time budget - Startup imports of c2pa-py.py per invocation, measured
+with python -X importtime and checked against a budget
+Usage: python benchmarks/import_time.py [--dataset DIR] [--repeat N] [--scale X] [--top N]
+
+Each scenario fails when it imports a module it must not need, or when the
+median time of the imports made after interpreter startup exceeds its budget
+in milliseconds times --scale (raise it on slow machines). --top N lists the
+slowest modules. Exits with 1 on any failure.
+"""
+
+import os
+import sys
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+CLI = os.path.join(ROOT, "c2pa-py.py")
+DEFAULT_DATASET = os.path.join(ROOT, "C2PA_Dataset")
+
+# Modules only some commands need
+HEAVY = ("c2pa", "requests", "commands.trust", "commands.policy",
+         "commands.batch", "commands.serve", "http.server")
+
+# Scenario -> (arguments, modules it must not import, budget in ms).
+# SIGNED / UNSIGNED are replaced by dataset files with and without a manifest.
+SCENARIOS = {
+    "help": (["--help"], HEAVY, 5),
+    "batch-help": (["batch", "--help"], ("c2pa", "requests", "commands.serve"), 40),
+    "unsigned": (["UNSIGNED"], HEAVY, 45),
+    "info": (["SIGNED", "--info"], HEAVY[1:], 110),
+    "tree": (["SIGNED", "--tree"], HEAVY[1:], 110),
+    "trust-offline": (["SIGNED", "trust", "--offline"], ("requests", "commands.batch",
+                                                       "commands.serve", "http.server"), 130),
+}
+
+
+def pick_files(dataset):
+    """A dataset file with a manifest and one whose headers show none"""
+    from commands.locator import has_manifest
+    found = {}
+    for root, dirs, names in os.walk(dataset):
+        dirs.sort()
+        for name in sorted(names):
+            path = os.path.join(root, name)
+            try:
+                state = has_manifest(path)
+            except (OSError, ValueError):
+                continue
+            if state is True:
+                found.setdefault("SIGNED", path)
+            elif state is False:
+                found.setdefault("UNSIGNED", path)
+            if len(found) == 2:
+                return found
+    return found
+
+
+def import_times(args):
+    """
+    Run the CLI once under -X importtime and keep the imports made once the
+    interpreter is up, i.e. after site. Returns {module: (self µs,
+    cumulative µs, nesting level)}.
+    """
+    env = dict(os.environ, C2PATOOL_TRUST_OFFLINE="1")
+    proc = subprocess.run([sys.executable, "-X", "importtime", CLI] + args,
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                          text=True, env=env, cwd=ROOT)
+    modules = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        fields = line[len("import time:"):].split("|")
+        try:
+            self_us, cumulative_us = int(fields[0]), int(fields[1])
+        except ValueError:
+            continue  # column header
+        name = fields[2].rstrip()
+        if name == " site":
+            # Children are listed before their parent: drop the startup imports
+            modules.clear()
+            continue
+        level = (len(name) - len(name.lstrip()) - 1) // 2
+        modules[name.strip()] = (self_us, cumulative_us, level)
+    return modules
+
+
+def cli_imports_ms(modules):
+    """Time of the imports made by c2pa-py.py itself"""
+    return sum(cumulative for _, cumulative, level in modules.values() if level == 0) / 1000
+
+
+def run_scenario(name, args, forbidden, budget, repeat, top):
+    timings = []
+    modules = {}
+    for _ in range(repeat):
+        modules = import_times(args)
+        timings.append(cli_imports_ms(modules))
+    median = statistics.median(timings)
+
+    failures = [f"imports {module}" for module in forbidden if module in modules]
+    if median > budget:
+        failures.append(f"{median:.1f} ms over the {budget:.0f} ms budget")
+
+    print(f"{'FAIL' if failures else 'ok':<5} {name:<14} {median:8.1f} ms  (budget {budget:.0f} ms)")
+    for failure in failures:
+        print(f"        {failure}")
+    if top:
+        slowest = sorted(modules.items(), key=lambda item: -item[1][0])[:top]
+        for module, (self_us, _, _) in slowest:
+            print(f"        {self_us / 1000:7.2f} ms  {module}")
+    return not failures
+
+
+def main(args):
+    opts = {"dataset": DEFAULT_DATASET, "repeat": 5, "scale": 1.0, "top": 0}
+    i = 0
+    while i < len(args):
+        key = args[i].lstrip("-")
+        if key in opts and i + 1 < len(args):
+            opts[key] = args[i + 1] if key == "dataset" else float(args[i + 1])
+            i += 2
+        else:
+            print(__doc__.strip().splitlines()[2])
+            return 1
+
+    files = pick_files(opts["dataset"])
+    ok = True
+    for name, (scenario_args, forbidden, budget) in SCENARIOS.items():
+        missing = [arg for arg in scenario_args if arg in ("SIGNED", "UNSIGNED") and arg not in files]
+        if missing:
+            print(f"skip  {name:<14} no {missing[0].lower()} file in {opts['dataset']}")
+            continue
+        scenario_args = [files.get(arg, arg) for arg in scenario_args]
+        ok &= run_scenario(name, scenario_args, forbidden, budget * opts["scale"],
+                           int(opts["repeat"]), int(opts["top"]))
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
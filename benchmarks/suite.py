@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+C2PA Benchmark Suite - Latency, throughput and memory of every command over
+the dataset, per folder and per format, with cold and warm numbers
+Usage: python benchmarks/suite.py [--dataset DIR] [--commands LIST] [--repeat N]
+                                  [--save FILE] [--compare FILE] [--threshold PCT]
+
+Every command runs in its own worker process:
+  cold   first pass over the files, right after the imports, so it pays for
+         the trust store load and the first use of c2pa
+  warm   --repeat further passes in the same process
+Trust runs offline from the trust files already in the trust cache (or the
+local files given by C2PATOOL_TRUST_ANCHORS & co.). The result cache is
+disabled unless --cache is given.
+
+--save writes the results as a JSON baseline; --compare reports the change
+against a saved baseline and exits with 1 when a metric regresses by more
+than --threshold percent.
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import contextlib
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DEFAULT_DATASET = os.path.join(ROOT, "C2PA_Dataset")
+DEFAULT_THRESHOLD = 10.0
+
+# Command name -> views rendered by run_views
+COMMANDS = {
+    "default": [("default", None)],
+    "trust": [("trust", {"offline": True})],
+    "info": [("info", None)],
+    "tree": [("tree", None)],
+    "detailed": [("detailed", None)],
+    "ingredient": [("ingredient", None)],
+}
+
+# Metrics checked by --compare and whether a higher value is better
+LATENCY_METRICS = {"p50_ms": False, "p95_ms": False, "files_per_s": True}
+MEMORY_METRICS = {"peak_rss_mb": False}
+
+# Latency changes smaller than this are noise, whatever the percentage
+MIN_DELTA_MS = 0.5
+# Folders and formats with fewer timings are not compared
+MIN_SAMPLES = 10
+
+
+def dataset_files(dataset):
+    """Every file below the dataset folder, in a stable order"""
+    files = []
+    for root, dirs, names in os.walk(dataset):
+        dirs.sort()
+        for name in sorted(names):
+            if not name.startswith('.'):
+                files.append(os.path.join(root, name))
+    return files
+
+
+def folder_of(path, dataset):
+    """Top level dataset folder of a file, '.' for files at the root"""
+    relative = os.path.relpath(path, dataset)
+    return relative.split(os.sep)[0] if os.sep in relative else "."
+
+
+def format_of(path):
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    return {"jpeg": "jpg", "tiff": "tif"}.get(extension, extension or "none")
+
+
+def percentile(sorted_values, pct):
+    """Linear interpolation between the closest ranks"""
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * pct / 100.0
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    fraction = position - lower
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * fraction
+
+
+def summarize(latencies):
+    """Count, throughput and latency percentiles of a list of seconds"""
+    values = sorted(latencies)
+    total = sum(values)
+    ms = lambda seconds: None if seconds is None else round(seconds * 1000, 3)
+    return {
+        "files": len(values),
+        "files_per_s": round(len(values) / total, 2) if total > 0 else None,
+        "mean_ms": ms(total / len(values)) if values else None,
+        "p50_ms": ms(percentile(values, 50)),
+        "p95_ms": ms(percentile(values, 95)),
+        "p99_ms": ms(percentile(values, 99)),
+    }
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, None where unknown"""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KB elsewhere
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_worker(command, files, repeat, use_cache):
+    """
+    Body of a worker process: time every file for one command and return
+    {"startup_s", "cold", "warm", "nonzero", "peak_rss_mb"}; cold and warm
+    map each file to its latencies in seconds, nonzero lists the files that
+    gave a non-zero exit code (no manifest included).
+    """
+    start = time.perf_counter()
+    from commands.views import run_views
+    from commands.reader import configure_cache
+    configure_cache(enabled=bool(use_cache))
+    startup = time.perf_counter() - start
+
+    views = COMMANDS[command]
+    cold, warm = {}, {}
+    nonzero = set()
+
+    with open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):
+        for run in range(repeat + 1):
+            for path in files:
+                t0 = time.perf_counter()
+                if run_views(path, views) != 0:
+                    nonzero.add(path)
+                elapsed = time.perf_counter() - t0
+                if run == 0:
+                    cold[path] = [elapsed]
+                else:
+                    warm.setdefault(path, []).append(elapsed)
+
+    return {"startup_s": round(startup, 4), "cold": cold, "warm": warm,
+            "nonzero": sorted(nonzero), "peak_rss_mb": peak_rss_mb()}
+
+
+def run_command(command, files, repeat, use_cache):
+    """Run one command in a fresh interpreter and collect its raw timings"""
+    request = json.dumps({"command": command, "files": files,
+                          "repeat": repeat, "cache": use_cache})
+    env = dict(os.environ, C2PATOOL_TRUST_OFFLINE="1")
+    t0 = time.perf_counter()
+    proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--worker"],
+                          input=request, capture_output=True, text=True, env=env, cwd=ROOT)
+    wall = time.perf_counter() - t0
+    if proc.returncode != 0:
+        raise RuntimeError(f"{command} worker failed:\n{proc.stderr.strip()}")
+    raw = json.loads(proc.stdout)
+    raw["process_s"] = round(wall, 4)
+    return raw
+
+
+def report_command(raw, dataset):
+    """Aggregate the raw timings of one command into the baseline entry"""
+    cold = [t for times in raw["cold"].values() for t in times]
+    warm = [t for times in raw["warm"].values() for t in times]
+
+    groups = {"by_folder": {}, "by_format": {}}
+    for path, times in raw["warm"].items():
+        groups["by_folder"].setdefault(folder_of(path, dataset), []).extend(times)
+        groups["by_format"].setdefault(format_of(path), []).extend(times)
+
+    return {
+        "process_s": raw["process_s"],
+        "startup_s": raw["startup_s"],
+        "peak_rss_mb": raw["peak_rss_mb"],
+        "nonzero_exit": len(raw["nonzero"]),
+        "cold": summarize(cold),
+        "warm": summarize(warm),
+        "by_folder": {name: summarize(times) for name, times in sorted(groups["by_folder"].items())},
+        "by_format": {name: summarize(times) for name, times in sorted(groups["by_format"].items())},
+    }
+
+
+def environment():
+    """What the numbers were measured with"""
+    try:
+        from importlib.metadata import version
+        c2pa_version = version("c2pa-python")
+    except Exception:
+        c2pa_version = None
+    from commands.jsonio import BACKEND
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "c2pa_python": c2pa_version,
+        "json_backend": BACKEND,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def print_results(results):
+    header = (f"{'command':<11} {'files':>5} {'cold p50':>9} {'warm p50':>9} {'p95':>9} "
+              f"{'p99':>9} {'files/s':>8} {'startup':>8} {'RSS MB':>7}")
+    print(header)
+    print("-" * len(header))
+    for command, entry in results["commands"].items():
+        cold, warm = entry["cold"], entry["warm"]
+        fmt = lambda value, unit="": "-" if value is None else f"{value:.1f}{unit}"
+        print(f"{command:<11} {warm['files']:>5} {fmt(cold['p50_ms']):>9} {fmt(warm['p50_ms']):>9} "
+              f"{fmt(warm['p95_ms']):>9} {fmt(warm['p99_ms']):>9} {fmt(warm['files_per_s']):>8} "
+              f"{fmt(entry['startup_s'] * 1000):>8} {fmt(entry['peak_rss_mb']):>7}")
+
+
+def compare_entries(name, current, baseline, metrics, threshold):
+    """
+    Changes of some metrics of one summary against the baseline, as
+    (name, metric, old, new, change %, "regression" | "improved" | None)
+    """
+    rows = []
+    for metric, higher_is_better in metrics.items():
+        new, old = current.get(metric), baseline.get(metric)
+        if not new or not old:
+            continue
+        # Mean latency behind a throughput, to ignore sub-threshold noise too
+        delta_ms = abs(1000 / new - 1000 / old) if metric == "files_per_s" else abs(new - old)
+        if metric != "peak_rss_mb" and delta_ms < MIN_DELTA_MS:
+            rows.append((name, metric, old, new, 0.0, None))
+            continue
+        change = (new - old) / old * 100
+        worse = -change if higher_is_better else change
+        verdict = "regression" if worse > threshold else ("improved" if worse < -threshold else None)
+        rows.append((name, metric, old, new, change, verdict))
+    return rows
+
+
+def compare(results, baseline, threshold):
+    """
+    Print the change against a baseline, returns the regressions.
+    Groups with fewer than MIN_SAMPLES timings are too noisy to be judged.
+    """
+    rows = []
+    for command, entry in results["commands"].items():
+        old = baseline.get("commands", {}).get(command)
+        if old is None:
+            continue
+        for phase in ("cold", "warm"):
+            rows += compare_entries(f"{command} {phase}", entry[phase], old[phase],
+                                    LATENCY_METRICS, threshold)
+        for group in ("by_folder", "by_format"):
+            for name, summary in entry[group].items():
+                if name in old.get(group, {}) and summary["files"] >= MIN_SAMPLES:
+                    rows += compare_entries(f"{command} {name}", summary, old[group][name],
+                                            LATENCY_METRICS, threshold)
+        rows += compare_entries(command, entry, old, MEMORY_METRICS, threshold)
+
+    regressions = [row for row in rows if row[5] == "regression"]
+    improved = [row for row in rows if row[5] == "improved"]
+
+    print(f"\nChange against baseline ({len(rows)} metrics, threshold {threshold:g}%):")
+    for name, metric, old, new, change, verdict in regressions + improved:
+        print(f"  {verdict:<10} {name:<45} {metric:<12} {old:>10} -> {new:<10} {change:+7.1f}%")
+    if not regressions and not improved:
+        print("  no change beyond the threshold")
+    return regressions
+
+
+def main(args):
+    opts = {"dataset": DEFAULT_DATASET, "commands": list(COMMANDS), "repeat": 3,
+            "save": None, "compare": None, "threshold": DEFAULT_THRESHOLD, "cache": False}
+
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg in ('--dataset', '--save', '--compare') and i + 1 < len(args):
+            opts[arg[2:]] = args[i + 1]
+            i += 2
+        elif arg == '--commands' and i + 1 < len(args):
+            opts["commands"] = [c.strip() for c in args[i + 1].split(",") if c.strip()]
+            i += 2
+        elif arg == '--repeat' and i + 1 < len(args):
+            opts["repeat"] = max(1, int(args[i + 1]))
+            i += 2
+        elif arg == '--threshold' and i + 1 < len(args):
+            opts["threshold"] = float(args[i + 1])
+            i += 2
+        elif arg == '--cache':
+            opts["cache"] = True
+            i += 1
+        else:
+            print(__doc__.strip().splitlines()[2])
+            print(__doc__.strip().splitlines()[3])
+            return 1
+
+    unknown = [c for c in opts["commands"] if c not in COMMANDS]
+    if unknown:
+        print(f"Error: unknown command(s): {', '.join(unknown)} "
+              f"(choose from {', '.join(COMMANDS)})", file=sys.stderr)
+        return 1
+
+    dataset = os.path.abspath(opts["dataset"])
+    files = dataset_files(dataset)
+    if not files:
+        print(f"Error: no files in {dataset}", file=sys.stderr)
+        return 1
+
+    results = {"environment": environment(), "dataset": os.path.relpath(dataset, ROOT),
+               "files": len(files), "repeat": opts["repeat"], "cache": opts["cache"],
+               "commands": {}}
+    for command in opts["commands"]:
+        print(f"Running {command} over {len(files)} files...", file=sys.stderr, flush=True)
+        raw = run_command(command, files, opts["repeat"], opts["cache"])
+        results["commands"][command] = report_command(raw, dataset)
+
+    print_results(results)
+
+    if opts["save"]:
+        with open(opts["save"], "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBaseline saved to {opts['save']}")
+
+    if opts["compare"]:
+        with open(opts["compare"], "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("files") != results["files"]:
+            print(f"Warning: baseline has {baseline.get('files')} files, this run {results['files']}",
+                  file=sys.stderr)
+        regressions = compare(results, baseline, opts["threshold"])
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {opts['threshold']:g}%")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["--worker"]:
+        request = json.loads(sys.stdin.read())
+        result = run_worker(request["command"], request["files"],
+                            request["repeat"], request["cache"])
+        sys.stdout.write(json.dumps(result))
+        sys.exit(0)
+
+    sys.exit(main(sys.argv[1:]))
@@ -9,41 +9,35 @@ Usage:
     python c2pa.py <PATH> --detailed                   # Detailed JSON output
     python c2pa.py <PATH> --ingredient                 # Extract ingredients
     python c2pa.py <PATH> --output <FOLDER>            # Save JSON to file
+    python c2pa.py <PATH> --export-store <FOLDER>      # Save the raw .c2pa store
+    python c2pa.py <PATH> --info --tree trust          # Several views, one read
+    python c2pa.py - --mime image/jpeg trust < <FILE>  # Read the file from stdin
     python c2pa.py <PATH> trust                        # Trust verification
     python c2pa.py <PATH> trust --help                 # Trust options help
+    python c2pa.py batch <PATH|DIR|GLOB>... [OPTIONS]  # Run over many files
+    python c2pa.py serve [OPTIONS]                     # Local verification server
 """
 
-import json
 import sys
 import os
-from pathlib import Path
-from typing import Optional, Dict, Any
-import c2pa
-from commands.trust import cmd_trust, print_trust_help
-from commands.info import cmd_info
-from commands.tree import cmd_tree
-from commands.detailed import cmd_detailed
-from commands.ingredient import cmd_ingredient
-from commands.output import cmd_output
+import importlib
 
+# Sub-commands: name -> (module, entry point, help printer). Modules are
+# imported only when their command runs, so --help and every single-file
+# invocation skip the server, the process pool and their dependencies.
+# trust has no entry point of its own, it is rendered as a view.
+COMMANDS = {
+    'batch': ('commands.batch', 'main', 'print_batch_help'),
+    'serve': ('commands.serve', 'main', 'print_serve_help'),
+    'trust': ('commands.trust', None, 'print_trust_help'),
+}
 
 
+def load_command(name, help=False):
+    """Entry point of a sub-command, or its help printer"""
+    module, entry, printer = COMMANDS[name]
+    return getattr(importlib.import_module(module), printer if help else entry)
 
-def cmd_default(path: str):
-    """Default command: print JSON manifest with validation"""
-    try:
-        reader = c2pa.Reader(path)
-        raw_output = reader.json()
-
-        if not raw_output:
-            print(f"No manifest found in {path}")
-            return
-        
-        json_data = json.loads(raw_output)
-        print(json.dumps(json_data, indent=2))
-    except Exception:
-        print(f"No manifest found in {path}")
-        sys.exit(1)
 
 def main():
     """Main CLI entry point"""
@@ -56,75 +50,67 @@ def main():
         print_help()
         sys.exit(0)
     elif sys.argv[1] == 'trust' and sys.argv[2] in ('--help', '-h'):
-        print_trust_help()
+        load_command('trust', help=True)()
         sys.exit(0)
+    elif sys.argv[1] == 'batch':
+        if len(sys.argv) < 3 or sys.argv[2] in ('--help', '-h'):
+            load_command('batch', help=True)()
+            sys.exit(0)
+        sys.exit(load_command('batch')(sys.argv[2:]))
+    elif sys.argv[1] == 'serve':
+        if any(arg in ('--help', '-h') for arg in sys.argv[2:]):
+            load_command('serve', help=True)()
+            sys.exit(0)
+        sys.exit(load_command('serve')(sys.argv[2:]))
+
+    from commands.reader import configure_cache, split_cache_flags, split_source_flags, open_source
+    from commands.jsonio import split_output_flags, set_output_mode
+    from commands import timings
 
     # Parse arguments manually for c2patool-like behavior
     path = sys.argv[1]
-    args = sys.argv[2:]
+    cache_opts, args = split_cache_flags(sys.argv[2:])
+    if cache_opts:
+        configure_cache(**cache_opts)
+    mime, args = split_source_flags(args)
+    json_mode, args = split_output_flags(args)
+    if json_mode:
+        set_output_mode(json_mode)
+    timing_opts, args = timings.split_timing_flags(args)
+    if timing_opts:
+        timings.enable()
+
+    # Help flags win over everything else, trust has its own help
+    if 'trust' in args and any(a in ('--help', '-h') for a in args[args.index('trust'):]):
+        load_command('trust', help=True)()
+        sys.exit(0)
+    if '--help' in args or '-h' in args:
+        print_help()
+        sys.exit(0)
     
-    # Check if path exists
-    if not os.path.exists(path):
+    # Check if path exists, '-' reads the file from stdin
+    if path != '-' and not os.path.exists(path):
         print(f"Error: File not found: {path}", file=sys.stderr)
         sys.exit(1)
     
-    # Parse options and commands
-    command = None
-    trust_opts = {}
-    
-    i = 0
-    if len(args) == 0:
-        cmd_default(path)
-
-    while i < len(args):
-        arg = args[i]
-        
-        if arg == '--output':
-            if i + 1 < len(args):
-                cmd_output(path, args[i + 1])
-            else:
-                print("Error: --output requires a value", file=sys.stderr)
-                sys.exit(1)
-        elif arg == '--info':
-            cmd_info(path)
-        elif arg == '--tree':
-            cmd_tree(path)
-        elif arg == '--detailed':
-            cmd_detailed(path)
-        elif arg == '--ingredient':
-            cmd_ingredient(path)
-        elif arg == 'trust':
-            i += 1
-
-            while i < len(args):
-                if args[i] == '--help':
-                    print_trust_help()
-                    sys.exit(0)
-                elif args[i] == '--trust_anchors' and i + 1 < len(args):
-                    trust_opts['trust_anchors'] = args[i + 1]
-                    i += 2
-                elif args[i] == '--allowed_list' and i + 1 < len(args):
-                    trust_opts['allowed_list'] = args[i + 1]
-                    i += 2
-                elif args[i] == '--trust_config' and i + 1 < len(args):
-                    trust_opts['trust_config'] = args[i + 1]
-                    i += 2
-                else:
-                    print(f"Warning: Unknown trust option: {args[i]}", file=sys.stderr)
-                    print("Use 'trust --help' for available options.", file=sys.stderr)
-                    sys.exit(1)
-            
-            cmd_trust(path, trust_opts)
-            
-        elif arg == '--help' or arg == '-h':
-            print_help()
-            sys.exit(0)
-        else:
-            print(f"Warning: Unknown option: {arg}", file=sys.stderr)
-            print("Use --help for usage information.", file=sys.stderr)
-            sys.exit(1)
-            
-        sys.exit(0)
+    # Parse options and commands: any combination of views is rendered
+    # from a single read of the manifest store
+    from commands.views import parse_view_args, run_views
+    try:
+        views = parse_view_args(args)
+    except ValueError as e:
+        print(f"Warning: {e}", file=sys.stderr)
+        print("Use --help for usage information.", file=sys.stderr)
+        sys.exit(1)
+
+    with timings.file_timings() as file_timings:
+        code = run_views(open_source(path, mime), views)
+    if file_timings is not None:
+        print(timings.format_timings(path, file_timings), file=sys.stderr)
+        if timing_opts.get("export"):
+            timings.HISTOGRAMS.observe(file_timings)
+            timings.HISTOGRAMS.export(timing_opts["export"])
+    sys.exit(code)
     
 
 def print_help():
@@ -135,31 +121,67 @@ USAGE:
     python main.py <PATH> [OPTIONS|COMMAND]
 
 ARGS:
-    <PATH>    Path to image file with C2PA manifest
+    <PATH>    Path to image file with C2PA manifest, or - to read it from stdin
 
 OPTIONS:
     --info          Show manifest store information
     --tree          Show manifest tree structure
+    --depth <N>     Ingredient levels expanded in the tree [default: all]
+    --max-nodes <N> Lines printed in the tree before it is truncated [default: 10000]
     --detailed      Show detailed C2PA-formatted JSON
     --ingredient    Extract ingredient information
     --output <FILE> Save output to file instead of stdout
+    --export-store <DIR>
+                    Copy the raw JUMBF manifest store to DIR/<sha256>.c2pa
+    --mime <TYPE>   MIME type of data read from stdin [default: from magic bytes]
+    --compact       Print JSON on a single line, without indentation
+    --ndjson        Same as --compact; in batch runs each line is wrapped with its path
+    --cache         Use the persistent result cache (see C2PA_PY_CACHE)
+    --no-cache      Do not use the result cache even if C2PA_PY_CACHE is set
+    --refresh       Ignore cached results and store fresh ones
+    --timings       Print the time spent in each phase (trust load, Reader,
+                    JSON parsing, policy, output...) to stderr
+    --timings-export <FILE>
+                    Also write the phase histograms to FILE, as Prometheus
+                    text if it ends in .prom, JSON otherwise
     --help, -h      Print this help message
 
+    Options and the trust command can be combined; the file is read once
+    and every selected view is printed in command line order.
+
 COMMANDS:
     trust           Verify trust of C2PA manifest (use 'trust --help' for options)
+    batch           Run any option or command over directories, globs or file lists
+                    (use 'batch --help' for options)
+    serve           Run a local HTTP / Unix socket verification server that keeps
+                    the trust store loaded (use 'serve --help' for options)
 
 EXAMPLES:
     python c2pa.py image.png                           # Print JSON manifest
     python c2pa.py image.png --info                    # Show info
     python c2pa.py image.png --tree                    # Show tree view
+    python c2pa.py image.png --info --tree             # Both, reading the file once
     python c2pa.py image.png --output path             # Save to file
     python c2pa.py image.png trust                     # Verify trust
     python c2pa.py image.png trust --help              # Trust options
+    cat image.png | python c2pa.py - --info            # Verify without a temp file
+    python c2pa.py batch photos/ --jobs 64 trust       # Verify a whole folder
+    python c2pa.py batch photos/ --export-store stores # Archive every manifest store
 
 ENVIRONMENT VARIABLES:
     C2PATOOL_TRUST_ANCHORS    URL or path to trust anchors PEM file
     C2PATOOL_ALLOWED_LIST     URL or path to allowed certificates list
     C2PATOOL_TRUST_CONFIG     URL or path to trust configuration
+    C2PATOOL_TRUST_CACHE      Folder for cached trust files
+    C2PATOOL_TRUST_TTL        Seconds before cached trust files are revalidated
+    C2PATOOL_TRUST_OFFLINE    Set to 1 to never download trust files
+    C2PATOOL_TRUST_POLICY     JSON trust policy replacing the built-in history rules
+    C2PA_PY_CACHE             1 or a database path to enable the result cache
+    C2PA_PY_CACHE_HASH        Set to 1 to also key cached results on content hash
+    C2PA_PY_CACHE_MAX_MB      Result cache size limit in MB [default: 1024]
+    C2PA_PY_CACHE_MAX_DAYS    Result cache entry lifetime in days [default: 30]
+    C2PA_PY_SNIFF             Set to 0 to skip the header check for unsigned files
+    C2PA_PY_TIMINGS           Set to 1 to record phase timings (same as --timings)
 """
     print(help_text)
 
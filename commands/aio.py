@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+C2PA asyncio API - Verify files from an event loop without blocking it
+Usage: python aio.py <PATH>... [--concurrency N] [--timeout SECONDS]
+
+    from commands.aio import verify, verify_many
+
+    data = await verify("image.jpg")
+    async for result in verify_many(paths, concurrency=32, timeout=10):
+        print(result["path"], result["status"])
+
+The blocking c2pa.Reader work runs in a thread pool. Results are plain
+dicts, nothing is printed and sys.exit is never called.
+"""
+
+import os
+import sys
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+if __name__ == "__main__":
+    # Allow running as a script as well as a module
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from commands.reader import load_manifest_store
+from commands.trust import get_trust_context
+from commands.jsonio import dumps, COMPACT
+
+DEFAULT_CONCURRENCY = 8
+
+
+# Executor for calls that do not pass their own
+_executor = None
+
+
+def default_executor():
+    """Shared thread pool, created on first use"""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=DEFAULT_CONCURRENCY, thread_name_prefix="c2pa-aio")
+    return _executor
+
+
+def release_later(loop, slots):
+    """Done callback returning a semaphore slot from whichever thread finished"""
+    def release(_):
+        try:
+            loop.call_soon_threadsafe(slots.release)
+        except RuntimeError:  # event loop already closed
+            pass
+    return release
+
+
+async def run_blocking(func, *args, executor=None, timeout=None, slots=None):
+    """
+    Run func(*args) on the executor and await it with an optional timeout.
+    A thread cannot be interrupted, so on timeout or cancellation the job
+    keeps its slot in the semaphore until it really returns; jobs that did
+    not start yet are cancelled.
+    """
+    loop = asyncio.get_running_loop()
+    if slots is not None:
+        await slots.acquire()
+
+    try:
+        job = (executor or default_executor()).submit(func, *args)
+    except BaseException:
+        if slots is not None:
+            slots.release()
+        raise
+    if slots is not None:
+        job.add_done_callback(release_later(loop, slots))
+
+    future = asyncio.wrap_future(job, loop=loop)
+    try:
+        return await asyncio.wait_for(asyncio.shield(future), timeout)
+    except (asyncio.TimeoutError, asyncio.CancelledError):
+        # Only cancels the job if it has not started yet
+        future.cancel()
+        raise
+
+
+async def trust_context(trust_opts=None, executor=None):
+    """The shared trust context, built off the event loop on first use"""
+    return await run_blocking(get_trust_context, trust_opts or {}, executor=executor)
+
+
+async def read(source, executor=None, timeout=None):
+    """
+    Reader JSON of a path or any input accepted by open_source(), as a dict.
+    Raises ValueError if there is no manifest, asyncio.TimeoutError on timeout.
+    """
+    store = await run_blocking(load_manifest_store, source, executor=executor, timeout=timeout)
+    if store is None:
+        raise ValueError(f"No manifest found in {source}")
+    return store.data
+
+
+async def verify(source, trust_opts=None, executor=None, timeout=None):
+    """
+    Trust verification of one input, returning the same JSON as the trust
+    command as a dict. Raises ValueError if there is no manifest and
+    asyncio.TimeoutError when timeout seconds pass.
+    """
+    context = await trust_context(trust_opts, executor)
+    return await run_blocking(context.verify, source, executor=executor, timeout=timeout)
+
+
+async def verify_result(source, context, executor=None, timeout=None, slots=None):
+    """
+    Verify one input and describe the outcome instead of raising:
+    {"path", "status": ok | no_manifest | timeout | error, "result", "error", "elapsed"}
+    """
+    start = time.perf_counter()
+    result, error = None, None
+    try:
+        result = await run_blocking(context.verify, source, executor=executor,
+                                    timeout=timeout, slots=slots)
+        status = "ok"
+    except asyncio.TimeoutError:
+        status, error = "timeout", f"Timed out after {timeout}s"
+    except ValueError:
+        status, error = "no_manifest", f"No manifest found in {source}"
+    except Exception as e:
+        status, error = "error", str(e) or type(e).__name__
+
+    return {"path": str(source), "status": status, "result": result,
+            "error": error, "elapsed": time.perf_counter() - start}
+
+
+async def verify_many(paths, concurrency=DEFAULT_CONCURRENCY, trust_opts=None,
+                      executor=None, timeout=None):
+    """
+    Verify many inputs, yielding one verify_result() dict per input as soon
+    as it completes. paths may be a regular or an async iterable and is
+    consumed lazily; at most `concurrency` verifications run at a time.
+    Closing the generator or cancelling the consuming task cancels the
+    work that is still pending.
+    """
+    own_executor = executor is None
+    if own_executor:
+        executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="c2pa-aio")
+    slots = asyncio.Semaphore(concurrency)
+    pending = set()
+
+    try:
+        context = await trust_context(trust_opts, executor)
+
+        async def sources():
+            if hasattr(paths, "__aiter__"):
+                async for path in paths:
+                    yield path
+            else:
+                for path in paths:
+                    yield path
+
+        async for path in sources():
+            if len(pending) >= concurrency:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+            pending.add(asyncio.ensure_future(
+                verify_result(path, context, executor, timeout, slots)))
+
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        if own_executor:
+            # Timed out jobs may still be running, do not wait for them
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def main(paths, concurrency=DEFAULT_CONCURRENCY, timeout=None):
+    """Print one JSON line per file as it completes, returns the exit code"""
+    failed = 0
+    async for result in verify_many(paths, concurrency, timeout=timeout):
+        if result["status"] != "ok":
+            failed += 1
+        print(dumps(result, COMPACT), flush=True)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    paths = []
+    concurrency, timeout = DEFAULT_CONCURRENCY, None
+
+    i = 0
+    while i < len(args):
+        if args[i] == '--concurrency' and i + 1 < len(args):
+            concurrency = int(args[i + 1])
+            i += 2
+        elif args[i] == '--timeout' and i + 1 < len(args):
+            timeout = float(args[i + 1])
+            i += 2
+        else:
+            paths.append(args[i])
+            i += 1
+
+    if not paths:
+        print("Usage: python aio.py <PATH>... [--concurrency N] [--timeout SECONDS]")
+        sys.exit(1)
+
+    sys.exit(asyncio.run(main(paths, concurrency, timeout)))
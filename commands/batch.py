@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+C2PA Batch Tool - Run any c2pa-py command over many files with a process pool
+Usage: python batch.py <PATH|DIR|GLOB>... [--jobs N] [--files-from FILE] [OPTIONS|COMMAND]
+"""
+
+import os
+import io
+import sys
+import glob
+import time
+import itertools
+import contextlib
+from pathlib import Path
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, wait
+
+# Extensions picked up when walking a directory
+SUPPORTED_EXTS = {".png", ".jpg", ".jpeg", ".webp", ".tif", ".tiff", ".mov", ".mp4", ".dng", ".avi", ".mp3", ".wav", ".pdf", ".heic", ".m4a", ".avif", ".gif", ".heif"}
+
+
+def iter_directory(directory):
+    """Yield supported files below a directory in a stable order"""
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            if name.startswith('.'):
+                continue
+            if os.path.splitext(name)[1].lower() in SUPPORTED_EXTS:
+                yield os.path.join(root, name)
+
+
+def iter_file_list(source):
+    """Yield paths listed one per line in a file, or on stdin for '-'"""
+    handle = sys.stdin if source == '-' else open(source, "r", encoding="utf-8")
+    try:
+        for line in handle:
+            line = line.strip()
+            if line:
+                yield line
+    finally:
+        if handle is not sys.stdin:
+            handle.close()
+
+
+def expand_paths(patterns, files_from=None):
+    """Expand directories, globs and file lists into individual file paths"""
+    sources = itertools.chain(patterns, iter_file_list(files_from) if files_from else ())
+
+    for pattern in sources:
+        if os.path.isdir(pattern):
+            yield from iter_directory(pattern)
+        elif glob.has_magic(pattern):
+            for match in sorted(glob.iglob(pattern, recursive=True)):
+                if os.path.isdir(match):
+                    yield from iter_directory(match)
+                else:
+                    yield match
+        else:
+            yield pattern
+
+
+def output_subdir(output_dir, path):
+    """Per-file output folder so --output does not overwrite across files"""
+    relative = Path(path).with_suffix('')
+    parts = [p for p in relative.parts if p not in (relative.anchor, '..', '.')]
+    return os.path.join(output_dir, *parts)
+
+
+def run_command(path, views, options):
+    """
+    Render the selected views of one file inside a worker and capture the
+    result. The views print, so stdout is intercepted. In NDJSON mode the
+    output is one {"path", "status", "result"} line per JSON document.
+    With options['timings'] the result also holds the phase timings.
+    """
+    from commands.views import run_views
+    from commands.reader import configure_cache, sniff_no_manifest
+    from commands.jsonio import set_output_mode, collect_documents, dumps, COMPACT, NDJSON
+    from commands import timings
+
+    if options.get('cache'):
+        configure_cache(**options['cache'])
+    json_mode = options.get('json_mode')
+    if json_mode:
+        set_output_mode(json_mode)
+    if options.get('timings'):
+        timings.enable()
+
+    # Give every file its own --output folder
+    views = [(name, output_subdir(arg, path) if name == 'output' else arg)
+             for name, arg in views]
+
+    buffer = io.StringIO()
+    start = time.perf_counter()
+
+    status = None
+    documents = None
+    with contextlib.ExitStack() as stack:
+        stack.enter_context(contextlib.redirect_stdout(buffer))
+        if json_mode == NDJSON:
+            documents = stack.enter_context(collect_documents())
+        file_timings = stack.enter_context(timings.file_timings())
+        try:
+            with timings.phase("sniff"):
+                no_manifest = os.path.exists(path) and sniff_no_manifest(path)
+            if not os.path.exists(path):
+                print(f"Error: File not found: {path}")
+                exit_code = 1
+            elif no_manifest:
+                # Unsigned file: no Reader, no trust store
+                print(f"No manifest found in {path}")
+                status, exit_code = "no_manifest", 1
+            else:
+                exit_code = run_views(path, views)
+        except Exception as e:
+            print(f"Error: {e}")
+            exit_code = 1
+
+    status = status or ("ok" if exit_code == 0 else "error")
+    output = buffer.getvalue()
+    if documents is not None:
+        record = {"path": path, "status": status}
+        if file_timings is not None:
+            record["timings"] = file_timings
+        lines = [dumps(dict(record, result=doc), COMPACT) for doc in documents]
+        if output.strip() or not documents:
+            # Text views and error messages
+            lines.append(dumps(dict(record, output=output.rstrip("\n")), COMPACT))
+        output = "".join(line + "\n" for line in lines)
+
+    return {
+        "path": path,
+        "status": status,
+        "exit_code": exit_code,
+        "output": output,
+        "elapsed": time.perf_counter() - start,
+        "timings": file_timings,
+    }
+
+
+def lost_result(path, error, options):
+    """Result of a file whose worker was killed or died, status "timeout" past --timeout"""
+    status = "timeout" if getattr(error, "reason", None) == "timeout" else "error"
+    output = f"Error: {error}\n"
+    if options.get('json_mode') == "ndjson":
+        from commands.jsonio import dumps, COMPACT
+        output = dumps({"path": path, "status": status, "output": output.rstrip("\n")}, COMPACT) + "\n"
+    return {"path": path, "status": status, "exit_code": 1, "output": output,
+            "elapsed": 0.0, "timings": None}
+
+
+def run_batch(paths, views, options=None, jobs=None, ordered=False, limits=None, stats=None):
+    """
+    Render views over paths with a worker pool, yielding one result per file.
+    At most a few tasks per worker are in flight so huge file lists stay cheap.
+    With ordered=True results come back in input order, otherwise as they finish.
+    limits are the split_pool_flags() options: memory ceiling, per-file
+    deadline, recycling, and the size above which files go to the large-file lane. stats, if given,
+    receives the pool summary line once the run is over.
+    """
+    from commands.pool import make_pool, split_pool_flags, file_size
+
+    options = options or {}
+    limits = limits or split_pool_flags([])[0]
+    jobs = jobs or os.cpu_count() or 1
+    max_in_flight = jobs * 4
+    paths = iter(paths)
+
+    with make_pool(run_command, jobs, limits) as pool:
+        pending = deque()
+        futures = {}
+
+        def fill():
+            while len(pending) < max_in_flight:
+                path = next(paths, None)
+                if path is None:
+                    return
+                size = file_size(path)
+                future = pool.submit(pool.lane_for(size, limits["large_file_mb"]),
+                                     path, views, options, size=size)
+                futures[future] = path
+                pending.append(future)
+
+        def result_of(future):
+            path = futures.pop(future)
+            try:
+                return future.result()
+            except Exception as e:
+                return lost_result(path, e, options)
+
+        fill()
+        while pending:
+            if ordered:
+                yield result_of(pending.popleft())
+            else:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.remove(future)
+                    yield result_of(future)
+            fill()
+
+    if stats is not None:
+        stats.append(pool.summary())
+
+
+def parse_args(args):
+    """Split batch arguments into paths, batch options and the views"""
+    from commands.reader import split_cache_flags
+    from commands.views import parse_view_args
+    from commands.jsonio import split_output_flags
+    from commands.timings import split_timing_flags
+    from commands.pool import split_pool_flags
+
+    cache_opts, args = split_cache_flags(args)
+    json_mode, args = split_output_flags(args)
+    timing_opts, args = split_timing_flags(args)
+    limits, args = split_pool_flags(args)
+    opts = {"paths": [], "jobs": None, "files_from": None, "ordered": False,
+            "views": None, "limits": limits, "timings_export": timing_opts.get("export"),
+            "options": {"cache": cache_opts, "json_mode": json_mode,
+                        "timings": bool(timing_opts)}}
+    view_args = []
+
+    i = 0
+    while i < len(args):
+        arg = args[i]
+
+        if arg in ('--jobs', '-j') and i + 1 < len(args):
+            opts["jobs"] = int(args[i + 1])
+            i += 2
+        elif arg == '--files-from' and i + 1 < len(args):
+            opts["files_from"] = args[i + 1]
+            i += 2
+        elif arg == '--ordered':
+            opts["ordered"] = True
+            i += 1
+        elif arg in ('--output', '--export-store', '--depth', '--max-nodes'):
+            view_args += args[i:i + 2]
+            i += 2
+        elif arg == 'trust':
+            view_args += args[i:]
+            i = len(args)
+        elif arg.startswith('--'):
+            view_args.append(arg)
+            i += 1
+        else:
+            opts["paths"].append(arg)
+            i += 1
+
+    opts["views"] = parse_view_args(view_args)
+    return opts
+
+
+def main(args):
+    """Batch CLI entry point, returns the process exit code"""
+    try:
+        opts = parse_args(args)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        print("Use 'batch --help' for usage information.", file=sys.stderr)
+        return 1
+
+    if not opts["paths"] and not opts["files_from"]:
+        print("Error: batch requires at least one path, glob or --files-from", file=sys.stderr)
+        return 1
+
+    from commands.timings import HISTOGRAMS, format_timings
+
+    paths = expand_paths(opts["paths"], opts["files_from"])
+    ndjson = opts["options"]["json_mode"] == "ndjson"
+    total = failed = timed_out = unsigned = 0
+    start = time.perf_counter()
+    pool_stats = []
+
+    for result in run_batch(paths, opts["views"], opts["options"], opts["jobs"],
+                            opts["ordered"], opts["limits"], pool_stats):
+        total += 1
+        if result["status"] == "no_manifest":
+            unsigned += 1
+        elif result["status"] != "ok":
+            failed += 1
+            if result["status"] == "timeout":
+                timed_out += 1
+
+        if ndjson:
+            sys.stdout.write(result['output'])
+        else:
+            sys.stdout.write(f"==> {result['path']} <==\n{result['output']}")
+        sys.stdout.flush()
+
+        if result["timings"] is not None:
+            HISTOGRAMS.observe(result["timings"])
+            if not ndjson:
+                print(format_timings(result["path"], result["timings"]), file=sys.stderr)
+
+    elapsed = time.perf_counter() - start
+    rate = total / elapsed if elapsed > 0 else 0
+    timeouts = f", {timed_out} timed out" if timed_out else ""
+    print(f"Processed {total} files ({failed} failed{timeouts}, {unsigned} without manifest) "
+          f"in {elapsed:.2f}s, {rate:.1f} files/s", file=sys.stderr)
+    for line in pool_stats:
+        print(line, file=sys.stderr)
+
+    if opts["options"]["timings"]:
+        print(HISTOGRAMS.summary(), file=sys.stderr)
+        if opts["timings_export"]:
+            HISTOGRAMS.export(opts["timings_export"])
+
+    return 1 if failed else 0
+
+
+def print_batch_help():
+    help_text = """Sub-command to run a command over many files with a process pool
+
+Usage: python3 c2pa.py batch <PATH|DIR|GLOB>... [BATCH OPTIONS] [OPTIONS|COMMAND]
+
+Batch options:
+  -j, --jobs <N>            Number of worker processes [default: CPU count]
+      --files-from <FILE>   Read paths one per line from FILE ('-' for stdin)
+      --ordered             Print results in input order instead of completion order
+      --max-rss <MB>        Kill a worker going above MB of resident memory (its file
+                            fails) and replace one that ends a file above it
+      --max-tasks <N>       Replace each worker after N files [default: 1000]
+      --max-bytes <MB>      Replace each worker after reading MB of files [default: 8192]
+      --large-file <MB>     Send files of at least MB to a separate lane, 0 disables it
+                            [default: 256]
+      --large-jobs <N>      Workers of the large-file lane [default: 1]
+      --timeout <SECONDS>   Kill a worker still busy with a file after SECONDS and
+                            replace it; the file is reported as timed out
+      --cache, --no-cache, --refresh
+                            Result cache control, as for single files
+      --compact             Print JSON documents on one line, without indentation
+      --ndjson              One {"path", "status", "result"} JSON line per document,
+                            without the '==> <path> <==' headers
+      --timings             Print the phase timings of each file and a per-phase
+                            summary of all files to stderr (in the NDJSON lines
+                            with --ndjson)
+      --timings-export <FILE>
+                            Also write the phase histograms to FILE, as Prometheus
+                            text if it ends in .prom, JSON otherwise
+
+Views (any combination, each file is read once):
+      --info, --tree [--depth N] [--max-nodes N], --detailed, --ingredient,
+      --output <DIR>, trust [TRUST OPTIONS]
+      --export-store <DIR>  Copy each raw manifest store to DIR/<sha256>.c2pa;
+                            identical stores are kept once, no Reader pass is needed
+
+Directories are walked recursively, globs support '**'. Each result is printed
+under a '==> <path> <==' header as soon as it is ready. Files whose headers show
+no manifest are reported as such without a c2pa.Reader pass and are not counted
+as failures (set C2PA_PY_SNIFF=0 to read every file).
+"""
+    print(help_text)
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+    if len(sys.argv) < 2 or sys.argv[1] in ('--help', '-h'):
+        print_batch_help()
+        sys.exit(0)
+
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+C2PA Result Cache - Persistent SQLite cache of Reader JSON and trust verdicts
+Usage: python cache.py [--stats | --evict | --clear] [DB]
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import hashlib
+import threading
+
+DEFAULT_CACHE_DB = os.path.join(os.path.expanduser("~"), ".cache", "c2pa-py", "results.sqlite3")
+DEFAULT_MAX_BYTES = int(os.environ.get('C2PA_PY_CACHE_MAX_MB', 1024)) * 1024 * 1024
+DEFAULT_MAX_AGE = int(os.environ.get('C2PA_PY_CACHE_MAX_DAYS', 30)) * 24 * 60 * 60
+
+# Seconds between two eviction passes
+EVICT_INTERVAL = 60 * 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    path TEXT NOT NULL,
+    settings_digest TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    content_hash TEXT,
+    raw_json TEXT,
+    verdict TEXT,
+    nbytes INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (path, settings_digest)
+);
+CREATE INDEX IF NOT EXISTS results_created_at ON results (created_at);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def hash_file(path, chunk_size=1024 * 1024):
+    """SHA-256 of a file's content"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    On-disk cache of c2pa.Reader JSON and final trust verdicts.
+    Entries are keyed on the absolute path and the digest of the active
+    settings, and are only returned while size, mtime_ns (and optionally
+    the content hash) still match the file on disk.
+    """
+
+    def __init__(self, db_path=None, max_bytes=DEFAULT_MAX_BYTES, max_age=DEFAULT_MAX_AGE,
+                 hash_content=False, refresh=False):
+        self.db_path = db_path or DEFAULT_CACHE_DB
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hash_content = hash_content
+        self.refresh = refresh
+        self._local = threading.local()
+
+    @property
+    def conn(self):
+        """SQLite connection of the calling thread, reopened after a fork"""
+        local = self._local
+        if getattr(local, "conn", None) is None or local.pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            local.conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            local.conn.execute("PRAGMA journal_mode=WAL")
+            local.conn.execute("PRAGMA synchronous=NORMAL")
+            local.conn.executescript(SCHEMA)
+            local.pid = os.getpid()
+            self.maybe_evict(local.conn)
+        return local.conn
+
+    def identity(self, path):
+        """(absolute path, size, mtime_ns, content hash) of a file"""
+        st = os.stat(path)
+        content_hash = hash_file(path) if self.hash_content else None
+        return os.path.abspath(path), st.st_size, st.st_mtime_ns, content_hash
+
+    def lookup(self, path, settings_digest):
+        """
+        Return {"raw_json", "verdict"} for an unchanged file, or None.
+        Always None in refresh mode so entries get rewritten.
+        """
+        if self.refresh:
+            return None
+        try:
+            abs_path, size, mtime_ns, content_hash = self.identity(path)
+        except OSError:
+            return None
+
+        row = self.conn.execute(
+            "SELECT size, mtime_ns, content_hash, raw_json, verdict FROM results "
+            "WHERE path = ? AND settings_digest = ?",
+            (abs_path, settings_digest)).fetchone()
+        if row is None or row[0] != size or row[1] != mtime_ns:
+            return None
+        if self.hash_content and row[2] != content_hash:
+            return None
+        return {"raw_json": row[3], "verdict": row[4]}
+
+    def store(self, path, settings_digest, raw_json=None, verdict=None):
+        """
+        Save the Reader JSON and/or verdict for a file.
+        A value left as None keeps what is already stored for the same file.
+        """
+        try:
+            abs_path, size, mtime_ns, content_hash = self.identity(path)
+        except OSError:
+            return
+
+        existing = self.conn.execute(
+            "SELECT size, mtime_ns, raw_json, verdict FROM results "
+            "WHERE path = ? AND settings_digest = ?",
+            (abs_path, settings_digest)).fetchone()
+        if existing and existing[0] == size and existing[1] == mtime_ns:
+            raw_json = raw_json if raw_json is not None else existing[2]
+            verdict = verdict if verdict is not None else existing[3]
+
+        nbytes = len(raw_json or "") + len(verdict or "")
+        self.conn.execute(
+            "INSERT OR REPLACE INTO results (path, settings_digest, size, mtime_ns, "
+            "content_hash, raw_json, verdict, nbytes, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (abs_path, settings_digest, size, mtime_ns, content_hash,
+             raw_json, verdict, nbytes, time.time()))
+
+    def maybe_evict(self, conn):
+        """Run evict() if the last pass is older than EVICT_INTERVAL"""
+        row = conn.execute("SELECT value FROM meta WHERE key = 'last_evict'").fetchone()
+        if row is None or time.time() - float(row[0]) > EVICT_INTERVAL:
+            self.evict()
+
+    def evict(self):
+        """
+        Drop entries older than max_age, then the oldest entries until the
+        cache holds at most max_bytes. Returns the number of rows removed.
+        """
+        conn = self.conn
+        removed = conn.execute("DELETE FROM results WHERE created_at < ?",
+                               (time.time() - self.max_age,)).rowcount
+
+        total = conn.execute("SELECT coalesce(sum(nbytes), 0) FROM results").fetchone()[0]
+        if total > self.max_bytes:
+            rows = conn.execute("SELECT created_at, nbytes FROM results ORDER BY created_at")
+            excess = total - self.max_bytes
+            cutoff = None
+            for created_at, nbytes in rows:
+                excess -= nbytes
+                cutoff = created_at
+                if excess <= 0:
+                    break
+            if cutoff is not None:
+                removed += conn.execute("DELETE FROM results WHERE created_at <= ?",
+                                        (cutoff,)).rowcount
+
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('last_evict', ?)",
+                     (str(time.time()),))
+        return removed
+
+    def clear(self):
+        """Remove every entry"""
+        self.conn.execute("DELETE FROM results")
+
+    def stats(self):
+        """Number of entries and total payload bytes"""
+        count, total = self.conn.execute(
+            "SELECT count(*), coalesce(sum(nbytes), 0) FROM results").fetchone()
+        return {"entries": count, "bytes": total}
+
+
+def cache_from_env(refresh=False):
+    """
+    Build the cache requested by C2PA_PY_CACHE (a database path, or 1 for the
+    default location). Returns None when caching is not enabled.
+    """
+    setting = os.environ.get('C2PA_PY_CACHE', '')
+    if setting in ('', '0', 'false'):
+        return None
+    db_path = None if setting in ('1', 'true') else setting
+    hash_content = os.environ.get('C2PA_PY_CACHE_HASH', '') not in ('', '0', 'false')
+    return ResultCache(db_path, hash_content=hash_content, refresh=refresh)
+
+
+if __name__ == "__main__":
+    action = "--stats"
+    db_path = None
+    for arg in sys.argv[1:]:
+        if arg in ('--stats', '--evict', '--clear'):
+            action = arg
+        else:
+            db_path = arg
+
+    cache = ResultCache(db_path)
+    if action == '--evict':
+        print(f"Evicted {cache.evict()} entries")
+    elif action == '--clear':
+        cache.clear()
+        print("Cache cleared")
+    s = cache.stats()
+    print(f"{cache.db_path}: {s['entries']} entries, {s['bytes']} bytes")
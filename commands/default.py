@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+C2PA Default View Tool - Replicates c2patool <PATH>
+Usage: python default.py <image_path>
+"""
+
+import os
+import sys
+
+if __name__ == "__main__":
+    # Allow running as a script as well as a module
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from commands.reader import load_manifest_store
+from commands.jsonio import emit
+
+
+def view_default(store):
+    """Print the JSON manifest store with validation"""
+    emit(store.data)
+
+
+def print_default(path):
+    """Default command: print JSON manifest with validation"""
+    try:
+        store = load_manifest_store(path)
+
+        if store is None:
+            print(f"No manifest found in {path}")
+            return
+
+        view_default(store)
+    except Exception:
+        print(f"No manifest found in {path}")
+        sys.exit(1)
+
+def cmd_default(path: str):
+    print_default(path)
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python default.py <image_path>")
+        sys.exit(1)
+
+    image_path = sys.argv[1]
+
+    if not os.path.exists(image_path):
+        print(f"Error: File not found: {image_path}")
+        sys.exit(1)
+
+    print_default(image_path)
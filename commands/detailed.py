@@ -5,30 +5,36 @@ Usage: python3 detailed.py <image_path>
 """
 
 import os
-import json
 import sys
-import requests
-import c2pa
+
+if __name__ == "__main__":
+    # Allow running as a script as well as a module
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from commands.reader import load_manifest_store
+from commands.jsonio import emit
+
+
+def view_detailed(store):
+    """Print the detailed view of an already parsed manifest store"""
+    # Convert to detailed format (matching Rust output structure)
+    detailed_output = convert_to_detailed_format(store.data)
+
+    # Print as formatted JSON
+    emit(detailed_output)
 
 
 def print_detailed(image_path):
     """Print detailed C2PA manifest view"""
     
     try: 
-        reader = c2pa.Reader(image_path)
-        raw_output = reader.json()
+        store = load_manifest_store(image_path)
             
-        if not raw_output:
+        if store is None:
             print(f"No manifest found in {image_path}")
             return
         
-        json_data = json.loads(raw_output)
-            
-        # Convert to detailed format (matching Rust output structure)
-        detailed_output = convert_to_detailed_format(json_data)
-            
-        # Print as formatted JSON
-        print(json.dumps(detailed_output, indent=2, ensure_ascii=False))
+        view_detailed(store)
     except Exception:
         print(f"No manifest found in {image_path}")
         sys.exit(1)
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+C2PA Store Export Tool - Copy the raw JUMBF manifest store of a file to
+<export_dir>/<sha256>.c2pa without a c2pa.Reader pass
+Usage: python export.py <image_path> <export_dir>
+"""
+
+import os
+import sys
+import mmap
+import hashlib
+import contextlib
+
+if __name__ == "__main__":
+    # Allow running as a script as well as a module
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from commands.locator import locate_in_buffer
+from commands.reader import StreamSource
+
+STORE_SUFFIX = ".c2pa"
+
+
+def copy_segments(src_fd, dst_fd, view, segments):
+    """
+    Copy byte ranges of the source to the destination, in the kernel with
+    os.sendfile where supported, otherwise from the memory view.
+    src_fd is None for in-memory sources.
+    """
+    for offset, length in segments:
+        done = 0
+        while done < length:
+            try:
+                if src_fd is None:
+                    raise OSError("in-memory source")
+                sent = os.sendfile(dst_fd, src_fd, offset + done, length - done)
+            except (AttributeError, OSError):
+                # No sendfile on this platform / file system
+                sent = os.write(dst_fd, view[offset + done:offset + length])
+            if sent == 0:
+                raise OSError(f"Short copy of the manifest store at offset {offset}")
+            done += sent
+
+
+def write_store(view, segments, export_dir, src_fd=None):
+    """
+    Hash the store segments in place and write them to export_dir under
+    their digest. Returns (store path, True if newly written).
+    """
+    digest = hashlib.sha256()
+    for offset, length in segments:
+        digest.update(view[offset:offset + length])
+    store_path = os.path.join(export_dir, digest.hexdigest() + STORE_SUFFIX)
+    if os.path.exists(store_path):
+        return store_path, False
+
+    os.makedirs(export_dir, exist_ok=True)
+    # Created 0666 so the umask applies, as with a plain open();
+    # mkstemp would leave the store owner-only
+    tmp_path = os.path.join(export_dir, f".tmp-{os.getpid()}-{os.urandom(8).hex()}")
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0), 0o666)
+    try:
+        copy_segments(src_fd, fd, view, segments)
+        os.fsync(fd)
+        os.close(fd)
+        fd = None
+        os.replace(tmp_path, store_path)
+    except BaseException:
+        if fd is not None:
+            os.close(fd)
+        with contextlib.suppress(OSError):
+            os.unlink(tmp_path)
+        raise
+    return store_path, True
+
+
+def export_store(image_path, export_dir):
+    """
+    Write the manifest store of a file or StreamSource as <sha256>.c2pa in
+    export_dir. Returns (store path, True if newly written), or None
+    without a store. Identical stores of different files are written once.
+    """
+    if isinstance(image_path, StreamSource):
+        location = locate_in_buffer(image_path.buffer)
+        if location is None:
+            return None
+        return write_store(image_path.buffer, location.segments, export_dir)
+
+    with open(image_path, "rb") as src:
+        if os.fstat(src.fileno()).st_size == 0:
+            return None
+        with mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ) as mapped, \
+                memoryview(mapped) as view:
+            location = locate_in_buffer(mapped)
+            if location is None:
+                return None
+            return write_store(view, location.segments, export_dir, src.fileno())
+
+
+def view_export_store(image_path, export_dir):
+    """Export the raw manifest store of a file, returns False if it has none"""
+    result = export_store(image_path, export_dir)
+    if result is None:
+        return False
+
+    store_path, written = result
+    if written:
+        print(f'Manifest store written to "{store_path}"')
+    else:
+        print(f'Manifest store already exported as "{store_path}"')
+    return True
+
+
+def save_store(image_path, export_dir):
+    """Export the manifest store of a file to export_dir"""
+    try:
+        if not view_export_store(image_path, export_dir):
+            print(f"No manifest found in {image_path}")
+            sys.exit(1)
+    except OSError:
+        print(f"No manifest found in {image_path}")
+        sys.exit(1)
+
+def cmd_export_store(image_path, export_dir):
+    save_store(image_path, export_dir)
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: python export.py <image_path> <export_dir>")
+        sys.exit(1)
+
+    image_path = sys.argv[1]
+    export_dir = sys.argv[2]
+
+    if not os.path.exists(image_path):
+        print(f"Error: File not found: {image_path}")
+        sys.exit(1)
+
+    save_store(image_path, export_dir)
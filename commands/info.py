@@ -5,23 +5,21 @@ Usage: python info.py <image_path>
 """
 
 import os
-import json
 import sys
-import requests
-import c2pa
 
+if __name__ == "__main__":
+    # Allow running as a script as well as a module
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from commands.reader import load_manifest_store, StreamSource
+from commands.locator import locate_manifest_store, locate_in_buffer
 
-def read_file_content(filename):
-    """Read file content"""
-    if os.path.exists(filename):
-        with open(filename, "r", encoding="utf-8") as f:
-            return f.read().strip()
-    return None
 
 
 def get_file_size(filepath):
     """Get file size in bytes"""
+    if isinstance(filepath, StreamSource):
+        return len(filepath)
     try:
         return os.path.getsize(filepath)
     except:
@@ -29,129 +27,15 @@ def get_file_size(filepath):
 
 
 def calculate_manifest_size(image_path):
-    """Calculate manifest store size by parsing file format"""
+    """Size of the embedded JUMBF manifest store, located from the container headers"""
     try:
-        with open(image_path, 'rb') as f:
-            # Read first bytes to detect format
-            header = f.read(12)
-            f.seek(0)
-            
-            # PNG format
-            if header.startswith(b'\x89PNG'):
-                return get_png_manifest_size(f)
-            
-            # JPEG format  
-            elif header.startswith(b'\xff\xd8'):
-                return get_jpeg_manifest_size(f)
-            
-            # MP4/MOV format
-            elif b'ftyp' in header or header[4:8] == b'ftyp':
-                return get_mp4_manifest_size(f)
-            
-            return 0
-            
-    except:
-        return 0
-
-
-def get_png_manifest_size(f):
-    """Extract C2PA manifest size from PNG file"""
-    f.seek(8)  # Skip PNG signature
-    total_c2pa_size = 0
-    
-    while True:
-        chunk_header = f.read(8)
-        if len(chunk_header) < 8:
-            break
-        
-        chunk_length = int.from_bytes(chunk_header[:4], 'big')
-        chunk_type = chunk_header[4:8]
-        
-        # C2PA data is in 'caBX' chunks
-        if chunk_type == b'caBX':
-            total_c2pa_size += chunk_length + 12  # +12 for chunk overhead
-        
-        # Skip chunk data + CRC
-        f.seek(chunk_length + 4, 1)
-        
-        # IEND marks end of PNG
-        if chunk_type == b'IEND':
-            break
-    
-    return total_c2pa_size if total_c2pa_size > 0 else 0
-
-
-def get_jpeg_manifest_size(f):
-    """Extract C2PA manifest size from JPEG file"""
-    total_c2pa_size = 0
-    
-    f.seek(2)  # Skip JPEG SOI marker
-    
-    while True:
-        marker = f.read(2)
-        if len(marker) < 2:
-            break
-        
-        if marker[0] != 0xFF:
-            break
-        
-        # APP11 segment often contains C2PA data
-        if marker[1] == 0xEB:  # APP11
-            segment_length = int.from_bytes(f.read(2), 'big')
-            
-            # Check if this is C2PA data
-            identifier = f.read(16)
-            if b'c2pa' in identifier.lower():
-                total_c2pa_size += segment_length + 2  # +2 for marker
-            
-            # Seek to next segment
-            f.seek(segment_length - 18, 1)
+        if isinstance(image_path, StreamSource):
+            location = locate_in_buffer(image_path.buffer)
         else:
-            # Read segment length and skip
-            segment_length = int.from_bytes(f.read(2), 'big')
-            if segment_length < 2:
-                break
-            f.seek(segment_length - 2, 1)
-    
-    return total_c2pa_size if total_c2pa_size > 0 else 0
-
-
-def get_mp4_manifest_size(f):
-    """Extract C2PA manifest size from MP4 file"""
-    # MP4 C2PA data is in 'uuid' boxes
-    # This is a simplified parser
-    total_c2pa_size = 0
-    
-    f.seek(0)
-    file_size = f.seek(0, 2)
-    f.seek(0)
-    
-    while f.tell() < file_size:
-        try:
-            box_size_bytes = f.read(4)
-            if len(box_size_bytes) < 4:
-                break
-            
-            box_size = int.from_bytes(box_size_bytes, 'big')
-            box_type = f.read(4)
-            
-            if box_size == 0:
-                break
-            
-            # C2PA manifest in 'uuid' box
-            if box_type == b'uuid':
-                uuid = f.read(16)
-                # C2PA UUID check
-                if b'c2pa' in uuid.lower():
-                    total_c2pa_size += box_size
-                f.seek(box_size - 24, 1)  # Skip rest of box
-            else:
-                f.seek(box_size - 8, 1)  # Skip box
-                
-        except:
-            break
-    
-    return total_c2pa_size if total_c2pa_size > 0 else int(file_size * 0.03)
+            location = locate_manifest_store(image_path)
+    except (OSError, ValueError):
+        return 0
+    return location.size if location else 0
 
 
 def extract_validation_issues(json_data):
@@ -173,50 +57,55 @@ def count_manifests(json_data):
     return len(manifests)
 
 
+def view_info(store):
+    """Print C2PA info of an already parsed manifest store"""
+    image_path = store.path
+    json_data = store.data
+
+    # Get file size
+    file_size = get_file_size(store.source)
+
+    # Locate the manifest store in the binary file
+    manifest_size = calculate_manifest_size(store.source)
+
+    # Calculate percentage
+    if file_size > 0:
+        percentage = (manifest_size / file_size) * 100
+    else:
+        percentage = 0
+
+    # Extract validation issues
+    issues = extract_validation_issues(json_data)
+
+    # Count manifests
+    manifest_count = count_manifests(json_data)
+
+    # Get filename
+    filename = os.path.basename(image_path)
+
+    # Print output in Rust c2patool format
+    print(f"Information for {filename}")
+    print(f"Manifest store size = {manifest_size} ({percentage:.2f}% of file size {file_size})")
+
+    if issues:
+        print("Validation issues:")
+        for issue in issues:
+            print(f"   {issue}")
+
+    print(f"{manifest_count} manifest{'s' if manifest_count != 1 else ''}")
+
+
 def print_info(image_path):
     """Print C2PA info in Rust c2patool format"""
     # Read manifest
     try:
-        reader = c2pa.Reader(image_path)
-        raw_output = reader.json()
+        store = load_manifest_store(image_path)
         
-        if not raw_output:
+        if store is None:
             print(f"No manifest found in {image_path}")
             return
         
-        json_data = json.loads(raw_output)
-        
-        # Get file size
-        file_size = get_file_size(image_path)
-        
-        # Calculate manifest size from binary file
-        manifest_size = calculate_manifest_size(image_path)
-        
-        # Calculate percentage
-        if file_size > 0:
-            percentage = (manifest_size / file_size) * 100
-        else:
-            percentage = 0
-        
-        # Extract validation issues
-        issues = extract_validation_issues(json_data)
-        
-        # Count manifests
-        manifest_count = count_manifests(json_data)
-        
-        # Get filename
-        filename = os.path.basename(image_path)
-        
-        # Print output in Rust c2patool format
-        print(f"Information for {filename}")
-        print(f"Manifest store size = {manifest_size} ({percentage:.2f}% of file size {file_size})")
-        
-        if issues:
-            print("Validation issues:")
-            for issue in issues:
-                print(f"   {issue}")
-        
-        print(f"{manifest_count} manifest{'s' if manifest_count != 1 else ''}")
+        view_info(store)
         
     except Exception as e:
         print(f"No manifest found in {image_path}")
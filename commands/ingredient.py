@@ -5,40 +5,46 @@ Usage: python ingredient.py <image_path>
 """
 
 import os
-import json
 import sys
-import requests
-import c2pa
+
+if __name__ == "__main__":
+    # Allow running as a script as well as a module
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from commands.reader import load_manifest_store
+from commands.jsonio import emit
+
 
 
+def view_ingredient(store):
+    """Print the ingredient view of an already parsed manifest store"""
+    # Build ingredient output
+    ingredient_output = build_ingredient_output(store.path, store.data, store.mime)
+
+    # Print as formatted JSON
+    emit(ingredient_output)
+
 
 def print_ingredient(image_path):
     """Print C2PA ingredient information"""
     
     # Read manifest
     try:
-        reader = c2pa.Reader(image_path)
-        raw_output = reader.json()
+        store = load_manifest_store(image_path)
         
-        if not raw_output:
+        if store is None:
             print(f"No manifest found in {image_path}")
             return
         
-        json_data = json.loads(raw_output)
-        
-        # Build ingredient output
-        ingredient_output = build_ingredient_output(image_path, json_data)
-        
-        # Print as formatted JSON
-        print(json.dumps(ingredient_output, indent=2, ensure_ascii=False))
+        view_ingredient(store)
         
     except Exception as e:
         print(f"No manifest found in {image_path}")
         sys.exit(1)
 
 
-def build_ingredient_output(image_path, json_data):
-    """Build ingredient output structure"""
+def build_ingredient_output(image_path, json_data, mime=None):
+    """Build ingredient output structure, mime overrides the extension"""
     
     output = {}
     
@@ -57,7 +63,7 @@ def build_ingredient_output(image_path, json_data):
         '.mov': 'video/quicktime',
         '.pdf': 'application/pdf'
     }
-    output['format'] = format_map.get(ext, 'application/octet-stream')
+    output['format'] = mime or format_map.get(ext, 'application/octet-stream')
     
     # Add instance_id (generate if not present)
     active_manifest_id = json_data.get('active_manifest', '')
@@ -73,7 +79,7 @@ def build_ingredient_output(image_path, json_data):
             output['instance_id'] = f"xmp:iid:{filename.replace('.', '-')}"
     
     # Add thumbnail info
-    thumbnail_filename = filename.replace(ext, '.jpg')
+    thumbnail_filename = os.path.splitext(filename)[0] + '.jpg'
     output['thumbnail'] = {
         'format': 'image/jpeg',
         'identifier': thumbnail_filename
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+C2PA JSON I/O - Parse and print JSON documents with orjson when it is
+installed, the json module otherwise, in pretty, compact or NDJSON mode
+Usage: python jsonio.py [--compact | --ndjson] < document.json
+"""
+
+import io
+import os
+import sys
+import json
+import contextlib
+
+if __name__ == "__main__":
+    # Allow running as a script as well as a module
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from commands.timings import phase
+
+try:
+    import orjson
+except ImportError:  # optional speed-up; the json module escapes non-ASCII
+    orjson = None     # characters as before, orjson writes them as UTF-8
+
+BACKEND = "orjson" if orjson else "json"
+
+# Output modes: indented, one line per document, and one line per document
+# wrapped with its path in batch runs
+PRETTY, COMPACT, NDJSON = "pretty", "compact", "ndjson"
+MODE_FLAGS = {'--compact': COMPACT, '--ndjson': NDJSON}
+
+if orjson:
+    ORJSON_OPTS = {
+        PRETTY: orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS,
+        COMPACT: orjson.OPT_NON_STR_KEYS,
+        NDJSON: orjson.OPT_NON_STR_KEYS,
+    }
+
+# Mode used by emit(), set from the command line flags
+_output_mode = PRETTY
+# List receiving emitted documents instead of stdout, see collect_documents()
+_collector = None
+
+
+def loads(data):
+    """Parse a JSON document from str or bytes"""
+    if orjson:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass  # e.g. integers beyond 64 bits, let the json module decide
+    return json.loads(data)
+
+
+def dumpb(obj, mode=PRETTY):
+    """Serialize obj to UTF-8 bytes in the given output mode"""
+    if orjson:
+        try:
+            return orjson.dumps(obj, option=ORJSON_OPTS[mode])
+        except TypeError:
+            pass  # types orjson does not handle, e.g. integers beyond 64 bits
+    if mode == PRETTY:
+        text = json.dumps(obj, indent=2)
+    else:
+        text = json.dumps(obj, separators=(",", ":"))
+    return text.encode("utf-8")
+
+
+def dumps(obj, mode=PRETTY):
+    """Serialize obj to str in the given output mode"""
+    return dumpb(obj, mode).decode("utf-8")
+
+
+def output_mode():
+    return _output_mode
+
+
+def set_output_mode(mode):
+    """Select the mode used by emit() for the rest of the process"""
+    global _output_mode
+    if mode not in (PRETTY, COMPACT, NDJSON):
+        raise ValueError(f"Unknown JSON output mode: {mode}")
+    _output_mode = mode
+
+
+def split_output_flags(args):
+    """
+    Remove --compact / --ndjson from args.
+    Returns (mode or None, remaining args).
+    """
+    mode = None
+    rest = []
+    for arg in args:
+        if arg in MODE_FLAGS:
+            mode = MODE_FLAGS[arg]
+        else:
+            rest.append(arg)
+    return mode, rest
+
+
+@contextlib.contextmanager
+def collect_documents():
+    """Capture the documents passed to emit() in a list instead of printing them"""
+    global _collector
+    previous, _collector = _collector, []
+    try:
+        yield _collector
+    finally:
+        _collector = previous
+
+
+def emit(obj):
+    """Print a JSON document in the current output mode"""
+    if _collector is not None:
+        _collector.append(obj)
+        return
+
+    with phase("json_dump"):
+        data = dumpb(obj, _output_mode) + b"\n"
+        out = sys.stdout
+        buffer = getattr(out, "buffer", None)
+        if buffer is None:
+            # Redirected to a text stream such as io.StringIO
+            out.write(data.decode("utf-8"))
+        else:
+            # Skip the text layer, the document is UTF-8 whatever the locale
+            out.flush()
+            buffer.write(data)
+            buffer.flush()
+
+
+if __name__ == "__main__":
+    mode, args = split_output_flags(sys.argv[1:])
+    if args:
+        print("Usage: python jsonio.py [--compact | --ndjson] < document.json")
+        sys.exit(1)
+    set_output_mode(mode or PRETTY)
+    emit(loads(io.open(sys.stdin.fileno(), "rb", closefd=False).read()))
@@ -0,0 +1,524 @@
+#!/usr/bin/env python3
+"""
+C2PA Store Locator - Find the embedded JUMBF manifest store of a file
+without reading its media payload
+Usage: python locator.py <file_path>...
+"""
+
+import os
+import sys
+import re
+import mmap
+import struct
+
+# BMFF 'uuid' box holding the C2PA manifest store
+C2PA_UUID = bytes.fromhex("d8fec3d61b0e483c92975828877ec481")
+
+# TIFF tag holding the C2PA manifest store
+TIFF_C2PA_TAG = 0xCD41
+
+GIF_C2PA_APP = b"C2PA_GIF"
+ID3_C2PA_MIME = b"application/x-c2pa-manifest-store"
+PDF_C2PA_SUBTYPE = b"/application#2Fc2pa"
+PDF_C2PA_RELATIONSHIP = b"/C2PA_Manifest"
+PDF_EMBEDDED_FILE = re.compile(rb"/EF\s*<<.*?/F\s+([0-9]+)\s+([0-9]+)\s+R", re.S)
+PDF_LENGTH = re.compile(rb"/Length\s+([0-9]+)(\s+[0-9]+\s+R)?")
+
+# Top level box types a BMFF file (MP4, MOV, HEIF, AVIF, M4A) can start with
+BMFF_FIRST_BOXES = (b"ftyp", b"moov", b"wide", b"free", b"skip", b"mdat", b"pnot")
+
+# MIME types passed to c2pa.Reader for in-memory data
+FORMAT_MIME = {
+    "png": "image/png",
+    "jpeg": "image/jpeg",
+    "tiff": "image/tiff",
+    "gif": "image/gif",
+    "mp3": "audio/mpeg",
+    "pdf": "application/pdf",
+}
+RIFF_MIME = {b"WEBP": "image/webp", b"WAVE": "audio/wav", b"AVI ": "video/avi"}
+# By major brand of the ftyp box
+BMFF_MIME = {
+    b"heic": "image/heic", b"heix": "image/heic", b"mif1": "image/heif",
+    b"avif": "image/avif", b"qt  ": "video/quicktime", b"M4A ": "audio/mp4",
+}
+
+# Safety limit on chained TIFF IFDs so a corrupt file cannot loop
+MAX_TIFF_IFDS = 64
+
+# XMP reference to a manifest store hosted elsewhere
+REMOTE_MANIFEST_REF = b"dcterms:provenance"
+
+# Bytes at each end of a file searched for a remote manifest reference
+SNIFF_WINDOW = 256 * 1024
+
+
+class StoreLocation:
+    """
+    Where the manifest store lives in a file: the container format and the
+    (offset, length) byte ranges that concatenate to the JUMBF data
+    """
+
+    def __init__(self, fmt, segments):
+        self.format = fmt
+        self.segments = segments
+
+    @property
+    def offset(self):
+        """Offset of the first byte of the store"""
+        return self.segments[0][0]
+
+    @property
+    def size(self):
+        """Length of the JUMBF manifest store in bytes"""
+        return sum(length for _, length in self.segments)
+
+
+def detect_format(buf):
+    """Container format from the leading magic bytes, or None"""
+    head = bytes(buf[:12])
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if head.startswith(b"\xff\xd8"):
+        return "jpeg"
+    if head.startswith(b"RIFF") and len(head) >= 12:
+        return "riff"
+    if head[:4] in (b"II*\x00", b"MM\x00*", b"II+\x00", b"MM\x00+"):
+        return "tiff"
+    if head.startswith((b"GIF87a", b"GIF89a")):
+        return "gif"
+    if head.startswith(b"ID3"):
+        return "mp3"
+    if head.startswith(b"%PDF"):
+        return "pdf"
+    if head[4:8] in BMFF_FIRST_BOXES:
+        return "bmff"
+    return None
+
+
+def detect_mime(buf):
+    """MIME type for c2pa.Reader from the leading magic bytes, or None"""
+    fmt = detect_format(buf)
+    if fmt == "riff":
+        return RIFF_MIME.get(bytes(buf[8:12]), "image/webp")
+    if fmt == "bmff":
+        return BMFF_MIME.get(bytes(buf[8:12]), "video/mp4")
+    return FORMAT_MIME.get(fmt)
+
+
+def locate_png(buf):
+    """caBX chunks"""
+    segments = []
+    pos, end = 8, len(buf)
+    while pos + 8 <= end:
+        length, = struct.unpack_from(">I", buf, pos)
+        chunk_type = buf[pos + 4:pos + 8]
+        if chunk_type == b"caBX":
+            segments.append((pos + 8, length))
+        elif chunk_type == b"IEND":
+            break
+        pos += 12 + length
+    return segments
+
+
+def jumbf_header_size(buf, pos):
+    """Size of the LBox/TBox(/XLBox) header of the JUMBF box at pos"""
+    lbox, = struct.unpack_from(">I", buf, pos)
+    return 16 if lbox == 1 else 8
+
+
+def is_c2pa_superbox(buf, pos, end):
+    """True if the JUMBF superbox at pos is labelled 'c2pa'"""
+    header = jumbf_header_size(buf, pos)
+    jumd = pos + header
+    # jumd box: LBox, TBox, 16 byte type UUID, toggles, label
+    label = jumd + 8 + 16 + 1
+    return (buf[pos + 4:pos + 8] == b"jumb" and buf[jumd + 4:jumd + 8] == b"jumd"
+            and label + 5 <= end and buf[label:label + 5] == b"c2pa\x00")
+
+
+def locate_jpeg(buf):
+    """
+    APP11 'JP' segments of the c2pa JUMBF box. Continuation segments repeat
+    the box header, which is not part of the store and is left out.
+    """
+    packets = {}
+    c2pa_box = None
+    pos, end = 2, len(buf)
+
+    while pos + 4 <= end:
+        if buf[pos] != 0xFF:
+            break
+        marker = buf[pos + 1]
+        if marker == 0xFF:  # fill byte
+            pos += 1
+            continue
+        if marker in (0x01, 0xD8) or 0xD0 <= marker <= 0xD7:  # no length
+            pos += 2
+            continue
+        if marker in (0xD9, 0xDA):  # EOI / start of scan data
+            break
+
+        length, = struct.unpack_from(">H", buf, pos + 2)
+        if length < 2:
+            break
+
+        if marker == 0xEB and length > 10 and buf[pos + 4:pos + 6] == b"JP":
+            box_instance, = struct.unpack_from(">H", buf, pos + 6)
+            sequence, = struct.unpack_from(">I", buf, pos + 8)
+            payload = pos + 12
+            payload_end = pos + 2 + length
+            if sequence == 1:
+                if c2pa_box is None and is_c2pa_superbox(buf, payload, payload_end):
+                    c2pa_box = box_instance
+            else:
+                payload += jumbf_header_size(buf, payload)
+            packets.setdefault(box_instance, []).append((sequence, payload, payload_end - payload))
+
+        pos += 2 + length
+
+    if c2pa_box is None:
+        return []
+    return [(offset, length) for _, offset, length in sorted(packets[c2pa_box])]
+
+
+def locate_bmff(buf):
+    """Top level 'uuid' box with the C2PA UUID and the 'manifest' purpose"""
+    pos, end = 0, len(buf)
+    while pos + 8 <= end:
+        size, = struct.unpack_from(">I", buf, pos)
+        box_type = buf[pos + 4:pos + 8]
+        header = 8
+        if size == 1:
+            size, = struct.unpack_from(">Q", buf, pos + 8)
+            header = 16
+        elif size == 0:  # box extends to the end of the file
+            size = end - pos
+        if size < header:
+            break
+
+        if box_type == b"uuid" and buf[pos + header:pos + header + 16] == C2PA_UUID:
+            box_end = min(pos + size, end)
+            # version/flags, null terminated purpose, then an 8 byte offset
+            purpose = pos + header + 16 + 4
+            purpose_end = purpose
+            while purpose_end < box_end and buf[purpose_end] != 0:
+                purpose_end += 1
+            if buf[purpose:purpose_end] == b"manifest":
+                data = purpose_end + 1 + 8
+                return [(data, box_end - data)]
+
+        pos += size
+    return []
+
+
+def locate_riff(buf):
+    """Top level 'C2PA' chunk of a WebP, WAV or AVI file"""
+    pos, end = 12, len(buf)
+    while pos + 8 <= end:
+        chunk_id = buf[pos:pos + 4]
+        size, = struct.unpack_from("<I", buf, pos + 4)
+        if chunk_id == b"C2PA":
+            return [(pos + 8, size)]
+        pos += 8 + size + (size & 1)
+    return []
+
+
+def locate_tiff(buf):
+    """Tag 0xCD41 in the IFD chain of a TIFF, DNG or BigTIFF file"""
+    order = "<" if buf[:2] == b"II" else ">"
+    big = buf[2:4] in (b"+\x00", b"\x00+")
+    end = len(buf)
+
+    if big:
+        ifd, = struct.unpack_from(order + "Q", buf, 8)
+        count_fmt, entry_fmt, entry_size, inline = "Q", "HHQQ", 20, 8
+    else:
+        ifd, = struct.unpack_from(order + "I", buf, 4)
+        count_fmt, entry_fmt, entry_size, inline = "H", "HHII", 12, 4
+    count_size = struct.calcsize(count_fmt)
+
+    for _ in range(MAX_TIFF_IFDS):
+        if ifd == 0 or ifd + count_size > end:
+            break
+        entries, = struct.unpack_from(order + count_fmt, buf, ifd)
+        pos = ifd + count_size
+        for _ in range(entries):
+            if pos + entry_size > end:
+                return []
+            tag, _type, count, value = struct.unpack_from(order + entry_fmt, buf, pos)
+            if tag == TIFF_C2PA_TAG:
+                # BYTE / UNDEFINED data, stored inline when it fits
+                offset = pos + entry_size - inline if count <= inline else value
+                return [(offset, count)]
+            pos += entry_size
+        next_fmt = "Q" if big else "I"
+        if pos + struct.calcsize(next_fmt) > end:
+            break
+        ifd, = struct.unpack_from(order + next_fmt, buf, pos)
+    return []
+
+
+def gif_sub_blocks(buf, pos):
+    """Yield (offset, length) of each data sub-block, ending at the terminator"""
+    end = len(buf)
+    while pos < end:
+        size = buf[pos]
+        if size == 0:
+            return
+        yield pos + 1, size
+        pos += 1 + size
+
+
+def skip_gif_sub_blocks(buf, pos):
+    """Position just after a run of data sub-blocks"""
+    end = len(buf)
+    while pos < end and buf[pos] != 0:
+        pos += 1 + buf[pos]
+    return pos + 1
+
+
+def locate_gif(buf):
+    """Sub-blocks of the 'C2PA_GIF' application extension"""
+    end = len(buf)
+    packed = buf[10]
+    pos = 13
+    if packed & 0x80:  # global color table
+        pos += 3 << ((packed & 0x07) + 1)
+
+    while pos < end:
+        block = buf[pos]
+        if block == 0x21 and pos + 2 < end:  # extension
+            label = buf[pos + 1]
+            if label == 0xFF and buf[pos + 2] == 11 and buf[pos + 3:pos + 11] == GIF_C2PA_APP:
+                return list(gif_sub_blocks(buf, pos + 14))
+            pos = skip_gif_sub_blocks(buf, pos + 2)
+        elif block == 0x2C and pos + 10 <= end:  # image descriptor
+            packed = buf[pos + 9]
+            pos += 10
+            if packed & 0x80:  # local color table
+                pos += 3 << ((packed & 0x07) + 1)
+            pos = skip_gif_sub_blocks(buf, pos + 1)  # after the LZW code size
+        else:  # trailer or corrupt data
+            break
+    return []
+
+
+def synchsafe(buf, pos):
+    """ID3 28-bit synchsafe integer"""
+    b = buf[pos:pos + 4]
+    return (b[0] << 21) | (b[1] << 14) | (b[2] << 7) | b[3]
+
+
+def skip_id3_string(buf, pos, end, encoding):
+    """Position after a terminated ID3 string in the given text encoding"""
+    if encoding in (1, 2):  # UTF-16: two byte terminator
+        while pos + 1 < end and (buf[pos] != 0 or buf[pos + 1] != 0):
+            pos += 2
+        return pos + 2
+    while pos < end and buf[pos] != 0:
+        pos += 1
+    return pos + 1
+
+
+def locate_mp3(buf):
+    """ID3v2.3 / v2.4 GEOB frame with the C2PA manifest store mime type"""
+    version, flags = buf[3], buf[5]
+    if version not in (3, 4):
+        return []
+    end = min(10 + synchsafe(buf, 6), len(buf))
+
+    pos = 10
+    if flags & 0x40:  # extended header
+        ext_size = synchsafe(buf, pos) if version == 4 else struct.unpack_from(">I", buf, pos)[0] + 4
+        pos += ext_size
+
+    while pos + 10 <= end:
+        frame_id = buf[pos:pos + 4]
+        if frame_id[0] == 0:  # padding
+            break
+        size = synchsafe(buf, pos + 4) if version == 4 else struct.unpack_from(">I", buf, pos + 4)[0]
+        data, frame_end = pos + 10, min(pos + 10 + size, end)
+
+        if frame_id == b"GEOB":
+            encoding = buf[data]
+            mime = data + 1
+            mime_end = skip_id3_string(buf, mime, frame_end, 0)
+            if buf[mime:mime_end - 1] == ID3_C2PA_MIME:
+                filename_end = skip_id3_string(buf, mime_end, frame_end, encoding)
+                obj = skip_id3_string(buf, filename_end, frame_end, encoding)
+                return [(obj, frame_end - obj)]
+
+        pos = frame_end
+    return []
+
+
+def pdf_stream(buf, dict_start):
+    """(data offset, length) of the PDF stream whose dictionary starts at dict_start"""
+    stream = buf.find(b"stream", dict_start)
+    if stream < 0:
+        return None
+
+    data = stream + len(b"stream")
+    if buf[data:data + 2] == b"\r\n":
+        data += 2
+    elif buf[data:data + 1] in (b"\n", b"\r"):
+        data += 1
+
+    # A direct /Length, otherwise up to the endstream keyword
+    match = PDF_LENGTH.search(bytes(buf[dict_start:stream]))
+    if match and not match.group(2):
+        return data, int(match.group(1))
+    endstream = buf.find(b"endstream", data)
+    if endstream < 0:
+        return None
+    return data, len(bytes(buf[data:endstream]).rstrip(b"\r\n"))
+
+
+def locate_pdf(buf):
+    """
+    Best effort: the embedded file referenced by the /C2PA_Manifest file
+    specification, or a file stream with the C2PA /Subtype. Only the objects
+    involved are parsed, not the whole cross-reference structure.
+    """
+    if not hasattr(buf, "rfind"):
+        buf = bytes(buf)
+
+    found = None
+    spec = buf.rfind(PDF_C2PA_RELATIONSHIP)
+    if spec >= 0:
+        spec_end = buf.find(b"endobj", spec)
+        spec_start = max(buf.rfind(b"obj", 0, spec), 0)
+        match = PDF_EMBEDDED_FILE.search(bytes(buf[spec_start:spec_end]))
+        if match:
+            obj = re.compile(rb"(?<![0-9])" + match.group(1) + rb"\s+" + match.group(2) + rb"\s+obj")
+            # The last definition wins after incremental updates
+            definition = None
+            for definition in obj.finditer(buf):
+                pass
+            if definition:
+                found = pdf_stream(buf, definition.end())
+
+    if not found:
+        hit = buf.rfind(PDF_C2PA_SUBTYPE)
+        dict_start = buf.rfind(b"<<", 0, hit) if hit >= 0 else -1
+        if dict_start >= 0:
+            found = pdf_stream(buf, dict_start)
+
+    return [found] if found else []
+
+
+LOCATORS = {
+    "png": locate_png,
+    "jpeg": locate_jpeg,
+    "bmff": locate_bmff,
+    "riff": locate_riff,
+    "tiff": locate_tiff,
+    "gif": locate_gif,
+    "mp3": locate_mp3,
+    "pdf": locate_pdf,
+}
+
+# Locators that can miss a store, so a miss is not proof there is none
+BEST_EFFORT_FORMATS = {"pdf"}
+
+
+def locate_in_buffer(buf):
+    """
+    Locate the manifest store in an in-memory or mapped file.
+    Only container headers are touched, never the media payload.
+    Returns a StoreLocation, or None when there is no embedded store.
+    """
+    fmt = detect_format(buf)
+    if fmt is None:
+        return None
+    try:
+        segments = LOCATORS[fmt](buf)
+    except (struct.error, IndexError):
+        # Truncated or corrupt container
+        return None
+    segments = [(offset, length) for offset, length in segments
+                if length > 0 and offset + length <= len(buf)]
+    return StoreLocation(fmt, segments) if segments else None
+
+
+def locate_manifest_store(path):
+    """Locate the manifest store of a file through a read-only memory map"""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return locate_in_buffer(mapped)
+
+
+def sniff_format(path):
+    """Container format of a file from its first bytes, or None"""
+    with open(path, "rb") as f:
+        return detect_format(f.read(12))
+
+
+def buffer_has_manifest(buf):
+    """
+    Cheap check for C2PA content from the container headers.
+    True if a manifest store is embedded, False if the data certainly has
+    none, None if it cannot be told here (unknown format, a best-effort
+    locator that found nothing or a reference to a remote manifest) and a
+    full c2pa.Reader pass is needed.
+    """
+    size = len(buf)
+    if size == 0:
+        return False
+    fmt = detect_format(buf)
+    if fmt is None:
+        return None
+    if locate_in_buffer(buf) is not None:
+        return True
+    if fmt in BEST_EFFORT_FORMATS:
+        return None
+    if not hasattr(buf, "find"):
+        # Only the two windows are copied out of a memoryview
+        head, tail = bytes(buf[:SNIFF_WINDOW]), bytes(buf[max(size - SNIFF_WINDOW, 0):])
+        remote = REMOTE_MANIFEST_REF in head or REMOTE_MANIFEST_REF in tail
+    else:
+        remote = (buf.find(REMOTE_MANIFEST_REF, 0, SNIFF_WINDOW) >= 0
+                  or buf.find(REMOTE_MANIFEST_REF, max(size - SNIFF_WINDOW, 0)) >= 0)
+    return None if remote else False
+
+
+def has_manifest(path):
+    """buffer_has_manifest() of a file, through a read-only memory map"""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return False
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return buffer_has_manifest(mapped)
+
+
+def read_manifest_store(path):
+    """Raw JUMBF bytes of a file's manifest store, or None"""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            location = locate_in_buffer(mapped)
+            if location is None:
+                return None
+            return b"".join(mapped[offset:offset + length] for offset, length in location.segments)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python locator.py <file_path>...")
+        sys.exit(1)
+
+    for file_path in sys.argv[1:]:
+        try:
+            location = locate_manifest_store(file_path)
+        except OSError as e:
+            print(f"{file_path}: {e}")
+            continue
+        if location is None:
+            print(f"{file_path}: no manifest store")
+        else:
+            print(f"{file_path}: {location.format} store of {location.size} bytes "
+                  f"at {location.offset} in {len(location.segments)} segment(s)")
@@ -5,18 +5,14 @@ Usage: python output.py <image_path> <output_dir>
 """
 
 import os
-import json
 import sys
-import requests
-import c2pa
 
-def read_file_content(filename):
-    """Read file content"""
-    if os.path.exists(filename):
-        with open(filename, "r", encoding="utf-8") as f:
-            return f.read().strip()
-    return None
+if __name__ == "__main__":
+    # Allow running as a script as well as a module
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from commands.reader import load_manifest_store
+from commands.jsonio import dumpb
 
 def extract_manifest_only(json_data):
     """Extract just the manifest structure (without validation)"""
@@ -31,34 +27,38 @@ def extract_manifest_only(json_data):
     return manifest
 
 
+def view_output(store, output_dir):
+    """Save an already parsed manifest store to output directory"""
+    json_data = store.data
+
+    # Create output directory if it doesn't exist
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Save manifest_store.json (full data with validation)
+    manifest_store_path = os.path.join(output_dir, 'manifest_store.json')
+    with open(manifest_store_path, 'wb') as f:
+        f.write(dumpb(json_data))
+
+    # Save manifest.json (just manifests, no validation)
+    manifest_only = extract_manifest_only(json_data)
+    manifest_path = os.path.join(output_dir, 'manifest.json')
+    with open(manifest_path, 'wb') as f:
+        f.write(dumpb(manifest_only))
+
+    print(f'Manifest report written to the directory "{output_dir}"')
+
+
 def save_output(image_path, output_dir):
     """Save manifest to output directory""" 
     # Read manifest
     try:
-        reader = c2pa.Reader(image_path)
-        raw_output = reader.json()
+        store = load_manifest_store(image_path)
         
-        if not raw_output:
+        if store is None:
             print(f"No manifest found in {image_path}")
             sys.exit(1)
         
-        json_data = json.loads(raw_output)
-        
-        # Create output directory if it doesn't exist
-        os.makedirs(output_dir, exist_ok=True)
-        
-        # Save manifest_store.json (full data with validation)
-        manifest_store_path = os.path.join(output_dir, 'manifest_store.json')
-        with open(manifest_store_path, 'w', encoding='utf-8') as f:
-            json.dump(json_data, f, indent=2, ensure_ascii=False)
-        
-        # Save manifest.json (just manifests, no validation)
-        manifest_only = extract_manifest_only(json_data)
-        manifest_path = os.path.join(output_dir, 'manifest.json')
-        with open(manifest_path, 'w', encoding='utf-8') as f:
-            json.dump(manifest_only, f, indent=2, ensure_ascii=False)
-        
-        print(f'Manifest report written to the directory "{output_dir}"')
+        view_output(store, output_dir)
         
     except Exception as e:
         print(f"No manifest found in {image_path}")
@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""
+C2PA Trust Policy - Declarative history rules compiled into a single-pass
+evaluator over the manifests and validation results of a store
+Usage: python policy.py <image_path> [--policy FILE]
+       python policy.py --dump
+
+A policy is a JSON file. Omitted keys keep their default value, null
+disables a section:
+
+    {
+      "name": "customer-a",
+      "ingredient_rules": [
+        {"id": "test-software", "fields": ["claim_generator"],
+         "contains": ["testapp"], "ignore_case": true,
+         "message": "Ingredient '{manifest}' created by Test software: {value}."},
+        {"id": "untrusted-ingredient", "status_codes": ["signingCredential.untrusted"],
+         "message": "Ingredient '{manifest}' is Untrusted (Chain Broken)."}
+      ],
+      "fatal_codes": {"id": "fatal-code", "contains": ["mismatch"],
+                      "message": "Found fatal error '{code}' in structure."},
+      "delta_failures": {"id": "delta-failure", "message": "Ingredient Delta failure: {code}"},
+      "valid": {"require_success": ["claimSignature.validated"],
+                "tolerate_status": ["signingCredential.untrusted"]}
+    }
+
+Ingredient rules apply to every manifest except the active one. A rule
+matches on "fields" (dotted paths, "contains" substrings and/or "patterns"
+regular expressions) or on exact "status_codes" of the manifest's
+validation_status. Rules are checked in order and the first match decides.
+"""
+
+import os
+import re
+import sys
+import json
+import copy
+import hashlib
+import threading
+
+if __name__ == "__main__":
+    # Allow running as a script as well as a module
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+POLICY_ENV = 'C2PATOOL_TRUST_POLICY'
+
+# Ingredient verdicts remembered by each compiled policy
+MAX_MANIFEST_VERDICTS = 65536
+
+DEFAULT_POLICY = {
+    "name": "default",
+    "ingredient_rules": [
+        {"id": "test-software",
+         "fields": ["claim_generator"],
+         "contains": ["c2pa testing", "make_test_images", "testapp"],
+         "ignore_case": True,
+         "message": "Ingredient '{manifest}' created by Test software: {value}."},
+        {"id": "untrusted-ingredient",
+         "status_codes": ["signingCredential.untrusted"],
+         "message": "Ingredient '{manifest}' is Untrusted (Chain Broken)."},
+        {"id": "test-certificate",
+         "fields": ["signature_info.issuer", "signature_info.common_name"],
+         "contains": ["Test Signing"],
+         "message": "Ingredient '{manifest}' signed by Test Certificate."},
+    ],
+    # Codes that make a manifest Invalid wherever they are reported, matched
+    # as substrings of the validation status code
+    "fatal_codes": {
+        "id": "fatal-code",
+        "contains": ["mismatch", "signingCredential.invalid", "signingCredential.revoked"],
+        "message": "Found fatal error '{code}' in structure.",
+    },
+    "delta_failures": {
+        "id": "delta-failure",
+        "message": "Ingredient Delta failure: {code}",
+    },
+    # When an Invalid active manifest may be upgraded to Valid
+    "valid": {
+        "require_success": ["claimSignature.validated"],
+        "tolerate_status": ["signingCredential.untrusted"],
+    },
+}
+
+# Keys holding validation statuses, at the top level, in every manifest and
+# in every ingredient. Assertion payloads never carry verdicts.
+VALIDATION_KEYS = ("validation_status", "validation_results")
+
+CLEAN_REASON = "History clean"
+
+
+class PolicyError(ValueError):
+    """The policy file cannot be read or is not a valid policy"""
+
+
+def find_code(section, search):
+    """
+    First dict in section whose "code" matches search, walked iteratively
+    in document order so deep nesting cannot hit the recursion limit
+    """
+    stack = [section]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            code = node.get("code")
+            if isinstance(code, str) and search(code):
+                return code
+            stack.extend(reversed(node.values()))
+        elif isinstance(node, list):
+            stack.extend(reversed(node))
+    return None
+
+
+def field_getter(path):
+    """Function reading a dotted path out of nested dicts"""
+    keys = path.split(".")
+
+    def get(data):
+        for key in keys:
+            if not isinstance(data, dict):
+                return None
+            data = data.get(key)
+        return data
+    return get
+
+
+def compile_matcher(spec, where):
+    """One regex search function for the "contains" and "patterns" of a rule"""
+    parts = [re.escape(s) for s in spec.get("contains") or []]
+    parts += list(spec.get("patterns") or [])
+    if not parts:
+        raise PolicyError(f"{where}: needs \"contains\" or \"patterns\"")
+    flags = re.IGNORECASE if spec.get("ignore_case") else 0
+    try:
+        return re.compile("|".join(f"(?:{p})" for p in parts), flags).search
+    except re.error as e:
+        raise PolicyError(f"{where}: bad pattern: {e}")
+
+
+def check_message(spec, where):
+    """The rule message, checked once so evaluation cannot fail on it"""
+    message = spec.get("message")
+    if not isinstance(message, str):
+        raise PolicyError(f"{where}: needs a \"message\"")
+    try:
+        message.format(manifest="", value="", code="")
+    except (KeyError, IndexError, ValueError) as e:
+        raise PolicyError(f"{where}: bad message placeholder {e}")
+    return message
+
+
+class CompiledPolicy:
+    """
+    A policy compiled once: one regex per rule, status codes in a lookup
+    table. evaluate() walks the store once, whatever the number of rules.
+    """
+
+    def __init__(self, policy):
+        if not isinstance(policy, dict):
+            raise PolicyError("A policy must be a JSON object")
+        unknown = set(policy) - set(DEFAULT_POLICY)
+        if unknown:
+            raise PolicyError(f"Unknown policy keys: {', '.join(sorted(unknown))}")
+
+        merged = dict(DEFAULT_POLICY)
+        merged.update(policy)
+        self.policy = merged
+        self.name = merged["name"] or "unnamed"
+        self.digest = hashlib.sha256(
+            json.dumps(merged, sort_keys=True).encode("utf-8")).hexdigest()
+
+        # Ingredient rules: (id, message, field getters or None, search)
+        self.rules = []
+        # Status code -> indexes of the rules it triggers
+        self.status_rules = {}
+        for index, rule in enumerate(merged["ingredient_rules"] or []):
+            if not isinstance(rule, dict):
+                raise PolicyError(f"ingredient rule {index}: must be a JSON object")
+            where = f"ingredient rule {rule.get('id', index)}"
+            if "id" not in rule:
+                raise PolicyError(f"{where}: needs an \"id\"")
+            message = check_message(rule, where)
+            if rule.get("status_codes"):
+                for code in rule["status_codes"]:
+                    self.status_rules.setdefault(code, []).append(index)
+                self.rules.append((rule["id"], message, None, None))
+            elif rule.get("fields"):
+                getters = [field_getter(f) for f in rule["fields"]]
+                self.rules.append((rule["id"], message, getters, compile_matcher(rule, where)))
+            else:
+                raise PolicyError(f"{where}: needs \"fields\" or \"status_codes\"")
+
+        fatal = merged["fatal_codes"]
+        if fatal:
+            self.fatal = (fatal.get("id", "fatal-code"), check_message(fatal, "fatal_codes"),
+                          compile_matcher(fatal, "fatal_codes"))
+        else:
+            self.fatal = None
+
+        delta = merged["delta_failures"]
+        self.delta = (delta.get("id", "delta-failure"),
+                      check_message(delta, "delta_failures")) if delta else None
+
+        valid = merged["valid"]
+        self.valid = None
+        if valid:
+            self.valid = (frozenset(valid.get("require_success") or []),
+                          frozenset(valid.get("tolerate_status") or []))
+
+        # (label, signature_info items, status codes) -> ingredient verdict
+        self.verdicts = {}
+
+    def match_ingredient(self, man_id, content):
+        """(rule id, reason) of the first ingredient rule matching a manifest"""
+        hits = ()
+        if self.status_rules:
+            hits = set()
+            for status in content.get("validation_status") or []:
+                if isinstance(status, dict):
+                    hits.update(self.status_rules.get(status.get("code"), ()))
+
+        for index, (rule_id, message, getters, search) in enumerate(self.rules):
+            if getters is None:
+                if index in hits:
+                    return rule_id, message.format(manifest=man_id, value="", code="")
+                continue
+            for get in getters:
+                value = get(content)
+                if isinstance(value, str) and search(value):
+                    return rule_id, message.format(manifest=man_id, value=value, code="")
+        return None
+
+    def scan_fatal(self, section, first):
+        """Keep the first fatal code found, scanning section only if none yet"""
+        if first is None and self.fatal:
+            return find_code(section, self.fatal[2])
+        return first
+
+    def check_ingredient(self, man_id, content):
+        """
+        match_ingredient() remembered per manifest. Labels are globally
+        unique and the claim is signed, so label + signature_info identify
+        the manifest content; the status codes cover trust-dependent results.
+        """
+        signature = content.get("signature_info")
+        codes = tuple(s.get("code") for s in content.get("validation_status") or ()
+                      if isinstance(s, dict))
+        try:
+            key = (man_id, tuple(sorted(signature.items())) if isinstance(signature, dict)
+                   else signature, codes)
+            verdict = self.verdicts.get(key, self)
+        except TypeError:
+            # Unhashable values, evaluate every time
+            return self.match_ingredient(man_id, content)
+        if verdict is self:
+            verdict = self.match_ingredient(man_id, content)
+            if len(self.verdicts) >= MAX_MANIFEST_VERDICTS:
+                self.verdicts.clear()
+            self.verdicts[key] = verdict
+        return verdict
+
+    def evaluate(self, json_data):
+        """
+        History verdict of a manifest store, in one walk over its top-level
+        keys: (history clean, reason, id of the rule that fired or None).
+        Ingredient rules come first, then fatal codes, then delta failures.
+        Ingredient manifests already seen by this policy are not evaluated again.
+        """
+        active_id = json_data.get("active_manifest", "")
+        fatal_code = None
+        delta_failure = None
+
+        for key, value in json_data.items():
+            if key == "manifests" and isinstance(value, dict):
+                for man_id, content in value.items():
+                    if not isinstance(content, dict):
+                        continue
+                    if man_id != active_id:
+                        hit = self.check_ingredient(man_id, content)
+                        if hit:
+                            return False, hit[1], hit[0]
+                    for m_key, m_value in content.items():
+                        if m_key in VALIDATION_KEYS:
+                            fatal_code = self.scan_fatal(m_value, fatal_code)
+                        elif m_key == "ingredients" and isinstance(m_value, list):
+                            for ingredient in m_value:
+                                if isinstance(ingredient, dict):
+                                    for i_key in VALIDATION_KEYS:
+                                        if i_key in ingredient:
+                                            fatal_code = self.scan_fatal(ingredient[i_key], fatal_code)
+            elif key in VALIDATION_KEYS:
+                fatal_code = self.scan_fatal(value, fatal_code)
+                if key == "validation_results" and isinstance(value, dict) and self.delta:
+                    for delta in value.get("ingredientDeltas") or []:
+                        failures = delta.get("validationDeltas", {}).get("failure", [])
+                        if failures:
+                            delta_failure = failures[0]
+                            break
+
+        if fatal_code is not None:
+            rule_id, message, _ = self.fatal
+            return False, message.format(manifest="", value="", code=fatal_code), rule_id
+        if delta_failure is not None:
+            rule_id, message = self.delta
+            return False, message.format(manifest="", value="", code=delta_failure.get("code")), rule_id
+        return True, CLEAN_REASON, None
+
+    def is_valid(self, json_data):
+        """
+        True if an Invalid active manifest may be upgraded: every required
+        success code is present and every top-level status is tolerated
+        """
+        if self.valid is None:
+            return False
+        required, tolerated = self.valid
+        active_manifest = json_data.get("validation_results", {}).get("activeManifest", {})
+        successes = {s.get("code") for s in active_manifest.get("success", [])}
+        if not required <= successes:
+            return False
+        return all(err.get("code", "") in tolerated
+                   for err in json_data.get("validation_status", []))
+
+
+def load_policy(path):
+    """Read and compile a policy file"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            policy = json.load(f)
+    except OSError as e:
+        raise PolicyError(f"Cannot read trust policy {path}: {e}")
+    except ValueError as e:
+        raise PolicyError(f"Trust policy {path} is not valid JSON: {e}")
+    try:
+        return CompiledPolicy(policy)
+    except PolicyError as e:
+        raise PolicyError(f"Trust policy {path}: {e}")
+
+
+# Compiled policies keyed by path, reloaded when the file changes
+_policies = {}
+_policies_lock = threading.Lock()
+
+
+def get_policy(path=None):
+    """
+    The compiled policy of a file, of C2PATOOL_TRUST_POLICY when path is
+    None, or the built-in default. Compiled once per file version.
+    """
+    path = path or os.environ.get(POLICY_ENV) or None
+    if path is None:
+        key = None
+    else:
+        try:
+            stat = os.stat(path)
+            key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        except OSError as e:
+            raise PolicyError(f"Cannot read trust policy {path}: {e}")
+
+    with _policies_lock:
+        if key not in _policies:
+            _policies[key] = CompiledPolicy(copy.deepcopy(DEFAULT_POLICY)) if key is None \
+                else load_policy(path)
+        return _policies[key]
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if args == ['--dump']:
+        print(json.dumps(DEFAULT_POLICY, indent=2))
+        sys.exit(0)
+
+    policy_path = None
+    if '--policy' in args:
+        i = args.index('--policy')
+        policy_path = args[i + 1] if i + 1 < len(args) else None
+        del args[i:i + 2]
+
+    if not args:
+        print("Usage: python policy.py <image_path> [--policy FILE] | --dump")
+        sys.exit(1)
+
+    from commands.reader import load_manifest_store
+
+    try:
+        policy = get_policy(policy_path)
+    except PolicyError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        store = load_manifest_store(args[0])
+    except Exception:
+        store = None
+    if store is None:
+        print(f"No manifest found in {args[0]}")
+        sys.exit(1)
+
+    clean, reason, rule = policy.evaluate(store.data)
+    print(json.dumps({"policy": policy.name, "digest": policy.digest,
+                      "history_clean": clean, "rule": rule, "reason": reason}, indent=2))
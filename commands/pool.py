@@ -0,0 +1,448 @@
+#!/usr/bin/env python3
+"""
+C2PA Worker Pool - Worker processes under memory governance for batch and
+comparison runs
+Usage: python pool.py [--max-rss MB] [--max-tasks N] [--max-bytes MB] [--large-file MB]
+                      [--timeout SECONDS] <FILE>...
+
+Each worker runs one task at a time. A supervisor thread in the parent
+hands out tasks and replaces workers:
+  --max-rss MB      a worker whose resident memory goes above MB is killed
+                    (its task fails) or, if it finished the task, recycled
+  --max-tasks N     a worker is recycled after N tasks
+  --max-bytes MB    a worker is recycled after reading MB of input files
+  --large-file MB   files of at least MB go to a separate lane with
+                    --large-jobs workers [default: 1]
+  --timeout SECONDS a worker still busy with a task after SECONDS is
+                    killed (its task fails) and replaced
+submit() returns a concurrent.futures.Future.
+"""
+
+import os
+import sys
+import time
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future
+from multiprocessing.connection import wait
+
+MB = 1024 * 1024
+
+DEFAULT_MAX_TASKS = 1000
+DEFAULT_MAX_BYTES_MB = 8192
+DEFAULT_LARGE_FILE_MB = 256
+DEFAULT_LARGE_JOBS = 1
+
+# Seconds between two checks of the memory and deadline of busy workers
+POLL_INTERVAL = 0.25
+
+DEFAULT_LANE = "default"
+LARGE_LANE = "large"
+
+try:
+    PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):  # Windows
+    PAGE_SIZE = 4096
+
+
+class WorkerError(RuntimeError):
+    """
+    A task was lost because its worker was killed above the memory ceiling
+    ("memory"), killed at the deadline ("timeout") or died ("crashed")
+    """
+
+    def __init__(self, message, reason):
+        super().__init__(message)
+        self.reason = reason
+
+
+def rss_mb(pid="self"):
+    """Current resident memory of a process in MB, None where unknown"""
+    try:
+        with open(f"/proc/{pid}/statm", "r") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE / MB
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB, None where unknown"""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KB elsewhere
+    return peak / (MB if sys.platform == "darwin" else 1024)
+
+
+def file_size(path):
+    try:
+        return os.path.getsize(path)
+    except (OSError, TypeError, ValueError):
+        return 0
+
+
+def worker_main(conn, target, initializer):
+    """Body of a worker process: run tasks until told to stop"""
+    if initializer is not None:
+        initializer()
+    while True:
+        try:
+            task = conn.recv()
+        except (EOFError, OSError):
+            return
+        if task is None:
+            return
+        task_id, args = task
+        try:
+            value, error = target(*args), None
+        except Exception as e:
+            value, error = None, e
+        memory = (rss_mb(), peak_rss_mb())
+        try:
+            conn.send((task_id, value, error, memory))
+        except Exception as e:  # result or exception that cannot be pickled
+            conn.send((task_id, None, RuntimeError(f"{type(e).__name__}: {e}"), memory))
+
+
+class Worker:
+    """Parent-side state of one worker process"""
+
+    def __init__(self, process, conn, lane):
+        self.process = process
+        self.conn = conn
+        self.lane = lane
+        self.tasks = 0
+        self.bytes = 0
+        self.task = None       # (task id, future, size) while busy
+        self.started = None    # perf_counter() of the current task
+
+
+class WorkerPool:
+    """
+    Worker processes in named lanes, e.g. {"default": 8, "large": 1}, each
+    lane with its own queue. Workers are started on demand and replaced
+    when they exceed a limit, crash or are killed.
+    """
+
+    def __init__(self, target, lanes, max_rss_mb=None, max_tasks=DEFAULT_MAX_TASKS,
+                 max_bytes_mb=DEFAULT_MAX_BYTES_MB, task_timeout=None, initializer=None):
+        self.target = target
+        self.initializer = initializer
+        self.lanes = {lane: max(1, int(n)) for lane, n in lanes.items()}
+        self.max_rss_mb = max_rss_mb
+        self.max_tasks = max_tasks
+        self.max_bytes = max_bytes_mb * MB if max_bytes_mb else None
+        self.task_timeout = task_timeout or None
+        # Workers are never forked from the supervisor thread
+        methods = multiprocessing.get_all_start_methods()
+        self.context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+        self.lock = threading.Lock()
+        self.queues = {lane: deque() for lane in self.lanes}
+        self.workers = []
+        self.next_id = 0
+        self.closing = False
+        self.wake_r, self.wake_w = multiprocessing.Pipe(duplex=False)
+
+        self.stats = {"tasks": 0, "started": 0, "peak_rss_mb": 0.0,
+                      "recycled": {"tasks": 0, "bytes": 0, "memory": 0},
+                      "killed": {"memory": 0, "timeout": 0}, "crashed": 0}
+
+        self.supervisor = threading.Thread(target=self.supervise, name="pool-supervisor", daemon=True)
+        self.supervisor.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        return False
+
+    def submit(self, lane, *args, size=0):
+        """Queue target(*args) on a lane, size being the bytes it reads"""
+        future = Future()
+        with self.lock:
+            if self.closing:
+                raise RuntimeError("cannot submit to a pool that is shutting down")
+            self.queues[lane].append((future, args, size))
+        self.wake()
+        return future
+
+    def lane_for(self, size, large_file_mb):
+        """Lane of a file of size bytes"""
+        if LARGE_LANE in self.lanes and large_file_mb and size >= large_file_mb * MB:
+            return LARGE_LANE
+        return DEFAULT_LANE
+
+    def wake(self):
+        try:
+            self.wake_w.send_bytes(b"")
+        except OSError:
+            pass
+
+    def shutdown(self):
+        """Finish queued tasks, then stop every worker"""
+        with self.lock:
+            self.closing = True
+        self.wake()
+        self.supervisor.join()
+        self.wake_r.close()
+        self.wake_w.close()
+
+    # Supervisor thread
+
+    def start_worker(self, lane):
+        parent_conn, child_conn = self.context.Pipe()
+        process = self.context.Process(target=worker_main, name=f"c2pa-{lane}-worker",
+                                       args=(child_conn, self.target, self.initializer),
+                                       daemon=True)
+        process.start()
+        child_conn.close()
+        worker = Worker(process, parent_conn, lane)
+        self.workers.append(worker)
+        self.stats["started"] += 1
+        return worker
+
+    def retire(self, worker, reason=None, kill=False):
+        """Stop a worker; it is replaced when its lane needs one"""
+        self.workers.remove(worker)
+        if reason:
+            bucket = self.stats["killed"] if kill else self.stats["recycled"]
+            bucket[reason] = bucket.get(reason, 0) + 1
+        try:
+            if kill:
+                worker.process.kill()
+            else:
+                worker.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        worker.process.join(5)
+        if worker.process.is_alive():
+            worker.process.kill()
+            worker.process.join()
+        worker.conn.close()
+
+    def idle_worker(self, lane):
+        """An idle worker of a lane, started if the lane is not full yet"""
+        lane_workers = [w for w in self.workers if w.lane == lane]
+        worker = next((w for w in lane_workers if w.task is None), None)
+        if worker is None and len(lane_workers) < self.lanes[lane]:
+            worker = self.start_worker(lane)
+        return worker
+
+    def dispatch(self):
+        """Hand queued tasks to idle workers, starting workers up to the lane size"""
+        for lane, queue in self.queues.items():
+            while True:
+                with self.lock:
+                    if not queue:
+                        break
+                worker = self.idle_worker(lane)
+                if worker is None:
+                    break
+                with self.lock:
+                    future, args, nbytes = queue.popleft()
+                if not future.set_running_or_notify_cancel():
+                    continue
+                self.next_id += 1
+                worker.task = (self.next_id, future, nbytes)
+                worker.started = time.perf_counter()
+                try:
+                    worker.conn.send((self.next_id, args))
+                except Exception as e:
+                    worker.task = None
+                    future.set_exception(e)
+
+    def record_memory(self, *values):
+        for value in values:
+            if value is not None and value > self.stats["peak_rss_mb"]:
+                self.stats["peak_rss_mb"] = value
+
+    def handle_result(self, worker):
+        try:
+            task_id, value, error, (current, peak) = worker.conn.recv()
+        except (EOFError, OSError):
+            return self.handle_exit(worker)
+        _, future, nbytes = worker.task
+        worker.task = None
+        worker.tasks += 1
+        worker.bytes += nbytes
+        self.stats["tasks"] += 1
+        self.record_memory(current, peak)
+        if error is None:
+            future.set_result(value)
+        else:
+            future.set_exception(error)
+
+        if self.max_rss_mb and current is not None and current > self.max_rss_mb:
+            self.retire(worker, "memory")
+        elif self.max_tasks and worker.tasks >= self.max_tasks:
+            self.retire(worker, "tasks")
+        elif self.max_bytes and worker.bytes >= self.max_bytes:
+            self.retire(worker, "bytes")
+
+    def handle_exit(self, worker):
+        """A worker died on its own, e.g. killed by the OOM killer"""
+        if worker not in self.workers:
+            return
+        worker.process.join(1)
+        code = worker.process.exitcode
+        if worker.task is not None:
+            future = worker.task[1]
+            future.set_exception(WorkerError(f"worker process exited with code {code}", "crashed"))
+            worker.task = None
+        self.stats["crashed"] += 1
+        self.retire(worker)
+
+    def check_limits(self):
+        """Kill busy workers above the memory ceiling or past the task deadline"""
+        if not self.max_rss_mb and not self.task_timeout:
+            return
+        now = time.perf_counter()
+        for worker in list(self.workers):
+            if worker.task is None:
+                continue
+            if self.task_timeout and now - worker.started > self.task_timeout:
+                self.kill_busy(worker, "timeout",
+                               f"task did not finish within {self.task_timeout:g} s")
+                continue
+            if not self.max_rss_mb:
+                continue
+            current = rss_mb(worker.process.pid)
+            self.record_memory(current)
+            if current is not None and current > self.max_rss_mb:
+                self.kill_busy(worker, "memory",
+                               f"worker exceeded the {self.max_rss_mb:g} MB memory ceiling ({current:.0f} MB)")
+
+    def kill_busy(self, worker, reason, message):
+        """Kill a busy worker and fail its task with WorkerError(message, reason)"""
+        future = worker.task[1]
+        worker.task = None
+        self.retire(worker, reason, kill=True)
+        future.set_exception(WorkerError(message, reason))
+
+    def idle(self):
+        with self.lock:
+            queued = any(self.queues.values())
+        return not queued and all(w.task is None for w in self.workers)
+
+    def supervise(self):
+        while True:
+            self.dispatch()
+            with self.lock:
+                closing = self.closing
+            if closing and self.idle():
+                break
+
+            busy = [w for w in self.workers if w.task is not None]
+            ready = wait([self.wake_r] + [w.conn for w in busy] + [w.process.sentinel for w in busy],
+                         timeout=POLL_INTERVAL)
+            for worker in busy:
+                if worker not in self.workers:
+                    continue
+                if worker.conn in ready:
+                    self.handle_result(worker)
+                elif worker.process.sentinel in ready:
+                    self.handle_exit(worker)
+            if self.wake_r in ready:
+                while self.wake_r.poll():
+                    self.wake_r.recv_bytes()
+            self.check_limits()
+
+        for worker in list(self.workers):
+            self.retire(worker)
+
+    def summary(self):
+        """One line on peak memory and worker recycling"""
+        stats = self.stats
+        recycled = {k: v for k, v in stats["recycled"].items() if v}
+        killed = stats["killed"]["memory"]
+        timed_out = stats["killed"]["timeout"]
+        peak = f"{stats['peak_rss_mb']:.1f} MB" if stats["peak_rss_mb"] else "unknown"
+        parts = [f"peak worker RSS {peak}", f"{stats['started']} worker(s) started"]
+        if recycled:
+            parts.append("recycled after " + ", ".join(f"{reason}: {n}" for reason, n in recycled.items()))
+        if killed:
+            parts.append(f"{killed} killed above {self.max_rss_mb:g} MB")
+        if timed_out:
+            parts.append(f"{timed_out} killed after {self.task_timeout:g} s")
+        if stats["crashed"]:
+            parts.append(f"{stats['crashed']} crashed")
+        return "Workers: " + ", ".join(parts)
+
+
+def split_pool_flags(args):
+    """
+    Pull the worker pool limits out of a command line.
+    Returns ({"max_rss_mb", "max_tasks", "max_bytes_mb", "large_file_mb", "large_jobs",
+    "timeout"}, rest).
+    """
+    names = {'--max-rss': ('max_rss_mb', float), '--max-tasks': ('max_tasks', int),
+             '--max-bytes': ('max_bytes_mb', float), '--large-file': ('large_file_mb', float),
+             '--large-jobs': ('large_jobs', int), '--timeout': ('timeout', float)}
+    opts = {"max_rss_mb": None, "max_tasks": DEFAULT_MAX_TASKS,
+            "max_bytes_mb": DEFAULT_MAX_BYTES_MB, "large_file_mb": DEFAULT_LARGE_FILE_MB,
+            "large_jobs": DEFAULT_LARGE_JOBS, "timeout": None}
+    rest = []
+    i = 0
+    while i < len(args):
+        if args[i] in names and i + 1 < len(args):
+            key, kind = names[args[i]]
+            try:
+                value = kind(args[i + 1])
+            except ValueError:
+                raise ValueError(f"{args[i]} requires a number")
+            if value < 0:
+                raise ValueError(f"{args[i]} must not be negative")
+            opts[key] = value
+            i += 2
+        else:
+            rest.append(args[i])
+            i += 1
+    return opts, rest
+
+
+def make_pool(target, jobs, limits, initializer=None):
+    """Pool with a default lane of jobs workers and, unless disabled, a large-file lane"""
+    lanes = {DEFAULT_LANE: jobs}
+    if limits.get("large_file_mb"):
+        lanes[LARGE_LANE] = limits.get("large_jobs") or DEFAULT_LARGE_JOBS
+    return WorkerPool(target, lanes, max_rss_mb=limits.get("max_rss_mb"),
+                      max_tasks=limits.get("max_tasks"), max_bytes_mb=limits.get("max_bytes_mb"),
+                      task_timeout=limits.get("timeout"), initializer=initializer)
+
+
+def read_file(path):
+    """Demo task: read a whole file, returns its size"""
+    with open(path, "rb") as f:
+        return len(f.read())
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from commands.pool import read_file as demo_task
+
+    try:
+        limits, paths = split_pool_flags(sys.argv[1:])
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    if not paths:
+        print("Usage: python pool.py [--max-rss MB] [--max-tasks N] [--max-bytes MB] [--large-file MB] "
+              "[--timeout SECONDS] <FILE>...")
+        sys.exit(1)
+
+    with make_pool(demo_task, os.cpu_count() or 1, limits) as pool:
+        futures = []
+        for path in paths:
+            size = file_size(path)
+            futures.append((path, pool.submit(pool.lane_for(size, limits["large_file_mb"]), path, size=size)))
+        for path, future in futures:
+            try:
+                print(f"{path}: {future.result()} bytes")
+            except Exception as e:
+                print(f"{path}: {e}")
+    print(pool.summary())
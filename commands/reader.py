@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+C2PA Manifest Reader - Shared c2pa.Reader access for every command,
+backed by the optional persistent result cache. Inputs are file paths,
+'-' for stdin, bytes-like buffers or binary streams.
+"""
+
+import io
+import os
+import sys
+import sqlite3
+import threading
+from commands import jsonio
+from commands.timings import phase
+from commands.cache import ResultCache, cache_from_env
+from commands.locator import has_manifest, buffer_has_manifest, detect_mime
+
+# Set C2PA_PY_SNIFF=0 to always hand files to c2pa.Reader
+SNIFF = os.environ.get('C2PA_PY_SNIFF', '1') not in ('0', 'false')
+
+# c2pa.load_settings only affects the calling thread, so the digest of
+# the settings loaded into c2pa is recorded per thread as well. A thread
+# that never loaded settings reads with c2pa's defaults.
+_settings_state = threading.local()
+
+_cache = None
+_cache_configured = False
+
+
+def settings_digest():
+    """Digest of the settings loaded into c2pa on the calling thread"""
+    return getattr(_settings_state, "digest", "default")
+
+
+def set_settings_digest(digest):
+    """Record which settings the calling thread just loaded into c2pa"""
+    _settings_state.digest = digest
+
+
+def configure_cache(enabled=None, refresh=False, db_path=None):
+    """
+    Select the result cache for this process.
+    enabled=None follows the C2PA_PY_CACHE environment variable,
+    True forces it on (db_path or the default location), False turns it off.
+    """
+    global _cache, _cache_configured
+
+    if enabled is False:
+        _cache = None
+    elif db_path is not None:
+        _cache = ResultCache(db_path, refresh=refresh)
+    else:
+        _cache = cache_from_env(refresh=refresh)
+        if _cache is None and enabled:
+            _cache = ResultCache(refresh=refresh)
+    _cache_configured = True
+
+
+def split_cache_flags(args):
+    """
+    Pull --cache / --no-cache / --refresh out of a command line.
+    Returns (configure_cache keyword arguments, remaining arguments).
+    """
+    cache_opts = {}
+    rest = []
+    for arg in args:
+        if arg == '--cache':
+            cache_opts["enabled"] = True
+        elif arg == '--no-cache':
+            cache_opts["enabled"] = False
+        elif arg == '--refresh':
+            cache_opts["refresh"] = True
+        else:
+            rest.append(arg)
+    return cache_opts, rest
+
+
+def split_source_flags(args):
+    """
+    Pull --mime TYPE out of a command line.
+    Returns (MIME type or None, remaining arguments).
+    """
+    mime = None
+    rest = []
+    i = 0
+    while i < len(args):
+        if args[i] == '--mime' and i + 1 < len(args):
+            mime = args[i + 1]
+            i += 2
+        else:
+            rest.append(args[i])
+            i += 1
+    return mime, rest
+
+
+class StreamSource:
+    """
+    Input given as bytes, a memoryview, a binary stream or stdin instead of
+    a path. The content stays in memory and is never spilled to disk.
+    """
+
+    def __init__(self, data, mime=None, name="stream"):
+        self.data = data
+        self.buffer = memoryview(data).cast("B")
+        self.mime = mime or detect_mime(self.buffer)
+        self.name = name
+
+    def __str__(self):
+        return self.name
+
+    def __len__(self):
+        return self.buffer.nbytes
+
+    def stream(self):
+        """New binary stream over the content for c2pa.Reader"""
+        # BytesIO shares a bytes object instead of copying it
+        return io.BytesIO(self.data if isinstance(self.data, bytes) else self.buffer)
+
+
+def open_source(source, mime=None, name=None):
+    """
+    Normalise an input for the readers: paths are returned unchanged,
+    '-' reads stdin, bytes-like objects and binary streams become a
+    StreamSource. mime is required when the format cannot be told from
+    the content's magic bytes.
+    """
+    if isinstance(source, StreamSource):
+        return source
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return StreamSource(source, mime, name or "stream")
+    if source == '-':
+        with phase("file_read"):
+            data = sys.stdin.buffer.read()
+        return StreamSource(data, mime, name or "stdin")
+    if hasattr(source, "read"):
+        with phase("file_read"):
+            data = source.read()
+        return StreamSource(data, mime, name or "stream")
+    return source
+
+
+def get_cache():
+    """The configured result cache, or None if caching is off"""
+    if not _cache_configured:
+        configure_cache()
+    return _cache
+
+
+def cache_lookup(path, digest):
+    """Cached entry for a file, ignoring cache failures"""
+    cache = get_cache()
+    if cache is None or isinstance(path, StreamSource):
+        return None
+    try:
+        return cache.lookup(path, digest)
+    except sqlite3.Error:
+        return None
+
+
+def cache_store(path, digest, raw_json=None, verdict=None):
+    """Save to the cache, ignoring cache failures"""
+    cache = get_cache()
+    if cache is None or isinstance(path, StreamSource):
+        return
+    try:
+        cache.store(path, digest, raw_json=raw_json, verdict=verdict)
+    except sqlite3.Error:
+        pass
+
+
+def sniff_no_manifest(path):
+    """True if the container headers show the file carries no manifest"""
+    if not SNIFF:
+        return False
+    try:
+        if isinstance(path, StreamSource):
+            return buffer_has_manifest(path.buffer) is False
+        return has_manifest(path) is False
+    except (OSError, ValueError):
+        return False
+
+
+def read_manifest_json(path):
+    """
+    Return the c2pa.Reader JSON for a file, served from the result cache
+    when the file and active settings are unchanged. Files whose headers
+    show no manifest return None without constructing a Reader.
+    """
+    with phase("sniff"):
+        no_manifest = sniff_no_manifest(path)
+    if no_manifest:
+        return None
+
+    # Imported on first use: unsigned files and --help never load c2pa
+    import c2pa
+
+    if isinstance(path, StreamSource):
+        if path.mime is None:
+            raise ValueError(f"Unknown format of {path}, a MIME type is required")
+        with path.stream() as stream:
+            with phase("reader"):
+                reader = c2pa.Reader(path.mime, stream)
+            with phase("reader_json"):
+                return reader.json()
+
+    with phase("cache"):
+        hit = cache_lookup(path, settings_digest())
+    if hit and hit["raw_json"] is not None:
+        return hit["raw_json"]
+
+    with phase("reader"):
+        reader = c2pa.Reader(path)
+    with phase("reader_json"):
+        raw_output = reader.json()
+
+    if raw_output:
+        with phase("cache"):
+            cache_store(path, settings_digest(), raw_json=raw_output)
+    return raw_output
+
+
+class ManifestStore:
+    """
+    A manifest store read and parsed once, shared by every view
+    rendered for the same file. path is the display name, source the
+    original path or StreamSource.
+    """
+
+    def __init__(self, path, raw_json, source=None):
+        self.path = path
+        self.raw_json = raw_json
+        with phase("json_parse"):
+            self.data = jsonio.loads(raw_json)
+        self.source = path if source is None else source
+        self.mime = source.mime if isinstance(source, StreamSource) else None
+
+
+def load_manifest_store(path):
+    """
+    Read and parse the manifest store of a file or StreamSource.
+    Returns None if the file has no manifest, raises if it cannot be read.
+    """
+    source = open_source(path)
+    raw_output = read_manifest_json(source)
+    if not raw_output:
+        return None
+    return ManifestStore(str(source), raw_output, source)
@@ -0,0 +1,501 @@
+#!/usr/bin/env python3
+"""
+C2PA Verification Server - Local HTTP daemon keeping c2pa imported and the
+trust store loaded between requests
+Usage: python serve.py [--host HOST] [--port PORT | --socket PATH] [--workers N] [--queue N] [TRUST OPTIONS]
+
+Endpoints:
+  POST /verify          File content as the body, MIME type from Content-Type or ?mime=
+  GET  /verify?path=P   Verify a local file
+  POST /verify/bulk     {"paths": [...]} -> [{"path", "result" | "error"}, ...]
+  GET  /health          Liveness, trust store and policy digests
+  GET  /metrics         Prometheus text format counters
+  GET  /timings         Phase timing histograms as JSON (with --timings)
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import threading
+import socketserver
+from collections import deque
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import urlsplit, parse_qs
+from concurrent.futures import ThreadPoolExecutor
+
+if __name__ == "__main__":
+    # Allow running as a script as well as a module
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from commands.reader import open_source, configure_cache, split_cache_flags
+from commands.trust import get_trust_context
+from commands.views import parse_trust_args
+from commands.jsonio import dumpb, loads
+from commands import timings
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8750
+DEFAULT_QUEUE = 64
+DEFAULT_MAX_BODY = 256 * 1024 * 1024
+MAX_BULK_PATHS = 10000
+
+# Content types that say nothing about the file format (curl's default included)
+GENERIC_TYPES = {"", "application/octet-stream", "application/x-www-form-urlencoded"}
+
+REJECT_BODY = json.dumps({"error": "Server busy, retry later"}).encode("utf-8")
+REJECT_RESPONSE = (b"HTTP/1.0 503 Service Unavailable\r\n"
+                   b"Content-Type: application/json\r\n"
+                   b"Retry-After: 1\r\n"
+                   b"Content-Length: " + str(len(REJECT_BODY)).encode("ascii") + b"\r\n"
+                   b"Connection: close\r\n\r\n" + REJECT_BODY)
+
+
+class Metrics:
+    """Request counters and verification latency, safe to update from any thread"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.requests = {}
+        self.rejected = 0
+        self.in_flight = 0
+        self.verify_count = 0
+        self.verify_seconds = 0.0
+
+    def request(self, endpoint, status):
+        with self.lock:
+            key = (endpoint, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+
+    def reject(self):
+        with self.lock:
+            self.rejected += 1
+
+    def verification(self, seconds):
+        with self.lock:
+            self.verify_count += 1
+            self.verify_seconds += seconds
+
+    def render(self, queue_depth):
+        """Prometheus text exposition"""
+        with self.lock:
+            lines = [
+                "# TYPE c2pa_serve_requests_total counter",
+                *(f'c2pa_serve_requests_total{{endpoint="{endpoint}",status="{status}"}} {n}'
+                  for (endpoint, status), n in sorted(self.requests.items())),
+                "# TYPE c2pa_serve_rejected_total counter",
+                f"c2pa_serve_rejected_total {self.rejected}",
+                "# TYPE c2pa_serve_in_flight gauge",
+                f"c2pa_serve_in_flight {self.in_flight}",
+                "# TYPE c2pa_serve_queue_depth gauge",
+                f"c2pa_serve_queue_depth {queue_depth}",
+                "# TYPE c2pa_serve_verify_seconds summary",
+                f"c2pa_serve_verify_seconds_count {self.verify_count}",
+                f"c2pa_serve_verify_seconds_sum {self.verify_seconds:.6f}",
+                "# TYPE c2pa_serve_uptime_seconds gauge",
+                f"c2pa_serve_uptime_seconds {time.time() - self.started:.1f}",
+            ]
+        return "\n".join(lines) + "\n"
+
+
+class VerifyService:
+    """
+    Trust context loaded once plus the bounded pool running verifications.
+    The trust files are reloaded in the background once their TTL expires;
+    each pool thread loads the c2pa settings itself, as they are per thread.
+    """
+
+    def __init__(self, trust_opts=None, workers=None):
+        self.context = get_trust_context(trust_opts or {})
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="verify")
+        self.metrics = Metrics()
+        self.stopped = threading.Event()
+        self.refresher = threading.Thread(target=self.refresh_trust, daemon=True)
+        self.refresher.start()
+
+    def refresh_trust(self):
+        """
+        Revalidate the trust files every TTL. Pool threads pick up changed
+        settings on their next verification.
+        """
+        interval = max(self.context.store.ttl, 60)
+        while not self.stopped.wait(interval):
+            try:
+                self.context.load()
+            except Exception as e:
+                print(f"Warning: trust store refresh failed: {e}", file=sys.stderr)
+
+    def verify_one(self, source):
+        """Verify one input, returning the update_validation_state JSON"""
+        with self.metrics.lock:
+            self.metrics.in_flight += 1
+        start = time.perf_counter()
+        try:
+            with timings.file_timings() as file_timings:
+                return self.context.verify(source)
+        finally:
+            timings.HISTOGRAMS.observe(file_timings)
+            self.metrics.verification(time.perf_counter() - start)
+            with self.metrics.lock:
+                self.metrics.in_flight -= 1
+
+    def verify(self, source):
+        """Run one verification on the pool and wait for it"""
+        return self.pool.submit(self.verify_one, source).result()
+
+    def verify_many(self, paths):
+        """
+        Verify paths on the pool, one {"path", "result" | "error"} each, in order.
+        At most `workers` of them are in flight at a time, so one bulk request
+        cannot fill the pool ahead of other callers.
+        """
+        results = []
+        window = deque()
+
+        def collect(path, future):
+            if future is None:
+                results.append({"path": path, "error": f"File not found: {path}"})
+                return
+            try:
+                results.append({"path": path, "result": future.result()})
+            except Exception as e:
+                results.append({"path": path, "error": error_message(e, path)})
+
+        for path in paths:
+            if len(window) >= self.workers:
+                collect(*window.popleft())
+            window.append((path, self.pool.submit(self.verify_one, path)
+                           if os.path.isfile(path) else None))
+        while window:
+            collect(*window.popleft())
+        return results
+
+    def close(self):
+        self.stopped.set()
+        self.pool.shutdown(wait=True)
+
+
+def error_message(error, name):
+    """Client facing message, matching the CLI for files without a manifest"""
+    if isinstance(error, ValueError):
+        return f"No manifest found in {name}"
+    return str(error) or type(error).__name__
+
+
+class VerifyHandler(BaseHTTPRequestHandler):
+    """HTTP front end of the VerifyService"""
+
+    server_version = "c2pa-py-serve"
+
+    def address_string(self):
+        # Unix socket clients have no address
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def send_json(self, status, data, endpoint):
+        body = dumpb(data)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.service.metrics.request(endpoint, status)
+
+    def send_text(self, status, text, endpoint):
+        body = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.service.metrics.request(endpoint, status)
+
+    def read_body(self, endpoint):
+        """Request body, or None after sending an error response"""
+        length = self.headers.get("Content-Length")
+        if length is None:
+            self.send_json(411, {"error": "Content-Length required"}, endpoint)
+            return None
+        length = int(length)
+        if length > self.server.max_body:
+            self.send_json(413, {"error": f"Body larger than {self.server.max_body} bytes"}, endpoint)
+            return None
+        return self.rfile.read(length)
+
+    def run_verify(self, source, name, endpoint):
+        try:
+            self.send_json(200, self.server.service.verify(source), endpoint)
+        except ValueError:
+            self.send_json(404, {"error": f"No manifest found in {name}"}, endpoint)
+        except Exception as e:
+            self.send_json(422, {"error": error_message(e, name)}, endpoint)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        service = self.server.service
+
+        if url.path == "/health":
+            self.send_json(200, {"status": "ok",
+                                 "uptime": round(time.time() - service.metrics.started, 1),
+                                 "workers": service.workers,
+                                 "trust_digest": service.context.digest,
+                                 "policy": service.context.policy.name,
+                                 "policy_digest": service.context.policy.digest}, "/health")
+        elif url.path == "/metrics":
+            text = service.metrics.render(self.server.requests.qsize())
+            if timings.ENABLED:
+                text += timings.HISTOGRAMS.to_prometheus()
+            self.send_text(200, text, "/metrics")
+        elif url.path == "/timings":
+            if timings.ENABLED:
+                self.send_json(200, timings.HISTOGRAMS.to_dict(), "/timings")
+            else:
+                self.send_json(404, {"error": "Phase timings are off, start with --timings"}, "/timings")
+        elif url.path == "/verify" and "path" in query:
+            path = query["path"][0]
+            if not os.path.isfile(path):
+                self.send_json(404, {"error": f"File not found: {path}"}, "/verify")
+            else:
+                self.run_verify(path, path, "/verify")
+        else:
+            self.send_json(404, {"error": f"Unknown endpoint {url.path}"}, "other")
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+
+        if url.path == "/verify":
+            body = self.read_body("/verify")
+            if body is None:
+                return
+            mime = query.get("mime", [None])[0] or self.headers.get("Content-Type", "")
+            mime = mime.split(";")[0].strip().lower()
+            if mime in GENERIC_TYPES:
+                mime = None
+            name = query.get("name", ["request"])[0]
+            self.run_verify(open_source(body, mime, name), name, "/verify")
+
+        elif url.path == "/verify/bulk":
+            body = self.read_body("/verify/bulk")
+            if body is None:
+                return
+            try:
+                paths = loads(body)["paths"]
+                if not isinstance(paths, list) or not all(isinstance(p, str) for p in paths):
+                    raise ValueError("paths must be a list of strings")
+            except (ValueError, KeyError, TypeError) as e:
+                self.send_json(400, {"error": f"Expected {{\"paths\": [...]}}: {e}"}, "/verify/bulk")
+                return
+            if len(paths) > MAX_BULK_PATHS:
+                self.send_json(413, {"error": f"At most {MAX_BULK_PATHS} paths per request"}, "/verify/bulk")
+                return
+            self.send_json(200, self.server.service.verify_many(paths), "/verify/bulk")
+
+        else:
+            self.send_json(404, {"error": f"Unknown endpoint {url.path}"}, "other")
+
+
+class BoundedServerMixIn:
+    """
+    Serve connections on a fixed set of threads fed by a bounded queue.
+    When the queue is full new connections get an immediate 503.
+    """
+
+    def start_threads(self, threads, queue_size):
+        self.requests = queue.Queue(maxsize=queue_size)
+        self.threads = [threading.Thread(target=self.serve_queue, daemon=True, name=f"http-{i}")
+                        for i in range(threads)]
+        for thread in self.threads:
+            thread.start()
+
+    def process_request(self, request, client_address):
+        try:
+            self.requests.put_nowait((request, client_address))
+        except queue.Full:
+            self.service.metrics.reject()
+            try:
+                request.sendall(REJECT_RESPONSE)
+            except OSError:
+                pass
+            self.shutdown_request(request)
+
+    def serve_queue(self):
+        while True:
+            item = self.requests.get()
+            if item is None:
+                return
+            request, client_address = item
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        for _ in self.threads:
+            self.requests.put(None)
+
+
+class VerifyHTTPServer(BoundedServerMixIn, HTTPServer):
+    pass
+
+
+if hasattr(socketserver, "UnixStreamServer"):
+    class VerifyUnixServer(BoundedServerMixIn, socketserver.UnixStreamServer):
+        pass
+else:  # Windows
+    VerifyUnixServer = None
+
+
+def make_server(service, host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None,
+                queue_size=DEFAULT_QUEUE, max_body=DEFAULT_MAX_BODY, verbose=False):
+    """Build a server for the service on a TCP port or a Unix socket"""
+    if socket_path:
+        if VerifyUnixServer is None:
+            raise OSError("Unix sockets are not supported on this platform")
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        server = VerifyUnixServer(socket_path, VerifyHandler)
+    else:
+        server = VerifyHTTPServer((host, port), VerifyHandler)
+    server.service = service
+    server.max_body = max_body
+    server.verbose = verbose
+    # One thread per worker reads requests, a few more so health checks get through
+    server.start_threads(service.workers + 2, queue_size)
+    return server
+
+
+def parse_args(args):
+    """Split serve arguments into server options and trust options"""
+    cache_opts, args = split_cache_flags(args)
+    timing_opts, args = timings.split_timing_flags(args)
+    opts = {"host": DEFAULT_HOST, "port": DEFAULT_PORT, "socket": None, "workers": None,
+            "queue": DEFAULT_QUEUE, "max_body": DEFAULT_MAX_BODY, "verbose": False,
+            "cache": cache_opts, "timings": bool(timing_opts), "trust": {}}
+    names = {'--host': 'host', '--socket': 'socket'}
+    numbers = {'--port': 'port', '--workers': 'workers', '--queue': 'queue'}
+    trust_args = []
+
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg in names and i + 1 < len(args):
+            opts[names[arg]] = args[i + 1]
+            i += 2
+        elif arg in numbers and i + 1 < len(args):
+            opts[numbers[arg]] = int(args[i + 1])
+            i += 2
+        elif arg == '--max-body' and i + 1 < len(args):
+            opts["max_body"] = int(args[i + 1]) * 1024 * 1024
+            i += 2
+        elif arg in ('--verbose', '-v'):
+            opts["verbose"] = True
+            i += 1
+        elif arg == '--offline':
+            trust_args.append(arg)
+            i += 1
+        else:
+            trust_args += args[i:i + 2]
+            i += 2
+
+    opts["trust"] = parse_trust_args(trust_args)
+    return opts
+
+
+def main(args):
+    """serve CLI entry point, returns the process exit code"""
+    try:
+        opts = parse_args(args)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        print("Use 'serve --help' for usage information.", file=sys.stderr)
+        return 1
+
+    if opts["cache"]:
+        configure_cache(**opts["cache"])
+    if opts["timings"]:
+        timings.enable()
+
+    service = VerifyService(opts["trust"], opts["workers"])
+    try:
+        server = make_server(service, opts["host"], opts["port"], opts["socket"],
+                             opts["queue"], opts["max_body"], opts["verbose"])
+    except OSError as e:
+        print(f"Error: cannot listen: {e}", file=sys.stderr)
+        service.close()
+        return 1
+
+    if opts["socket"]:
+        where = f"unix:{opts['socket']}"
+    else:
+        host, port = server.server_address[:2]
+        where = f"http://{host}:{port}"
+    print(f"Serving C2PA verification on {where} with {service.workers} worker(s)",
+          file=sys.stderr, flush=True)
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+        if opts["socket"] and os.path.exists(opts["socket"]):
+            os.unlink(opts["socket"])
+    return 0
+
+
+def print_serve_help():
+    help_text = f"""Sub-command to run a local verification server with the trust store kept loaded
+
+Usage: python3 c2pa.py serve [SERVER OPTIONS] [TRUST OPTIONS]
+
+Server options:
+      --host <HOST>         Address to listen on [default: {DEFAULT_HOST}]
+      --port <PORT>         TCP port, 0 picks a free one [default: {DEFAULT_PORT}]
+      --socket <PATH>       Listen on a Unix socket instead of TCP
+      --workers <N>         Concurrent verifications [default: CPU count]
+      --queue <N>           Connections waiting for a worker before new ones get 503 [default: {DEFAULT_QUEUE}]
+      --max-body <MB>       Largest accepted upload [default: {DEFAULT_MAX_BODY // (1024 * 1024)}]
+  -v, --verbose             Log every request
+      --cache, --no-cache, --refresh
+                            Result cache control, as for single files
+      --timings             Record phase timings of every verification, served
+                            as histograms by /metrics and /timings
+
+Trust options are those of the trust command (--trust_anchors, --allowed_list,
+--trust_config, --cache_dir, --ttl, --offline, --policy).
+
+Endpoints:
+  POST /verify              File content as the body, MIME type from Content-Type or ?mime=
+  GET  /verify?path=<PATH>  Verify a file readable by the server
+  POST /verify/bulk         {{"paths": [...]}}, results in the same order
+  GET  /health              Liveness, loaded trust store and policy digests
+  GET  /metrics             Prometheus counters, with phase histograms under --timings
+  GET  /timings             Phase timing histograms as JSON (with --timings)
+
+Verification results are the same JSON as the trust command. Files without a
+manifest return 404, unreadable manifests 422.
+
+Example:
+  curl --data-binary @image.jpg -H 'Content-Type: image/jpeg' http://127.0.0.1:{DEFAULT_PORT}/verify
+"""
+    print(help_text)
+
+
+if __name__ == "__main__":
+    if any(arg in ('--help', '-h') for arg in sys.argv[1:]):
+        print_serve_help()
+        sys.exit(0)
+
+    sys.exit(main(sys.argv[1:]))
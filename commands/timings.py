@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+C2PA Phase Timings - Optional per-phase timing of every command, with
+per-file records and histograms exportable as JSON or Prometheus text
+Usage: python timings.py <timings.json> [--prometheus]
+
+    with phase("reader"):
+        reader = c2pa.Reader(path)
+
+phase() returns a shared no-op context until timings are enabled with
+--timings or C2PA_PY_TIMINGS=1, so instrumented code costs next to
+nothing by default.
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+import contextlib
+
+ENABLED = os.environ.get('C2PA_PY_TIMINGS', '') not in ('', '0', 'false')
+
+# Histogram upper bounds in seconds, as Prometheus "le" labels
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+           0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Time of a file not covered by any phase
+OTHER = "other"
+TOTAL = "total"
+
+
+class _NoPhase:
+    """Context manager doing nothing, returned while timings are off"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_PHASE = _NoPhase()
+
+# Timings of the file being processed by each thread
+_local = threading.local()
+
+
+class _Phase:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def phase(name):
+    """Context manager adding the time spent in the block to phase name"""
+    return _Phase(name) if ENABLED else _NO_PHASE
+
+
+def record(name, seconds):
+    """Add seconds to a phase of the current file, if one is being timed"""
+    current = getattr(_local, "current", None)
+    if current is not None:
+        current[name] = current.get(name, 0.0) + seconds
+
+
+def enable(enabled=True):
+    """Turn timings on or off for the rest of the process"""
+    global ENABLED
+    ENABLED = enabled
+
+
+@contextlib.contextmanager
+def file_timings():
+    """
+    Time one file: yields the {phase: seconds} dict filled by the phases run
+    in this thread. On exit it also holds "total" and "other", the time not
+    covered by a phase. Yields None while timings are off.
+    """
+    if not ENABLED:
+        yield None
+        return
+
+    previous = getattr(_local, "current", None)
+    current = _local.current = {}
+    start = time.perf_counter()
+    try:
+        yield current
+    finally:
+        total = time.perf_counter() - start
+        current[OTHER] = max(total - sum(current.values()), 0.0)
+        current[TOTAL] = total
+        _local.current = previous
+
+
+def format_timings(name, timings):
+    """One line describing the timings of a file"""
+    phases = ", ".join(f"{phase} {seconds * 1000:.2f}" for phase, seconds in timings.items()
+                       if phase != TOTAL)
+    return f"Timings for {name}: total {timings.get(TOTAL, 0.0) * 1000:.2f} ms ({phases})"
+
+
+class Histogram:
+    """Per-bucket (non-cumulative) counts, sum, count and max of one phase"""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        index = 0
+        while index < len(BUCKETS) and seconds > BUCKETS[index]:
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def to_dict(self):
+        return {"counts": list(self.counts), "count": self.count,
+                "sum": self.sum, "max": self.max}
+
+
+class PhaseHistograms:
+    """Histograms of every phase across files, safe to update from any thread"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.phases = {}
+
+    def observe(self, timings):
+        """Add the per-file timings of one file"""
+        if not timings:
+            return
+        with self.lock:
+            for name, seconds in timings.items():
+                self.phases.setdefault(name, Histogram()).observe(seconds)
+
+    def to_dict(self):
+        with self.lock:
+            return {"buckets": list(BUCKETS),
+                    "phases": {name: h.to_dict() for name, h in sorted(self.phases.items())}}
+
+    def to_prometheus(self, metric="c2pa_phase_seconds"):
+        """Prometheus text exposition of the histograms"""
+        lines = [f"# HELP {metric} Time spent per file in each processing phase",
+                 f"# TYPE {metric} histogram"]
+        with self.lock:
+            for name, h in sorted(self.phases.items()):
+                cumulative = 0
+                for bound, count in zip(BUCKETS + ("+Inf",), h.counts):
+                    cumulative += count
+                    lines.append(f'{metric}_bucket{{phase="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_sum{{phase="{name}"}} {h.sum:.6f}')
+                lines.append(f'{metric}_count{{phase="{name}"}} {h.count}')
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        """Table of count, total, mean and max per phase"""
+        lines = [f"{'phase':<14} {'files':>7} {'total s':>9} {'mean ms':>9} {'max ms':>9}"]
+        with self.lock:
+            for name, h in sorted(self.phases.items(), key=lambda item: -item[1].sum):
+                mean = h.sum / h.count if h.count else 0.0
+                lines.append(f"{name:<14} {h.count:>7} {h.sum:>9.3f} {mean * 1000:>9.2f} "
+                             f"{h.max * 1000:>9.2f}")
+        return "\n".join(lines)
+
+    def export(self, path):
+        """Write the histograms to path: Prometheus text for *.prom, else JSON"""
+        if path.endswith(".prom"):
+            content = self.to_prometheus()
+        else:
+            content = json.dumps(self.to_dict(), indent=2) + "\n"
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+
+
+# Histograms of this process (batch parent, server)
+HISTOGRAMS = PhaseHistograms()
+
+
+def split_timing_flags(args):
+    """
+    Pull --timings and --timings-export FILE out of a command line.
+    Returns ({"enabled", "export"} or {}, remaining arguments).
+    """
+    opts = {}
+    rest = []
+    i = 0
+    while i < len(args):
+        if args[i] == '--timings':
+            opts["enabled"] = True
+            i += 1
+        elif args[i] == '--timings-export' and i + 1 < len(args):
+            opts["enabled"] = True
+            opts["export"] = args[i + 1]
+            i += 2
+        else:
+            rest.append(args[i])
+            i += 1
+    return opts, rest
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python timings.py <timings.json> [--prometheus]")
+        sys.exit(1)
+
+    with open(sys.argv[1], "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    histograms = PhaseHistograms()
+    for name, h in data["phases"].items():
+        histogram = histograms.phases[name] = Histogram()
+        histogram.counts, histogram.count = h["counts"], h["count"]
+        histogram.sum, histogram.max = h["sum"], h["max"]
+
+    if '--prometheus' in sys.argv[2:]:
+        sys.stdout.write(histograms.to_prometheus())
+    else:
+        print(histograms.summary())
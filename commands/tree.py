@@ -1,126 +1,197 @@
 #!/usr/bin/env python3
 """
 C2PA Tree View Tool - Replicates c2patool --tree output
-Usage: python tree.py <image_path>
+Usage: python tree.py <image_path> [--depth N] [--max-nodes N]
 """
 
 import os
-import json
 import sys
-import requests
-import c2pa
 
+if __name__ == "__main__":
+    # Allow running as a script as well as a module
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from commands.reader import load_manifest_store
+
+
+
+# Default limit on printed nodes, so hostile stores cannot flood the output
+DEFAULT_MAX_NODES = 10000
+
+
+class TreeWriter:
+    """Collect tree lines and write them in one go, up to max_nodes lines"""
+
+    def __init__(self, max_nodes=DEFAULT_MAX_NODES):
+        self.lines = []
+        self.nodes = 0
+        self.max_nodes = max_nodes
+        self.truncated = False
+
+    def header(self, line):
+        """Add a line that does not count as a node"""
+        self.lines.append(line)
+
+    def add(self, line):
+        """Add a node line, returns False once the node limit is reached"""
+        if self.max_nodes is not None and self.nodes >= self.max_nodes:
+            if not self.truncated:
+                self.truncated = True
+                self.lines.append(f"... output truncated at {self.max_nodes} nodes (--max-nodes)")
+            return False
+        self.nodes += 1
+        self.lines.append(line)
+        return True
+
+    def flush(self, out=None):
+        out = out or sys.stdout
+        out.write("\n".join(self.lines) + "\n")
+        self.lines = []
+
+
+def visible_assertions(manifest_data):
+    """Labels of the assertions shown in the tree (hash assertions are hidden)"""
+    return [a.get('label', 'unknown') for a in manifest_data.get('assertions', [])
+            if not a.get('label', '').startswith('c2pa.hash')]
+
+
+def build_graph(manifests):
+    """
+    Ingredient graph of a manifest store, built once:
+    manifest id -> (visible assertion labels, [(ingredient title, manifest id)])
+    """
+    graph = {}
+    for man_id, manifest_data in manifests.items():
+        if not isinstance(manifest_data, dict):
+            continue
+        ingredients = [(ing.get('title', 'unknown'), ing.get('active_manifest', ''))
+                       for ing in manifest_data.get('ingredients', []) if isinstance(ing, dict)]
+        graph[man_id] = (visible_assertions(manifest_data), ingredients)
+    return graph
+
+
+def write_assertions(out, labels, prefix=""):
+    """Write assertions with tree formatting"""
+    for i, label in enumerate(labels):
+        connector = "└──" if i == len(labels) - 1 else "├──"
+        if not out.add(f"{prefix}{connector} Assertion:{label}"):
+            return False
+    return True
+
+
+def write_ingredient_tree(out, graph, root_id, ingredients, depth=None):
+    """
+    Write the ingredients of the root manifest, depth first. A manifest is
+    expanded once; later references to it are written as back-references,
+    references to a manifest being expanded as cycles. Ingredients nested
+    deeper than depth levels are summarized. Iterative, so deep stores
+    cannot hit the recursion limit.
+    """
+    expanded = {root_id}
+    path = {root_id}
+    stack = []
+
+    def push_children(children, prefix, level):
+        if depth is not None and level > depth:
+            return out.add(f"{prefix}└── ... {len(children)} ingredient(s) below --depth {depth}")
+        for i in reversed(range(len(children))):
+            title, man_id = children[i]
+            stack.append(("node", title, man_id, prefix, i == len(children) - 1, level))
+        return True
+
+    if not push_children(ingredients, "", 1):
+        return
+
+    while stack:
+        item = stack.pop()
+        if item[0] == "leave":
+            path.discard(item[1])
+            continue
+
+        _, title, man_id, prefix, is_last, level = item
 
-def print_assertions(assertions, prefix=""):
-    """Print assertions with tree formatting"""
-    for i, assertion in enumerate(assertions):
-        is_last = (i == len(assertions) - 1)
-        
-        # Get assertion label
-        label = assertion.get('label', 'unknown')
-        
         # Tree characters
-        if is_last:
-            print(f"{prefix}└── Assertion:{label}")
-        else:
-            print(f"{prefix}├── Assertion:{label}")
+        connector = "└──" if is_last else "├──"
+        extension = "    " if is_last else "│   "
 
+        note = ""
+        if man_id in path:
+            note = " (cycle)"
+        elif man_id in expanded:
+            note = " (shown above)"
 
-def print_ingredient_tree(ingredient, manifests, prefix="", is_last=False):
-    """Recursively print ingredient tree"""
-    
-    # Get ingredient title and manifest reference
-    title = ingredient.get('title', 'unknown')
-    active_manifest = ingredient.get('active_manifest', '')
-    
-    # Tree characters
-    connector = "└──" if is_last else "├──"
-    extension = "    " if is_last else "│   "
-    
-    # Print ingredient
-    print(f"{prefix}{connector} Asset:{title}, Manifest:{active_manifest}")
-    
-    # Get the ingredient's manifest data
-    if active_manifest in manifests:
-        manifest_data = manifests[active_manifest]
-        
-        # Print assertions for this ingredient
-        assertions = manifest_data.get('assertions', [])
-        
-        # Filter assertions
-        visible_assertions = [a for a in assertions 
-                             if not a.get('label', '').startswith('c2pa.hash')]
-        
-        if visible_assertions:
-            print_assertions(visible_assertions, prefix + extension)
-        
-        # Recursively print nested ingredients
-        nested_ingredients = manifest_data.get('ingredients', [])
-        if nested_ingredients:
-            for i, nested_ing in enumerate(nested_ingredients):
-                is_last_nested = (i == len(nested_ingredients) - 1)
-                print_ingredient_tree(nested_ing, manifests, 
-                                    prefix + extension, is_last_nested)
+        if not out.add(f"{prefix}{connector} Asset:{title}, Manifest:{man_id}{note}"):
+            return
+        if note or man_id not in graph:
+            continue
+
+        expanded.add(man_id)
+        labels, children = graph[man_id]
+        if not write_assertions(out, labels, prefix + extension):
+            return
+        if children:
+            path.add(man_id)
+            stack.append(("leave", man_id))
+            if not push_children(children, prefix + extension, level + 1):
+                return
+
+
+def view_tree(store, opts=None):
+    """
+    Print C2PA tree view of an already parsed manifest store.
+    opts may set "depth" (ingredient levels shown) and "max_nodes".
+    """
+    opts = opts or {}
+    json_data = store.data
+
+    # Get filename
+    filename = os.path.basename(store.path)
+
+    # Get active manifest
+    active_manifest_id = json_data.get('active_manifest', '')
+    manifests = json_data.get('manifests', {})
 
+    if not active_manifest_id or active_manifest_id not in manifests:
+        print("No active manifest found")
+        return
 
-def print_tree(image_path):
+    graph = build_graph(manifests)
+    labels, ingredients = graph[active_manifest_id]
+    out = TreeWriter(opts.get("max_nodes", DEFAULT_MAX_NODES))
+
+    # Tree header
+    out.header("Tree View:")
+    out.header(f" Asset:{filename}, Manifest:{active_manifest_id}")
+
+    # Assertions of the active manifest
+    if labels and not ingredients:
+        # Only assertions, no ingredients
+        write_assertions(out, labels, "")
+    elif labels and ingredients:
+        # Both assertions and ingredients
+        for label in labels:
+            if not out.add(f"├── Assertion:{label}"):
+                break
+
+    # Ingredients tree
+    if ingredients and not out.truncated:
+        write_ingredient_tree(out, graph, active_manifest_id, ingredients, opts.get("depth"))
+
+    out.flush()
+
+
+def print_tree(image_path, opts=None):
     """Print C2PA tree view"""
     
     # Read manifest
     try:
-        reader = c2pa.Reader(image_path)
-        raw_output = reader.json()
+        store = load_manifest_store(image_path)
         
-        if not raw_output:
+        if store is None:
             print(f"No manifest found in {image_path}")
             return
         
-        json_data = json.loads(raw_output)
-        
-        # Get filename
-        filename = os.path.basename(image_path)
-        
-        # Get active manifest
-        active_manifest_id = json_data.get('active_manifest', '')
-        manifests = json_data.get('manifests', {})
-        
-        if not active_manifest_id or active_manifest_id not in manifests:
-            print("No active manifest found")
-            return
-        
-        # Get active manifest data
-        active_manifest = manifests[active_manifest_id]
-        
-        # Print tree header
-        print("Tree View:")
-        print(f" Asset:{filename}, Manifest:{active_manifest_id}")
-        
-        # Get assertions from active manifest
-        assertions = active_manifest.get('assertions', [])
-        
-        # Filter out hash assertions
-        visible_assertions = [a for a in assertions 
-                             if not a.get('label', '').startswith('c2pa.hash')]
-        
-        # Get ingredients
-        ingredients = active_manifest.get('ingredients', [])
-        
-        # Print assertions
-        if visible_assertions and not ingredients:
-            # Only assertions, no ingredients
-            print_assertions(visible_assertions, "")
-        elif visible_assertions and ingredients:
-            # Both assertions and ingredients
-            for i, assertion in enumerate(visible_assertions):
-                label = assertion.get('label', 'unknown')
-                print(f"├── Assertion:{label}")
-        
-        # Print ingredients tree
-        if ingredients:
-            for i, ingredient in enumerate(ingredients):
-                is_last = (i == len(ingredients) - 1)
-                print_ingredient_tree(ingredient, manifests, "", is_last)
+        view_tree(store, opts)
         
     except Exception:
         print(f"No manifest found in {image_path}")
@@ -130,9 +201,27 @@ def print_tree(image_path):
 def cmd_tree(path: str):
     print_tree(path)
 
+def parse_tree_args(args):
+    """Parse --depth / --max-nodes, returns the view_tree options"""
+    names = {'--depth': 'depth', '--max-nodes': 'max_nodes'}
+    opts = {}
+
+    i = 0
+    while i < len(args):
+        if args[i] in names and i + 1 < len(args):
+            value = int(args[i + 1])
+            if value < 0:
+                raise ValueError(f"{args[i]} must not be negative")
+            opts[names[args[i]]] = value
+            i += 2
+        else:
+            raise ValueError(f"Unknown tree option: {args[i]}")
+
+    return opts
+
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        print("Usage: python tree.py <image_path>")
+        print("Usage: python tree.py <image_path> [--depth N] [--max-nodes N]")
         sys.exit(1)
     
     image_path = sys.argv[1]
@@ -141,4 +230,10 @@ if __name__ == "__main__":
         print(f"Error: File not found: {image_path}")
         sys.exit(1)
     
-    print_tree(image_path)
\ No newline at end of file
+    try:
+        tree_opts = parse_tree_args(sys.argv[2:])
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print_tree(image_path, tree_opts)
\ No newline at end of file
@@ -1,8 +1,21 @@
 import os
 import json
-import requests
-import c2pa
+import hashlib
+import threading
 import sys
+from collections import namedtuple
+
+if __name__ == "__main__":
+    # Allow running as a script (python commands/trust.py) as well as a module
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from commands.trust_store import TrustStoreCache, DEFAULT_CACHE_DIR, DEFAULT_TTL
+from commands.policy import get_policy, POLICY_ENV
+from commands.jsonio import loads, dumps, emit, COMPACT
+from commands.timings import phase
+from commands.reader import (load_manifest_store, settings_digest, set_settings_digest,
+                             cache_lookup, cache_store, configure_cache, get_cache,
+                             split_cache_flags)
 
 DEFAULT_ANCHORS = 'https://contentcredentials.org/trust/anchors.pem'
 DEFAULT_ALLOWED = 'https://contentcredentials.org/trust/allowed.sha256.txt'
@@ -14,138 +27,197 @@ CONFIG_URLS = {
     "config": os.environ.get('C2PATOOL_TRUST_CONFIG', DEFAULT_CONFIG)
 }
 
-FILES = {
-    "anchors": "anchors.pem",
-    "allowed": "allowed.sha256.txt",
-    "config": "store.cfg"
-}
-
-def download_trust_files():
+def validate_trust_content(key, content):
     """
-    Download trust files if they do not exist locally
+    Check that downloaded trust content looks like what c2pa expects.
+    Returns the content, or None if it is empty or an HTML error page.
     """
-    for key, url in CONFIG_URLS.items():
-        if not os.path.exists(FILES[key]):
-            try:
-                r = requests.get(url)
-                with open(FILES[key], 'wb') as f:
-                    f.write(r.content)
-            except:
-                pass
-
-def read_file_content(filename):
+    if not content or content.lstrip().startswith("<"):
+        return None
+    if key == "anchors" and "-----BEGIN CERTIFICATE-----" not in content:
+        return None
+    return content
+
+TrustState = namedtuple("TrustState", "settings digest policy verdict_digest")
+
+def verdict_key(settings_digest, policy):
+    """Cache key of a verdict: verdicts depend on the policy as well as on the settings"""
+    return hashlib.sha256(f"{settings_digest}:{policy.digest}".encode("utf-8")).hexdigest()
+
+class TrustContext:
     """
-    Read content of a file if it exists
+    Trust store loaded and validated once, then reused for every verification.
+    c2pa settings are per thread: each thread calls c2pa.load_settings the
+    first time it verifies, and again only when the loaded settings change.
     """
-    if os.path.exists(filename):
-        with open(filename, "r", encoding="utf-8") as f:
-            return f.read().strip()
-    return None
 
-def recursive_find_errors(data, invalid_codes):
+    def __init__(self, trust_opts=None):
+        trust_opts = trust_opts or {}
+        self.urls = dict(CONFIG_URLS)
+        if trust_opts.get("trust_anchors"):
+            self.urls["anchors"] = trust_opts["trust_anchors"]
+        if trust_opts.get("allowed_list"):
+            self.urls["allowed"] = trust_opts["allowed_list"]
+        if trust_opts.get("trust_config"):
+            self.urls["config"] = trust_opts["trust_config"]
+
+        self.store = TrustStoreCache(trust_opts.get("cache_dir"),
+                                     trust_opts.get("ttl"),
+                                     trust_opts.get("offline"))
+        self.policy_path = trust_opts.get("policy")
+        self.lock = threading.Lock()
+        self.state = None
+        self.load()
+
+    # The loaded state is swapped as a whole so readers on other threads
+    # never see settings, digest and policy from different loads
+    @property
+    def settings(self):
+        return self.state.settings
+
+    @property
+    def digest(self):
+        return self.state.digest
+
+    @property
+    def policy(self):
+        return self.state.policy
+
+    @property
+    def verdict_digest(self):
+        return self.state.verdict_digest
+
+    def load(self):
+        """
+        Fetch the trust files through the cache, build the c2pa settings and
+        reload the policy if its file changed. Returns True if the settings
+        differ from the previous load.
+        """
+        with self.lock:
+            settings = { "verify": { "verify_trust": True }, "trust": {} }
+            with phase("trust_load"):
+                for key, name in (("anchors", "trust_anchors"),
+                                  ("allowed", "allowed_list"),
+                                  ("config", "trust_config")):
+                    content = validate_trust_content(key, self.store.fetch(self.urls[key]))
+                    if content: settings["trust"][name] = content
+
+            settings_json = json.dumps(settings, sort_keys=True)
+            digest = hashlib.sha256(settings_json.encode("utf-8")).hexdigest()
+            changed = self.state is None or digest != self.state.digest
+            policy = get_policy(self.policy_path)
+            self.state = TrustState(settings_json, digest, policy,
+                                    verdict_key(digest, policy))
+            return changed
+
+    def apply(self, state=None):
+        """
+        Load the settings into c2pa unless the calling thread already
+        loaded them. Must run on the thread that constructs the Reader.
+        Returns the state that is now active on this thread.
+        """
+        state = state or self.state
+        if settings_digest() != state.digest:
+            import c2pa
+            with phase("load_settings"):
+                c2pa.load_settings(state.settings)
+            set_settings_digest(state.digest)
+        return state
+
+    def verify(self, path):
+        """
+        Read and verify a file, returning the manifest store with the
+        updated validation state. Raises ValueError if there is no manifest.
+        Verdicts are served from the result cache when it is enabled.
+        """
+        state = self.state
+        with phase("cache"):
+            hit = cache_lookup(path, state.verdict_digest)
+        if hit and hit["verdict"] is not None:
+            with phase("json_parse"):
+                return loads(hit["verdict"])
+
+        self.apply(state)
+        store = load_manifest_store(path)
+        if store is None:
+            raise ValueError(f"No manifest found in {path}")
+        return self.verify_store(store, check_cache=False, policy=state.policy)
+
+    def verify_store(self, store, check_cache=True, policy=None):
+        """
+        Verify an already parsed manifest store, read while these settings
+        were applied. store.data is left untouched for other views.
+        The verdict is cached under the settings loaded on this thread.
+        """
+        policy = policy or self.policy
+        digest = verdict_key(settings_digest(), policy)
+        if check_cache:
+            with phase("cache"):
+                hit = cache_lookup(store.source, digest)
+            if hit and hit["verdict"] is not None:
+                with phase("json_parse"):
+                    return loads(hit["verdict"])
+
+        # update_validation_state only changes top-level keys and appends
+        # to validation_status, so a shallow copy keeps the store intact
+        json_data = dict(store.data)
+        if "validation_status" in json_data:
+            json_data["validation_status"] = list(json_data["validation_status"])
+
+        # Update validation state based on custom logic
+        with phase("policy"):
+            json_data = update_validation_state(json_data, policy)
+
+        if get_cache() is not None:
+            with phase("json_dump"):
+                verdict = dumps(json_data, COMPACT)
+            with phase("cache"):
+                cache_store(store.source, digest, verdict=verdict)
+        return json_data
+
+# Trust contexts already built in this process, keyed by trust sources
+_contexts = {}
+_contexts_lock = threading.Lock()
+
+def get_trust_context(trust_opts=None):
     """
-    Find if any invalid error codes are present in the data structure
+    Return the trust context for these options, building it on first use.
+    Safe to call from several threads.
     """
-    if isinstance(data, dict):
-        if "code" in data and isinstance(data["code"], str):
-            code_val = data["code"]
-            for bad_code in invalid_codes:
-                if bad_code in code_val:
-                    return True, f"Found fatal error '{code_val}' in structure."
-        for key, value in data.items():
-            found, reason = recursive_find_errors(value, invalid_codes)
-            if found: return True, reason
-    elif isinstance(data, list):
-        for item in data:
-            found, reason = recursive_find_errors(item, invalid_codes)
-            if found: return True, reason
-    return False, None
-
-def check_manifest(json_data):
+    trust_opts = trust_opts or {}
+    key = tuple(sorted(trust_opts.items()))
+    with _contexts_lock:
+        if key not in _contexts:
+            _contexts[key] = TrustContext(trust_opts)
+        return _contexts[key]
+
+def check_manifest(json_data, policy=None):
     """
-    Check history integrity with strict rules:
+    Check history integrity with the trust policy (the built-in default
+    unless another one is given). The default rules are:
     1. No ingredient created by Test software
-    2. No ingredient signed by Test certificates
-    3. No ingredient marked as Untrusted
-    4. No fatal errors in entire manifest
+    2. No ingredient marked as Untrusted
+    3. No ingredient signed by Test certificates
+    4. No fatal errors in any validation status
     5. No ingredient delta failures
+    Returns (history clean, reason, id of the rule that fired or None).
     """
-    active_id = json_data.get("active_manifest", "")
-    manifests = json_data.get("manifests", {})
+    return (policy or get_policy()).evaluate(json_data)
 
-    for man_id, content in manifests.items():
-        
-        # check manifest not active
-        if man_id != active_id:
-            
-            generator = content.get("claim_generator", "").lower()
-            
-            # 1. Check if generator is Test software
-            if "c2pa testing" in generator or "make_test_images" in generator or "testapp" in generator:
-                return False, f"Ingredient '{man_id}' created by Test software: {content.get('claim_generator')}."
-
-            # 2. Check if ingredient is Untrusted
-            status = content.get("validation_status", [])
-            for err in status:
-                if err.get("code") == "signingCredential.untrusted":
-                    return False, f"Ingredient '{man_id}' is Untrusted (Chain Broken)."
-            
-            # 3. Check signature issuer for Test Certificates
-            sig_info = content.get("signature_info", {})
-            issuer = sig_info.get("issuer", "")
-            cn = sig_info.get("common_name", "")
-            if "Test Signing" in issuer or "Test Signing" in cn:
-                 return False, f"Ingredient '{man_id}' signed by Test Certificate."
-
-    ERRORS = [
-        "mismatch",                
-        "signingCredential.invalid", 
-        "signingCredential.revoked"
-    ]
-
-    # 4. Check entire manifest for fatal errors
-    found_error, reason = recursive_find_errors(json_data, ERRORS)
-    if found_error:
-        return False, reason
-
-    # 5. Check ingredient deltas for failures
-    val_results = json_data.get("validation_results", {})
-    deltas = val_results.get("ingredientDeltas", [])
-    #("Deltas:", deltas)
-    for delta in deltas:
-        failures = delta.get("validationDeltas", {}).get("failure", [])
-        if failures:
-             return False, f"Ingredient Delta failure: {failures[0].get('code')}"
-
-    return True, "History clean"
-
-def is_valid(json_data):
+def is_valid(json_data, policy=None):
     """
     Check if active manifest is valid
     """
-    active_manifest = json_data.get("validation_results", {}).get("activeManifest", {})
-    successes = active_manifest.get("success", [])
-    has_valid_sig = any(s.get("code") == "claimSignature.validated" for s in successes)
-    
-    if not has_valid_sig:
-        return False
-
-    errors = json_data.get("validation_status", [])
-    for err in errors:
-        code = err.get("code", "")
-        #print("Active manifest error code:", code)
-        if code != "signingCredential.untrusted":
-            return False
-            
-    return True
-
-def update_validation_state(json_data):
+    return (policy or get_policy()).is_valid(json_data)
+
+def update_validation_state(json_data, policy=None):
     """
     Update validation state based on history integrity and current state
     """
+    policy = policy or get_policy()
     current_state = json_data.get("validation_state")
 
-    is_history_clean, reason = check_manifest(json_data)
+    is_history_clean, reason, rule = check_manifest(json_data, policy)
     
     if not is_history_clean:
         json_data["validation_state"] = "Invalid"
@@ -155,56 +227,38 @@ def update_validation_state(json_data):
         if not any(e.get("explanation") == reason for e in json_data["validation_status"]):
             json_data["validation_status"].append({
                 "code": "custom.historyCheckFailed",
-                "explanation": reason
+                "explanation": reason,
+                "rule": rule
             })
         return json_data
 
     # If history is clean and current state is Invalid, check if we can upgrade to Valid
     if current_state == "Invalid":
-        if is_valid(json_data):
+        if is_valid(json_data, policy):
             json_data["validation_state"] = "Valid"
 
     return json_data
 
 def main(path, trust_opts={}):
     # trust_opts keys: trust_anchors, allowed_list, trust_config
-    if trust_opts.get("trust_anchors"):
-        CONFIG_URLS["anchors"] = trust_opts["trust_anchors"]
-    if trust_opts.get("allowed_list"):
-        CONFIG_URLS["allowed"] = trust_opts["allowed_list"]
-    if trust_opts.get("trust_config"):
-        CONFIG_URLS["config"] = trust_opts["trust_config"]
-        
-    download_trust_files()
-
-    anchors = read_file_content(FILES["anchors"])
-    allowed = read_file_content(FILES["allowed"])
-    cfg = read_file_content(FILES["config"])
-    
-    # Configure C2PA trust settings
-    settings = { "verify": { "verify_trust": True }, "trust": {} }
-    
-    if anchors: settings["trust"]["trust_anchors"] = anchors
-    if allowed: settings["trust"]["allowed_list"] = allowed
-    if cfg: settings["trust"]["trust_config"] = cfg
-
-    c2pa.load_settings(json.dumps(settings))
+    context = get_trust_context(trust_opts)
 
     try:
-        reader = c2pa.Reader(path)
-        raw_output = reader.json()
-        if not raw_output: sys.exit(1)
-
-        json_data = json.loads(raw_output)
-        # Update validation state based on custom logic
-        json_data = update_validation_state(json_data)
-
-        print(json.dumps(json_data, indent=2))
+        json_data = context.verify(path)
+        emit(json_data)
 
     except Exception:
         print(f"No manifest found in {path}")
         sys.exit(1)
 
+def view_trust(store, trust_opts=None):
+    """
+    Print the trust verdict of an already parsed manifest store.
+    The trust context must have been applied before the store was read.
+    """
+    json_data = get_trust_context(trust_opts).verify_store(store)
+    emit(json_data)
+
 def cmd_trust(path: str, trust_opts: dict[str, any]):
     main(path, trust_opts)
 
@@ -217,13 +271,21 @@ Options:
       --trust_anchors <TRUST_ANCHORS>  URL or path to file containing list of trust anchors in PEM format [env: C2PATOOL_TRUST_ANCHORS={CONFIG_URLS['anchors']}]
       --allowed_list <ALLOWED_LIST>    URL or path to file containing specific manifest signing certificates in PEM format to implicitly trust [env: C2PATOOL_ALLOWED_LIST={CONFIG_URLS['allowed']}]
       --trust_config <TRUST_CONFIG>    URL or path to file containing configured EKUs in Oid dot notation [env: C2PATOOL_TRUST_CONFIG={CONFIG_URLS['config']}]
+      --cache_dir <DIR>                Folder for cached trust files [env: C2PATOOL_TRUST_CACHE={DEFAULT_CACHE_DIR}]
+      --ttl <SECONDS>                  Seconds before cached trust files are revalidated [env: C2PATOOL_TRUST_TTL={DEFAULT_TTL}]
+      --offline                        Only use cached or local trust files, never download [env: C2PATOOL_TRUST_OFFLINE]
+      --policy <FILE>                  JSON trust policy replacing the built-in history rules [env: {POLICY_ENV}]
   -h, --help                           Print help
     """
     print(help_text)
 
 if __name__ == "__main__":
-    target = sys.argv[1] if len(sys.argv) > 1 else "image.png"
-    if os.path.exists(target):
+    cache_opts, args = split_cache_flags(sys.argv[1:])
+    if cache_opts:
+        configure_cache(**cache_opts)
+
+    target = args[0] if args else "image.png"
+    if target == '-' or os.path.exists(target):
         main(target)
     else:
         sys.exit(1)
\ No newline at end of file
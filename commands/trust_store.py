@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+C2PA Trust Store Cache - Fetch trust anchors, allowed list and trust config
+into a versioned cache directory with conditional revalidation
+Usage: python trust_store.py <URL|PATH>... [--cache_dir DIR] [--ttl SECONDS] [--offline]
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import tempfile
+import contextlib
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to lock-free atomic replaces
+    fcntl = None
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    'C2PATOOL_TRUST_CACHE',
+    os.path.join(os.path.expanduser("~"), ".cache", "c2pa-py", "trust"))
+DEFAULT_TTL = int(os.environ.get('C2PATOOL_TRUST_TTL', 24 * 60 * 60))
+DEFAULT_OFFLINE = os.environ.get('C2PATOOL_TRUST_OFFLINE', '') not in ('', '0', 'false')
+
+# Bump when the on-disk layout changes so old entries are ignored
+CACHE_VERSION = "v1"
+
+# Seconds to wait before retrying a source whose download failed
+RETRY_AFTER = 60
+
+
+def is_url(source):
+    """True if the source has to be fetched over HTTP(S)"""
+    return source.startswith(("http://", "https://"))
+
+
+def atomic_write(path, data):
+    """Write bytes to path so readers never see a partial file"""
+    directory = os.path.dirname(path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp_path)
+        raise
+
+
+@contextlib.contextmanager
+def file_lock(path):
+    """Exclusive inter-process lock held for the duration of the block"""
+    if fcntl is None:
+        yield
+        return
+    with open(path, "a+b") as handle:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+
+class TrustStoreCache:
+    """
+    Cache of trust files keyed by their source URL or path.
+    Remote sources are revalidated with ETag / If-Modified-Since once the TTL
+    expires; local paths are always read directly and never copied.
+    """
+
+    def __init__(self, cache_dir=None, ttl=None, offline=None, session=None, timeout=30):
+        self.cache_dir = os.path.join(cache_dir or DEFAULT_CACHE_DIR, CACHE_VERSION)
+        self.ttl = DEFAULT_TTL if ttl is None else ttl
+        self.offline = DEFAULT_OFFLINE if offline is None else offline
+        self.timeout = timeout
+        self._session = session
+
+    @property
+    def session(self):
+        """Pooled HTTP session, created on first download"""
+        if self._session is None:
+            # requests is only imported when a trust file has to be downloaded
+            import requests
+            from requests.adapters import HTTPAdapter
+            self._session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4, max_retries=2)
+            self._session.mount("http://", adapter)
+            self._session.mount("https://", adapter)
+        return self._session
+
+    def entry_dir(self, source):
+        """Cache folder for one source"""
+        key = hashlib.sha256(source.encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.cache_dir, key)
+
+    def read_entry(self, entry):
+        """Return (content, meta) for a cache entry, None / {} where missing"""
+        content, meta = None, {}
+        try:
+            with open(os.path.join(entry, "meta.json"), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(os.path.join(entry, "content"), "rb") as f:
+                content = f.read()
+        except (OSError, ValueError):
+            pass
+        return content, meta
+
+    def is_fresh(self, meta):
+        """True if the entry was (re)validated within the TTL"""
+        return time.time() - meta.get("checked_at", 0) < self.ttl
+
+    def recently_failed(self, meta):
+        """True if the last download failed less than RETRY_AFTER seconds ago"""
+        return time.time() - meta.get("failed_at", 0) < RETRY_AFTER
+
+    def fetch(self, source):
+        """
+        Return the text content of a trust source, or None if unavailable.
+        Stale or failed downloads fall back to the last cached copy.
+        """
+        if not source:
+            return None
+
+        if not is_url(source):
+            path = source[len("file://"):] if source.startswith("file://") else source
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    return f.read().strip()
+            except OSError:
+                return None
+
+        entry = self.entry_dir(source)
+        content, meta = self.read_entry(entry)
+        if self.offline or self.is_fresh(meta) or self.recently_failed(meta):
+            return content.decode("utf-8").strip() if content is not None else None
+
+        os.makedirs(entry, exist_ok=True)
+        with file_lock(os.path.join(entry, ".lock")):
+            # Another worker may have refreshed the entry while we waited
+            content, meta = self.read_entry(entry)
+            if self.is_fresh(meta) or self.recently_failed(meta):
+                return content.decode("utf-8").strip() if content is not None else None
+
+            content = self.revalidate(source, entry, content, meta)
+
+        return content.decode("utf-8").strip() if content is not None else None
+
+    def revalidate(self, source, entry, content, meta):
+        """Conditional GET of a source, updating the cache entry in place"""
+        headers = {}
+        if content is not None:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        import requests
+
+        try:
+            r = self.session.get(source, headers=headers, timeout=self.timeout)
+            error = None if r.status_code in (200, 304) else f"HTTP {r.status_code}"
+        except requests.RequestException as e:
+            error = str(e)
+
+        if error:
+            # Remember the failure so other workers do not retry immediately
+            print(f"Warning: could not download {source}: {error}", file=sys.stderr)
+            meta["failed_at"] = time.time()
+        elif r.status_code == 304 and content is not None:
+            meta["checked_at"] = time.time()
+        else:
+            content = r.content
+            meta = {
+                "source": source,
+                "etag": r.headers.get("ETag"),
+                "last_modified": r.headers.get("Last-Modified"),
+                "sha256": hashlib.sha256(content).hexdigest(),
+                "checked_at": time.time(),
+            }
+            atomic_write(os.path.join(entry, "content"), content)
+
+        atomic_write(os.path.join(entry, "meta.json"), json.dumps(meta).encode("utf-8"))
+        return content
+
+
+if __name__ == "__main__":
+    sources = []
+    opts = {}
+    args = sys.argv[1:]
+
+    i = 0
+    while i < len(args):
+        if args[i] == '--cache_dir' and i + 1 < len(args):
+            opts["cache_dir"] = args[i + 1]
+            i += 2
+        elif args[i] == '--ttl' and i + 1 < len(args):
+            opts["ttl"] = int(args[i + 1])
+            i += 2
+        elif args[i] == '--offline':
+            opts["offline"] = True
+            i += 1
+        else:
+            sources.append(args[i])
+            i += 1
+
+    if not sources:
+        print("Usage: python trust_store.py <URL|PATH>... [--cache_dir DIR] [--ttl SECONDS] [--offline]")
+        sys.exit(1)
+
+    cache = TrustStoreCache(**opts)
+    for source in sources:
+        content = cache.fetch(source)
+        status = f"{len(content)} chars" if content is not None else "unavailable"
+        print(f"{source}: {status}")
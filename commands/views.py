@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+C2PA Views - Render any combination of views from a single Reader pass
+Usage: python views.py <image_path> [--info] [--tree [--depth N] [--max-nodes N]] [--detailed]
+                       [--ingredient] [--output DIR] [--export-store DIR] [trust ...]
+"""
+
+import os
+import sys
+import importlib
+
+if __name__ == "__main__":
+    # Allow running as a script as well as a module
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from commands.reader import load_manifest_store, open_source
+
+# Command line flag -> view name
+VIEW_FLAGS = {
+    '--info': 'info',
+    '--tree': 'tree',
+    '--detailed': 'detailed',
+    '--ingredient': 'ingredient',
+}
+
+# View name -> (module, function, whether it takes the view argument).
+# Modules are imported when a view is first rendered, so a run only loads
+# what it prints (requests and the policy engine stay out of --info).
+VIEWS = {
+    'default': ('commands.default', 'view_default', False),
+    'info': ('commands.info', 'view_info', False),
+    'tree': ('commands.tree', 'view_tree', True),
+    'detailed': ('commands.detailed', 'view_detailed', False),
+    'ingredient': ('commands.ingredient', 'view_ingredient', False),
+    'output': ('commands.output', 'view_output', True),
+    'export_store': ('commands.export', 'view_export_store', True),
+    'trust': ('commands.trust', 'view_trust', True),
+}
+
+# Views that only need the raw file, not a c2pa.Reader pass
+RAW_VIEWS = {'export_store'}
+
+# Options of the tree view, each taking a number
+TREE_OPTIONS = ('--depth', '--max-nodes')
+
+
+def parse_trust_args(args):
+    """Parse the trust sub-command options"""
+    names = {'--trust_anchors': 'trust_anchors',
+             '--allowed_list': 'allowed_list',
+             '--trust_config': 'trust_config',
+             '--cache_dir': 'cache_dir',
+             '--policy': 'policy'}
+    trust_opts = {}
+
+    i = 0
+    while i < len(args):
+        if args[i] in names and i + 1 < len(args):
+            trust_opts[names[args[i]]] = args[i + 1]
+            i += 2
+        elif args[i] == '--ttl' and i + 1 < len(args):
+            trust_opts['ttl'] = int(args[i + 1])
+            i += 2
+        elif args[i] == '--offline':
+            trust_opts['offline'] = True
+            i += 1
+        else:
+            raise ValueError(f"Unknown trust option: {args[i]}")
+
+    if 'policy' in trust_opts:
+        # Report a broken policy file before any file is read
+        from commands.policy import get_policy
+        get_policy(trust_opts['policy'])
+
+    return trust_opts
+
+
+def parse_view_args(args):
+    """
+    Turn view options into a list of (view name, argument) in command line
+    order. 'trust' consumes the remaining arguments as its own options.
+    --depth / --max-nodes become the argument of the tree view.
+    No options selects the default JSON view.
+    """
+    views = []
+    tree_args = []
+
+    i = 0
+    while i < len(args):
+        arg = args[i]
+
+        if arg in VIEW_FLAGS:
+            views.append((VIEW_FLAGS[arg], None))
+            i += 1
+        elif arg == '--output':
+            if i + 1 >= len(args):
+                raise ValueError("--output requires a value")
+            views.append(('output', args[i + 1]))
+            i += 2
+        elif arg == '--export-store':
+            if i + 1 >= len(args):
+                raise ValueError("--export-store requires a value")
+            views.append(('export_store', args[i + 1]))
+            i += 2
+        elif arg in TREE_OPTIONS:
+            if i + 1 >= len(args):
+                raise ValueError(f"{arg} requires a value")
+            tree_args += args[i:i + 2]
+            i += 2
+        elif arg == 'trust':
+            views.append(('trust', parse_trust_args(args[i + 1:])))
+            i = len(args)
+        else:
+            raise ValueError(f"Unknown option: {arg}")
+
+    if tree_args:
+        if ('tree', None) not in views:
+            raise ValueError("--depth and --max-nodes only apply to --tree")
+        from commands.tree import parse_tree_args
+        tree_opts = parse_tree_args(tree_args)
+        views = [(name, tree_opts if name == 'tree' else arg) for name, arg in views]
+
+    return views or [('default', None)]
+
+
+def load_view(name):
+    """The view function of a view name, importing its module on first use"""
+    module, function, _ = VIEWS[name]
+    return getattr(importlib.import_module(module), function)
+
+
+def render_view(store, name, arg):
+    """Render one view of an already parsed manifest store"""
+    view = load_view(name)
+    if VIEWS[name][2]:
+        view(store, arg)
+    else:
+        view(store)
+
+
+def run_views(path, views):
+    """
+    Read the file once and render every requested view from that pass.
+    If trust is requested its settings are applied before reading, as with
+    c2patool, so every view reflects trust validation. Raw views such as
+    --export-store work on the file itself, so the Reader is skipped when
+    nothing else is selected. path may also be '-' or any input accepted by
+    open_source(). Returns an exit code.
+    """
+    try:
+        path = open_source(path)
+
+        for name, arg in views:
+            if name == 'trust':
+                from commands.trust import get_trust_context
+                get_trust_context(arg).apply()
+
+        store = None
+        if any(name not in RAW_VIEWS for name, _ in views):
+            store = load_manifest_store(path)
+            if store is None:
+                print(f"No manifest found in {path}")
+                return 1
+
+        for name, arg in views:
+            if name == 'export_store':
+                if not load_view(name)(path, arg):
+                    print(f"No manifest found in {path}")
+                    return 1
+            else:
+                render_view(store, name, arg)
+
+    except Exception:
+        print(f"No manifest found in {path}")
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python views.py <image_path> [OPTIONS|COMMAND]")
+        sys.exit(1)
+
+    image_path = sys.argv[1]
+
+    if image_path != '-' and not os.path.exists(image_path):
+        print(f"Error: File not found: {image_path}")
+        sys.exit(1)
+
+    try:
+        selected = parse_view_args(sys.argv[2:])
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    sys.exit(run_views(image_path, selected))
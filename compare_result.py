@@ -3,14 +3,24 @@ import json
 import csv
 import sys
 import os
+import html
+import time
+import shutil
+import tempfile
+import hashlib
+import importlib.metadata
 from pathlib import Path
-from collections import defaultdict
-from datetime import datetime
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 
 # --- CONFIGURAZIONE ---
 DATASET_DIR = Path("C2PA_Dataset")
 OUTPUT_CSV = "trust_comparison.csv"
 OUTPUT_HTML = "trust_report.html"
+JOURNAL_FILE = "trust_comparison.journal.jsonl"
+# Rows per HTML page; larger runs are split into several page files
+DEFAULT_PAGE_SIZE = 5000
 
 # Argomenti per la validazione Trust
 TRUST_ARGS = [
@@ -19,19 +29,35 @@ TRUST_ARGS = [
     "--trust_config", "https://contentcredentials.org/trust/store.cfg",
 ]
 
-IMAGE_EXTS = {".png", ".jpg", ".jpeg", ".webp", ".tiff", ".mov", ".mp4", ".dng", ".avi", ".mp3", ".wav", ".pdf", ".heic", ".m4a", ".avif", ".gif", ".heif", ".TIF"}
+# State of files skipped by --triage because their headers show no manifest
+NO_MANIFEST = "NO_MANIFEST"
 
-def run_json(cmd):
-    """Run a command and parse its JSON output."""
+# Seconds each tool may spend on one file (--timeout, 0 disables the deadline)
+DEFAULT_TIMEOUT = 120
+TIMEOUT = "ERROR_TIMEOUT"
+
+def is_media_file(path):
+    """True for files in a container format C2PA can be embedded in, by magic bytes."""
+    from commands.locator import sniff_format
+    try:
+        return path.is_file() and sniff_format(path) is not None
+    except OSError:
+        return False
+
+def run_json(cmd, timeout=None):
+    """Run a command and parse its JSON output; the command is killed after timeout seconds."""
     try:
         result = subprocess.run(
             cmd,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
             text=True,
-            check=True
+            check=True,
+            timeout=timeout or None
         )
         return json.loads(result.stdout)
+    except subprocess.TimeoutExpired:
+        return {"validation_state": TIMEOUT}
     except subprocess.CalledProcessError:
         # not a valid manifest or tool error
         return {"validation_state": "ERROR_TOOL_FAILED"}
@@ -40,47 +66,429 @@ def run_json(cmd):
     except Exception:
         return {"validation_state": "ERROR_GENERIC"}
 
+def sniff_no_manifest(image):
+    """True if the headers show no manifest; unreadable files go to the tools."""
+    from commands.locator import has_manifest
+    try:
+        return has_manifest(image) is False
+    except (OSError, ValueError):
+        return False
+
 def get_validation_state(data):
     """Extract validation state from tool output."""
     return data.get("validation_state", "MISSING")
 
-def generate_html_report(rows, stats, folder_stats):
-    """Generate a HTML report."""
-    
-    html_content = f"""
-    <!DOCTYPE html>
-    <html lang="en">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>C2PA Validation Comparison Report</title>
+def tool_versions(timeout=DEFAULT_TIMEOUT):
+    """Versions of both tools, so journal entries from other versions are not reused."""
+    try:
+        result = subprocess.run(["c2patool", "--version"], stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE, text=True, check=True,
+                                timeout=timeout or None)
+        c2patool_version = result.stdout.strip()
+    except Exception:
+        # Missing, failing or hung (TimeoutExpired) tool
+        c2patool_version = "unavailable"
+
+    try:
+        c2pa_version = importlib.metadata.version("c2pa-python")
+    except importlib.metadata.PackageNotFoundError:
+        c2pa_version = "unknown"
+
+    # The Python verdict also depends on our own trust logic and on the
+    # active trust policy (built-in or from C2PATOOL_TRUST_POLICY)
+    versions = {"c2patool": c2patool_version, "c2pa-python": c2pa_version}
+    for name in ("trust.py", "policy.py"):
+        with open(Path(__file__).parent / "commands" / name, "rb") as f:
+            versions[name] = hashlib.sha256(f.read()).hexdigest()[:16]
+
+    from commands.policy import get_policy
+    versions["policy"] = get_policy().digest[:16]
+    return versions
+
+def load_journal(path):
+    """Latest journal record per relative path; a truncated last line is ignored."""
+    records = {}
+    if not os.path.exists(path):
+        return records
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            records[record["path"]] = record
+    return records
+
+def rust_state(image, timeout=None):
+    """Validation state reported by the reference c2patool."""
+    rust_cmd = ["c2patool", str(image), "trust"] + TRUST_ARGS
+    return get_validation_state(run_json(rust_cmd, timeout))
+
+def python_state(image, timeout=None):
+    """Validation state reported by the Python implementation (isolated subprocess)."""
+    # py_cmd = ["python3", "c2pa-py.py", str(image), "trust"] + TRUST_ARGS
+    py_cmd = [sys.executable, "commands/trust.py", str(image)]
+    return get_validation_state(run_json(py_cmd, timeout))
+
+def init_python_worker():
+    """Import c2pa and load the trust store once per worker process."""
+    from commands.trust import get_trust_context
+    get_trust_context()
+
+def python_state_in_process(image):
+    """
+    Validation state reported by the Python implementation, computed inside a
+    long-lived worker. Failures map to the same state as a failed subprocess.
+    """
+    from commands.trust import get_trust_context
+    try:
+        return get_validation_state(get_trust_context().verify(str(image)))
+    except Exception:
+        return "ERROR_TOOL_FAILED"
+
+def python_result(future):
+    """
+    State of a Python side future; a worker killed above --max-rss gives
+    ERROR_MEMORY_LIMIT, one killed at the --timeout deadline ERROR_TIMEOUT
+    """
+    from commands.pool import WorkerError
+    try:
+        return future.result()
+    except WorkerError as e:
+        return {"memory": "ERROR_MEMORY_LIMIT", "timeout": TIMEOUT}.get(e.reason, "ERROR_TOOL_FAILED")
+
+def compare_files(files, jobs, in_process=True, triage=False, limits=None, stats=None):
+    """
+    Run both tools over files and yield (image, rust_state, py_state) in input
+    order. c2patool runs in subprocesses driven by a bounded thread pool; the
+    Python side runs either in a pool of worker processes, governed by the
+    split_pool_flags() limits, or as subprocesses. Every tool gets
+    limits["timeout"] seconds per file: subprocesses are killed and in-process
+    workers replaced past it. With triage, files whose headers show no
+    manifest skip both tools. stats, if given, receives the worker pool
+    summary line.
+    """
+    from commands.pool import make_pool, split_pool_flags, file_size
+
+    limits = limits or split_pool_flags([])[0]
+    timeout = limits.get("timeout")
+    with ThreadPoolExecutor(max_workers=jobs) as executor, \
+         (make_pool(python_state_in_process, jobs, limits, initializer=init_python_worker)
+          if in_process else ThreadPoolExecutor(max_workers=jobs)) as py_executor:
+        pending = deque()
+        files = iter(files)
+
+        def submit_python(image):
+            if not in_process:
+                return py_executor.submit(python_state, image, timeout)
+            size = file_size(image)
+            return py_executor.submit(py_executor.lane_for(size, limits["large_file_mb"]), image, size=size)
+
+        def fill():
+            while len(pending) < jobs * 2:
+                image = next(files, None)
+                if image is None:
+                    return
+                if triage and sniff_no_manifest(image):
+                    pending.append((image, None, None))
+                    continue
+                pending.append((image,
+                                executor.submit(rust_state, image, timeout),
+                                submit_python(image)))
+
+        fill()
+        while pending:
+            image, rust_future, py_future = pending.popleft()
+            if rust_future is None:
+                yield image, NO_MANIFEST, NO_MANIFEST
+            else:
+                yield image, rust_future.result(), python_result(py_future)
+            fill()
+
+    if stats is not None and in_process:
+        stats.append(py_executor.summary())
+
+class Progress:
+    """Single-line progress display with throughput and ETA."""
+
+    def __init__(self, total):
+        self.total = total
+        self.done = 0
+        self.start = time.perf_counter()
+
+    def update(self, label):
+        self.done += 1
+        elapsed = time.perf_counter() - self.start
+        rate = self.done / elapsed if elapsed > 0 else 0
+        remaining = (self.total - self.done) / rate if rate > 0 else 0
+        eta = str(timedelta(seconds=int(remaining)))
+        line = f"[{self.done}/{self.total}] {rate:.1f} files/s, ETA {eta} | {label}"
+        print(f"\r{line[:120]:<120}", end="", flush=True)
+
+def parse_args(argv):
+    """Parse command line options."""
+    from commands.pool import split_pool_flags
+    limits, argv = split_pool_flags(argv)
+    if limits["timeout"] is None:
+        limits["timeout"] = DEFAULT_TIMEOUT
+    opts = {"dataset": None, "jobs": 1, "in_process": True, "triage": False,
+            "resume": False, "changed_only": False, "page_size": DEFAULT_PAGE_SIZE,
+            "limits": limits}
+
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if arg in ("--jobs", "-j") and i + 1 < len(argv):
+            opts["jobs"] = max(1, int(argv[i + 1]))
+            i += 2
+        elif arg == "--subprocess":
+            opts["in_process"] = False
+            i += 1
+        elif arg == "--triage":
+            opts["triage"] = True
+            i += 1
+        elif arg == "--page-size" and i + 1 < len(argv):
+            opts["page_size"] = max(1, int(argv[i + 1]))
+            i += 2
+        elif arg == "--resume":
+            opts["resume"] = True
+            i += 1
+        elif arg == "--changed-only":
+            opts["changed_only"] = True
+            i += 1
+        elif opts["dataset"] is None:
+            opts["dataset"] = arg
+            i += 1
+        else:
+            raise ValueError(f"Unknown option: {arg}")
+
+    return opts
+
+HTML_STYLE = """
         <style>
-            body {{ font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; margin: 0; padding: 20px; background-color: #f4f4f9; }}
-            h1 {{ color: #333; }}
-            .summary-box {{ display: flex; gap: 20px; margin-bottom: 30px; }}
-            .card {{ background: white; padding: 20px; border-radius: 8px; box-shadow: 0 2px 5px rgba(0,0,0,0.1); flex: 1; text-align: center; }}
-            .card h2 {{ margin: 0; font-size: 36px; color: #007bff; }}
-            .card p {{ margin: 5px 0 0; color: #666; font-weight: bold; }}
+            body { font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; margin: 0; padding: 20px; background-color: #f4f4f9; }
+            h1 { color: #333; }
+            .summary-box { display: flex; gap: 20px; margin-bottom: 30px; }
+            .card { background: white; padding: 20px; border-radius: 8px; box-shadow: 0 2px 5px rgba(0,0,0,0.1); flex: 1; text-align: center; }
+            .card h2 { margin: 0; font-size: 36px; color: #007bff; }
+            .card p { margin: 5px 0 0; color: #666; font-weight: bold; }
             
-            table {{ width: 100%; border-collapse: collapse; margin-bottom: 40px; background: white; border-radius: 8px; overflow: hidden; box-shadow: 0 2px 5px rgba(0,0,0,0.1); }}
-            th, td {{ padding: 12px 15px; text-align: left; border-bottom: 1px solid #ddd; }}
-            th {{ background-color: #007bff; color: white; }}
-            tr:hover {{ background-color: #f1f1f1; }}
+            table { width: 100%; border-collapse: collapse; margin-bottom: 40px; background: white; border-radius: 8px; overflow: hidden; box-shadow: 0 2px 5px rgba(0,0,0,0.1); }
+            th, td { padding: 12px 15px; text-align: left; border-bottom: 1px solid #ddd; }
+            th { background-color: #007bff; color: white; }
+            tr:hover { background-color: #f1f1f1; }
             
-            .status-Correct {{ color: green; font-weight: bold; }}
-            .status-Mismatch {{ color: red; font-weight: bold; }}
+            .status-Correct { color: green; font-weight: bold; }
+            .status-Mismatch { color: red; font-weight: bold; }
             
-            .badge {{ padding: 4px 8px; border-radius: 4px; font-size: 12px; color: white; font-weight: bold; }}
-            .badge-Valid {{ background-color: #28a745; }}
-            .badge-Invalid {{ background-color: #dc3545; }}
-            .badge-Trusted {{ background-color: #17a2b8; }}
-            .badge-ERROR_TOOL_FAILED {{ background-color: #6c757d; }}
-            .badge-MISSING {{ background-color: #ffc107; color: black; }}
-
-            .folder-header {{ background-color: #e9ecef; font-weight: bold; color: #495057; }}
+            .badge { padding: 4px 8px; border-radius: 4px; font-size: 12px; color: white; font-weight: bold; }
+            .badge-Valid { background-color: #28a745; }
+            .badge-Invalid { background-color: #dc3545; }
+            .badge-Trusted { background-color: #17a2b8; }
+            .badge-ERROR_TOOL_FAILED { background-color: #6c757d; }
+            .badge-MISSING { background-color: #ffc107; color: black; }
+            .badge-NO_MANIFEST { background-color: #adb5bd; }
+            .badge-ERROR_TIMEOUT { background-color: #fd7e14; }
+            .badge-ERROR_MEMORY_LIMIT { background-color: #6f42c1; }
+
+            .folder-header { background-color: #e9ecef; font-weight: bold; color: #495057; }
+            .filters { margin-bottom: 15px; }
+            .filters input { padding: 6px 10px; width: 300px; }
+            .pager { margin: 10px 0 20px; }
         </style>
+"""
+
+# Filters the detailed table of a page by text and by mismatch, client side
+HTML_FILTER_SCRIPT = """
+        <script>
+            function filterRows() {
+                var text = document.getElementById('filter-text').value.toLowerCase();
+                var onlyMismatch = document.getElementById('filter-mismatch').checked;
+                document.querySelectorAll('#details tbody tr').forEach(function (row) {
+                    var show = row.textContent.toLowerCase().indexOf(text) !== -1 &&
+                               (!onlyMismatch || row.querySelector('.status-Mismatch'));
+                    row.style.display = show ? '' : 'none';
+                });
+            }
+        </script>
+"""
+
+HTML_DETAILS_HEADER = """
+        <div class="filters">
+            <input id="filter-text" type="text" placeholder="Filter rows..." oninput="filterRows()">
+            <label><input id="filter-mismatch" type="checkbox" onchange="filterRows()"> Mismatches only</label>
+        </div>
+        <table id="details">
+            <thead>
+                <tr>
+                    <th>Image Path</th>
+                    <th>Rust State</th>
+                    <th>Python State</th>
+                    <th>Result</th>
+                </tr>
+            </thead>
+            <tbody>
+"""
+
+HTML_TABLE_FOOTER = """
+            </tbody>
+        </table>
+"""
+
+def html_page_start(title):
+    """Opening of an HTML page up to the start of the body."""
+    return f"""
+    <!DOCTYPE html>
+    <html lang="en">
+    <head>
+        <meta charset="UTF-8">
+        <meta name="viewport" content="width=device-width, initial-scale=1.0">
+        <title>{title}</title>{HTML_STYLE}{HTML_FILTER_SCRIPT}
     </head>
     <body>
+    """
+
+def html_page_end():
+    return """
+    </body>
+    </html>
+    """
+
+def badge(val):
+    """Coloured badge for a validation state."""
+    cls = f"badge-{val}" if val in ["Valid", "Invalid", "Trusted", NO_MANIFEST, TIMEOUT, "ERROR_MEMORY_LIMIT"] else "badge-ERROR_TOOL_FAILED"
+    return f'<span class="badge {cls}">{html.escape(val)}</span>'
+
+def html_row(path, rust, py, res):
+    """One row of the detailed comparison table."""
+    res_class = "status-Correct" if res == "Correct" else "status-Mismatch"
+    return f"""
+                <tr>
+                    <td>{html.escape(path)}</td>
+                    <td>{badge(rust)}</td>
+                    <td>{badge(py)}</td>
+                    <td class="{res_class}">{res}</td>
+                </tr>
+        """
+
+class ReportWriter:
+    """
+    Streams comparison rows to the CSV and HTML reports as they arrive.
+    Only the running totals stay in memory. HTML rows are written in pages of
+    page_size rows; a run that fits in one page gets a single self-contained
+    report, larger runs get an index page plus one file per page.
+    """
+
+    def __init__(self, csv_path=OUTPUT_CSV, html_path=OUTPUT_HTML, page_size=DEFAULT_PAGE_SIZE):
+        self.csv_path = csv_path
+        self.html_path = html_path
+        self.page_size = page_size
+        self.pages_dir = f"{os.path.splitext(html_path)[0]}_pages"
+        # Pages left over from an earlier, larger run would be stale
+        shutil.rmtree(self.pages_dir, ignore_errors=True)
+
+        self.stats = {"total": 0, "correct": 0, "mismatch": 0, "timeout": 0}
+        self.folder_stats = defaultdict(lambda: {"total": 0, "correct": 0, "mismatch": 0})
+
+        self.csv_file = open(csv_path, "w", newline="", encoding="utf-8")
+        self.csv_writer = csv.writer(self.csv_file)
+        self.csv_writer.writerow(["Image", "Rust_validation", "Python_validation", "Result"])
+
+        # Rows of the current page, spooled to disk until the page is complete
+        self.fragment = tempfile.TemporaryFile("w+", encoding="utf-8")
+        self.page_rows = 0
+        self.page_mismatches = 0
+        self.page_first = None
+        self.page_last = None
+        # (number, first path, last path, rows, mismatches) of finished pages
+        self.pages = []
+
+    def page_path(self, number):
+        return os.path.join(self.pages_dir, f"page_{number:05d}.html")
+
+    def add(self, path, rust_state, py_state):
+        """Record one comparison result."""
+        folder_name = Path(path).parts[0] if len(Path(path).parts) > 1 else "Root"
+        is_correct = (rust_state == py_state)
+        result_str = "Correct" if is_correct else "Not Correct"
+
+        # update stats
+        key = "correct" if is_correct else "mismatch"
+        self.stats["total"] += 1
+        self.stats[key] += 1
+        self.folder_stats[folder_name]["total"] += 1
+        self.folder_stats[folder_name][key] += 1
+        if TIMEOUT in (rust_state, py_state):
+            self.stats["timeout"] += 1
+
+        self.csv_writer.writerow([path, rust_state, py_state, result_str])
+
+        if self.page_rows == self.page_size:
+            self.flush_page(has_next=True)
+        self.fragment.write(html_row(path, rust_state, py_state, result_str))
+        self.page_rows += 1
+        self.page_mismatches += 0 if is_correct else 1
+        self.page_first = self.page_first or path
+        self.page_last = path
+
+    def flush_page(self, has_next):
+        """Write the spooled rows out as a standalone page file."""
+        number = len(self.pages) + 1
+        os.makedirs(self.pages_dir, exist_ok=True)
+        index_link = os.path.relpath(self.html_path, self.pages_dir)
+
+        nav = [f'<a href="{index_link}">Summary</a>']
+        if number > 1:
+            nav.append(f'<a href="{os.path.basename(self.page_path(number - 1))}">&laquo; Previous</a>')
+        if has_next:
+            nav.append(f'<a href="{os.path.basename(self.page_path(number + 1))}">Next &raquo;</a>')
+        nav_html = f'<div class="pager">{" | ".join(nav)}</div>'
+
+        with open(self.page_path(number), "w", encoding="utf-8") as f:
+            f.write(html_page_start(f"C2PA Validation Comparison Report - Page {number}"))
+            f.write(f"<h1>Detailed Comparison - Page {number}</h1>{nav_html}")
+            f.write(HTML_DETAILS_HEADER)
+            self.fragment.seek(0)
+            shutil.copyfileobj(self.fragment, f)
+            f.write(HTML_TABLE_FOOTER)
+            f.write(nav_html)
+            f.write(html_page_end())
+
+        self.pages.append((number, self.page_first, self.page_last, self.page_rows, self.page_mismatches))
+        self.fragment.seek(0)
+        self.fragment.truncate()
+        self.page_rows = 0
+        self.page_mismatches = 0
+        self.page_first = None
+
+    def close(self):
+        """Finish the CSV and write the HTML summary page."""
+        self.stats["accuracy"] = (self.stats["correct"] / self.stats["total"] * 100) if self.stats["total"] > 0 else 0
+        self.csv_file.close()
+
+        # Anything beyond one page gets paged files; earlier pages already exist
+        single_page = not self.pages
+        if not single_page and self.page_rows:
+            self.flush_page(has_next=False)
+
+        with open(self.html_path, "w", encoding="utf-8") as f:
+            f.write(html_page_start("C2PA Validation Comparison Report"))
+            f.write(self.summary_html())
+            if single_page:
+                f.write(HTML_DETAILS_HEADER)
+                self.fragment.seek(0)
+                shutil.copyfileobj(self.fragment, f)
+                f.write(HTML_TABLE_FOOTER)
+            else:
+                f.write(self.page_index_html())
+            f.write(html_page_end())
+
+        self.fragment.close()
+
+    def summary_html(self):
+        """Summary cards and folder breakdown."""
+        stats = self.stats
+        parts = [f"""
         <h1>C2PA Tool Comparison Report</h1>
         <p>Generated on: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}</p>
 
@@ -115,121 +523,142 @@ def generate_html_report(rows, stats, folder_stats):
                 </tr>
             </thead>
             <tbody>
-    """
+    """]
 
-    for folder, s in folder_stats.items():
-        accuracy = (s['correct'] / s['total']) * 100 if s['total'] > 0 else 0
-        html_content += f"""
+        for folder, s in self.folder_stats.items():
+            accuracy = (s['correct'] / s['total']) * 100 if s['total'] > 0 else 0
+            parts.append(f"""
                 <tr>
-                    <td><b>{folder}</b></td>
+                    <td><b>{html.escape(folder)}</b></td>
                     <td>{s['total']}</td>
                     <td>{s['correct']}</td>
                     <td style="color: {'red' if s['mismatch'] > 0 else 'inherit'}">{s['mismatch']}</td>
                     <td>{accuracy:.1f}%</td>
                 </tr>
-        """
+        """)
 
-    html_content += """
-            </tbody>
-        </table>
+        parts.append(HTML_TABLE_FOOTER)
+        parts.append("""
+        <h2>Detailed Comparison</h2>""")
+        return "".join(parts)
 
-        <h2>Detailed Comparison</h2>
+    def page_index_html(self):
+        """Links to the paged detailed tables."""
+        parts = ["""
         <table>
             <thead>
                 <tr>
-                    <th>Image Path</th>
-                    <th>Rust State</th>
-                    <th>Python State</th>
-                    <th>Result</th>
+                    <th>Page</th>
+                    <th>First Image</th>
+                    <th>Last Image</th>
+                    <th>Files</th>
+                    <th>Mismatches</th>
                 </tr>
             </thead>
             <tbody>
-    """
-
-    for row in rows:
-        path, rust, py, res = row
-        res_class = "status-Correct" if res == "Correct" else "status-Mismatch"
-        
-        # Helper per badge
-        def badge(val):
-            cls = f"badge-{val}" if val in ["Valid", "Invalid", "Trusted"] else "badge-ERROR_TOOL_FAILED"
-            return f'<span class="badge {cls}">{val}</span>'
-
-        html_content += f"""
+    """]
+        html_dir = os.path.dirname(self.html_path) or "."
+        for number, first, last, rows, mismatches in self.pages:
+            link = os.path.relpath(self.page_path(number), html_dir)
+            parts.append(f"""
                 <tr>
-                    <td>{path}</td>
-                    <td>{badge(rust)}</td>
-                    <td>{badge(py)}</td>
-                    <td class="{res_class}">{res}</td>
+                    <td><a href="{link}">Page {number}</a></td>
+                    <td>{html.escape(first)}</td>
+                    <td>{html.escape(last)}</td>
+                    <td>{rows}</td>
+                    <td style="color: {'red' if mismatches > 0 else 'inherit'}">{mismatches}</td>
                 </tr>
-        """
-
-    html_content += """
-            </tbody>
-        </table>
-    </body>
-    </html>
-    """
-
-    with open(OUTPUT_HTML, "w", encoding="utf-8") as f:
-        f.write(html_content)
-    print(f"\n HTML Report written to: {os.path.abspath(OUTPUT_HTML)}")
+        """)
+        parts.append(HTML_TABLE_FOOTER)
+        return "".join(parts)
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python compare_result.py <PATH> ")
+    try:
+        opts = parse_args(sys.argv[1:])
+    except ValueError as e:
+        print(f"Error: {e}")
         sys.exit(1)
-    
-    if not Path(sys.argv[1]).exists():
-        print(f"Error: Dataset directory '{sys.argv[1]}' not found.")
+
+    if opts["dataset"] is None:
+        print("Usage: python compare_result.py <PATH> [--jobs N] [--subprocess] [--triage] [--resume | --changed-only] [--page-size N] [--max-rss MB] [--max-tasks N] [--max-bytes MB] [--large-file MB] [--large-jobs N] [--timeout SECONDS]")
+        sys.exit(1)
+
+    dataset = Path(opts["dataset"])
+    if not dataset.exists():
+        print(f"Error: Dataset directory '{dataset}' not found.")
         return
 
-    print(f"Starting comparison on '{sys.argv[1]}'...\n")
-    rows = []
-    
-    # Global result
-    stats = {"total": 0, "correct": 0, "mismatch": 0}
-    # Folder result
-    folder_stats = defaultdict(lambda: {"total": 0, "correct": 0, "mismatch": 0})
-
-    files = sorted([f for f in Path(sys.argv[1]).rglob("*") if f.suffix.lower() in IMAGE_EXTS])
-
-    for i, image in enumerate(files):
-        relative_path = image.relative_to(Path(sys.argv[1]))
-        folder_name = relative_path.parts[0] if len(relative_path.parts) > 1 else "Root"
-        
-        # Progress bar
-        print(f"[{i+1}/{len(files)}] Processing: {relative_path}", end="\r")
-
-        # --- Rust / c2patool ---
-        rust_cmd = ["c2patool", str(image), "trust"] + TRUST_ARGS
-        rust_json = run_json(rust_cmd)
-        rust_state = get_validation_state(rust_json)
-
-        # --- Python implementation ---
-        # py_cmd = ["python3", "c2pa-py.py", str(image), "trust"] + TRUST_ARGS
-        py_cmd = [sys.executable, "commands/trust.py", str(image)]
-        py_json = run_json(py_cmd)
-        py_state = get_validation_state(py_json)
+    mode = "in-process" if opts["in_process"] else "subprocess"
+    print(f"Starting comparison on '{dataset}' with {opts['jobs']} job(s), Python side {mode}...\n")
 
-        is_correct = (rust_state == py_state)
-        result_str = "Correct" if is_correct else "Not Correct"
+    # Select files by magic bytes, so misnamed or upper-case extensions are not missed
+    files = sorted([f for f in dataset.rglob("*") if is_media_file(f)])
 
-        # update stats
-        stats["total"] += 1
-        folder_stats[folder_name]["total"] += 1
-        
-        if is_correct:
-            stats["correct"] += 1
-            folder_stats[folder_name]["correct"] += 1
+    # Journal: --resume skips files already done by the same tool versions,
+    # --changed-only additionally requires the file size and mtime to match
+    versions = tool_versions(opts["limits"]["timeout"])
+    reuse = opts["resume"] or opts["changed_only"]
+    journal = load_journal(JOURNAL_FILE) if reuse else {}
+    identities = {}
+    reused = {}
+    for image in files:
+        st = image.stat()
+        rel = str(image.relative_to(dataset))
+        identities[image] = (st.st_size, st.st_mtime_ns)
+        record = journal.get(rel)
+        if record is None or record.get("tools") != versions:
+            continue
+        if record.get("rust") == NO_MANIFEST and not opts["triage"]:
+            # Triaged out earlier, this run wants both tools on every file
+            continue
+        if opts["changed_only"] and (record.get("size"), record.get("mtime_ns")) != identities[image]:
+            continue
+        reused[image] = record
+
+    todo = [image for image in files if image not in reused]
+    if reuse:
+        print(f"Reusing {len(reused)} result(s) from {JOURNAL_FILE}, {len(todo)} file(s) to process.\n")
+    progress = Progress(len(todo))
+    pool_stats = []
+    results = compare_files(todo, opts["jobs"], opts["in_process"], opts["triage"],
+                            opts["limits"], pool_stats)
+    report = ReportWriter(page_size=opts["page_size"])
+
+    journal_out = open(JOURNAL_FILE, "a" if reuse else "w", encoding="utf-8")
+    if reuse and journal_out.tell() > 0:
+        # Terminate a line cut short by an interrupted run
+        journal_out.write("\n")
+    # Compacted journal with one record per current file, swapped in at the end
+    compacted = open(f"{JOURNAL_FILE}.tmp", "w", encoding="utf-8")
+
+    for image in files:
+        relative_path = image.relative_to(dataset)
+
+        if image in reused:
+            record = reused[image]
         else:
-            stats["mismatch"] += 1
-            folder_stats[folder_name]["mismatch"] += 1
+            _, rust_state, py_state = next(results)
+            size, mtime_ns = identities[image]
+            record = {"path": str(relative_path), "size": size, "mtime_ns": mtime_ns,
+                      "tools": versions, "rust": rust_state, "python": py_state}
+            # One flushed line per file, so an interrupted run can be resumed
+            journal_out.write(json.dumps(record) + "\n")
+            journal_out.flush()
+
+            # Progress line
+            progress.update(str(relative_path))
 
-        rows.append([str(relative_path), rust_state, py_state, result_str])
+        compacted.write(json.dumps(record) + "\n")
+        report.add(str(relative_path), record["rust"], record["python"])
 
-    # Accuracy calculation
-    stats["accuracy"] = (stats["correct"] / stats["total"] * 100) if stats["total"] > 0 else 0
+    # Run the generator to its end so the worker pools shut down
+    next(results, None)
+    journal_out.close()
+    compacted.close()
+    os.replace(f"{JOURNAL_FILE}.tmp", JOURNAL_FILE)
+    report.close()
+
+    stats, folder_stats = report.stats, report.folder_stats
 
     print(f"\n\n{'='*60}")
     print(f"COMPARISON COMPLETED")
@@ -238,6 +667,10 @@ def main():
     print(f"Matches:     {stats['correct']}")
     print(f"Mismatches:  {stats['mismatch']}")
     print(f"Accuracy:    {stats['accuracy']:.2f}%")
+    if stats["timeout"]:
+        print(f"Timed out:   {stats['timeout']}")
+    for line in pool_stats:
+        print(line)
     print(f"{'='*60}\n")
 
     # Print folder breakdown
@@ -248,15 +681,9 @@ def main():
         print(f"{folder:<30} | {s['total']:<6} | {s['correct']:<6} | {acc:.1f}%")
     print("-" * 60)
 
-    # CSV
-    with open(OUTPUT_CSV, "w", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerow(["Image", "Rust_validation", "Python_validation", "Result"])
-        writer.writerows(rows)
     print(f"\n CSV Data written to: {OUTPUT_CSV}")
-
-    # HTML
-    generate_html_report(rows, stats, folder_stats)
+    pages = f" ({len(report.pages)} pages in {report.pages_dir})" if report.pages else ""
+    print(f"\n HTML Report written to: {os.path.abspath(OUTPUT_HTML)}{pages}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file